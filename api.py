@@ -0,0 +1,320 @@
+"""
+Local HTTP API for derived-house results (framework-free ASGI app).
+
+Endpoints (JSON in, JSON out):
+    GET  /health
+    POST /derive       {"planets", "cusps"?, "root", "n", "ruler_system"?, "allow_fallback"?, "comment"?}
+    POST /derive/bulk  {"charts": [{"planets", "cusps"?}, ...],
+                        "queries": [{"chart": <index>, "root", "n", ...}, ...]}
+
+Concurrent requests are micro-batched: queries arriving within `max_wait_ms`
+are grouped by chart. Aspects for all new charts in a batch are computed in
+one vectorized call, and ruler strengths are shared per chart. Responses are
+cached by chart hash + parameters.
+
+Run:
+    python api.py --port 8765                 # stdlib asyncio server
+    uvicorn api:app --port 8765               # or any ASGI server
+"""
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import TTLCache, content_key, parse_cusp_lons_cached, parse_planets_cached, parse_cusps_cached
+from engine import (
+    AspectIndex, default_cusp_signs, derive, houses_from_cusps, make_readable_comment, score_label,
+)
+from vectorized import compute_aspects_batch
+
+class BadRequest(ValueError):
+    pass
+
+# =========================
+# BATCHING
+# =========================
+class MicroBatcher:
+    """
+    Collects derive queries for up to `max_wait_ms` (or `max_batch` queries)
+    and runs them together on a worker thread.
+    """
+
+    def __init__(self, max_batch: int = 256, max_wait_ms: float = 2.0, cache_size: int = 20000, ttl: float = 3600.0):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.parse_cache = TTLCache(maxsize=4096, ttl=ttl)
+        self.aspect_cache = TTLCache(maxsize=4096, ttl=ttl)
+        self.response_cache = TTLCache(maxsize=cache_size, ttl=ttl)
+        self._queue = None
+        self._worker = None
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="derive")
+        self.batches = 0
+        self.batched_queries = 0
+
+    async def submit(self, query: dict) -> dict:
+        """Resolve one normalized query (see parse_query) to a response dict."""
+        hit = self.response_cache.get(query["key"])
+        if hit is not None:
+            return hit
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, fut))
+        return await fut
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                results = await loop.run_in_executor(self._pool, self._compute, [q for q, _ in batch])
+            except Exception as e:  # _compute itself failed; per-query errors come back as results
+                results = [e] * len(batch)
+            for (_, fut), res in zip(batch, results):
+                if fut.done():
+                    continue
+                if isinstance(res, Exception):
+                    fut.set_exception(res)
+                else:
+                    fut.set_result(res)
+
+    def _compute(self, queries: list) -> list:
+        """
+        One response dict or exception per query, in order: a chart or query
+        that fails only fails its own requests, not the rest of the batch.
+        """
+        self.batches += 1
+        self.batched_queries += len(queries)
+
+        # parse each distinct chart once, then aspects for all new charts in one NumPy pass
+        charts = {}
+        for q in queries:
+            ck = q["chart_key"]
+            if ck not in charts:
+                try:
+                    planets, _, _ = parse_planets_cached(self.parse_cache, q["planets"])
+                    cusps, _ = parse_cusps_cached(self.parse_cache, q["cusps"])
+                    # lines without a house number get one from the cusp degrees, as in the app
+                    cusp_lons, _ = parse_cusp_lons_cached(self.parse_cache, q["cusps"])
+                    planets = houses_from_cusps(planets, cusp_lons)
+                    charts[ck] = {"planets": planets, "cusp_signs": default_cusp_signs(cusps),
+                                  "aspects": self.aspect_cache.get(ck), "strengths": {}}
+                except Exception as e:
+                    charts[ck] = e
+        missing = [ck for ck, c in charts.items() if not isinstance(c, Exception) and c["aspects"] is None]
+        if missing:
+            for ck, asp in zip(missing, compute_aspects_batch([charts[ck]["planets"] for ck in missing])):
+                charts[ck]["aspects"] = AspectIndex(asp)
+                self.aspect_cache.set(ck, charts[ck]["aspects"])
+
+        out = []
+        for q in queries:
+            c = charts[q["chart_key"]]
+            if isinstance(c, Exception):
+                out.append(c)
+                continue
+            try:
+                out.append(self._respond(q, c))
+            except Exception as e:
+                out.append(e)
+        return out
+
+    def _respond(self, q: dict, c: dict) -> dict:
+        """Response for one query on a prepared chart; cached by the query key."""
+        d = derive(c["planets"], c["aspects"], c["cusp_signs"], q["root"], q["n"],
+                   q["ruler_system"], q["allow_fallback"], c["strengths"])
+        res = {
+            "root_house": d["root_house"],
+            "n": d["n"],
+            "root_sign": d["root_sign"],
+            "result_house": d["result_house"],
+            "ov_sign": d["ov_sign"],
+            "ruler": d["ruler"],
+            "used_system": d["used_system"],
+            "fallback_used": d["fallback_used"],
+            "score": d["strength"]["score"],
+            "label": score_label(d["strength"]["score"]),
+            "parts": d["strength"]["parts"],
+        }
+        if q["comment"]:
+            res["comment"] = make_readable_comment(
+                d["root_house"], d["n"], d["result_house"], d["ov_sign"], d["ruler"], d["strength"],
+                c["aspects"], None, d["used_system"], d["fallback_used"],
+            )
+        self.response_cache.set(q["key"], res)
+        return res
+
+def parse_query(body: dict, chart: dict | None = None) -> dict:
+    """Validate one query; `chart` supplies planets/cusps for bulk queries."""
+    src = chart if chart is not None else body
+    planets = src.get("planets")
+    if not isinstance(planets, str) or not planets.strip():
+        raise BadRequest("'planets' (Astro-Seek text) is required")
+    cusps = src.get("cusps") or ""
+    try:
+        root, n = int(body["root"]), int(body["n"])
+    except (KeyError, TypeError, ValueError):
+        raise BadRequest("'root' and 'n' must be integers")
+    if not (1 <= root <= 12 and 1 <= n <= 12):
+        raise BadRequest("'root' and 'n' must be between 1 and 12")
+    system = body.get("ruler_system", "Modern")
+    if system not in ("Modern", "Klasik"):
+        raise BadRequest("'ruler_system' must be 'Modern' or 'Klasik'")
+    allow_fallback = bool(body.get("allow_fallback", True))
+    comment = bool(body.get("comment", True))
+
+    chart_key = content_key("chart", planets, cusps)
+    return {
+        "planets": planets, "cusps": cusps, "root": root, "n": n,
+        "ruler_system": system, "allow_fallback": allow_fallback, "comment": comment,
+        "chart_key": chart_key,
+        "key": content_key(chart_key, root, n, system, allow_fallback, comment),
+    }
+
+# =========================
+# ASGI
+# =========================
+class App:
+    def __init__(self, batcher: MicroBatcher | None = None):
+        self.batcher = batcher or MicroBatcher()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                msg = await receive()
+                if msg["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif msg["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        body = b""
+        while True:
+            msg = await receive()
+            body += msg.get("body", b"")
+            if not msg.get("more_body"):
+                break
+
+        try:
+            status, payload = 200, await self.route(scope["method"], scope["path"], body)
+        except BadRequest as e:
+            status, payload = 400, {"error": str(e)}
+        except LookupError as e:
+            status, payload = 404, {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        await send({"type": "http.response.start", "status": status, "headers": [
+            (b"content-type", b"application/json; charset=utf-8"),
+            (b"content-length", str(len(data)).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": data})
+
+    async def route(self, method: str, path: str, body: bytes):
+        if method == "GET" and path == "/health":
+            b = self.batcher
+            return {
+                "status": "ok",
+                "batches": b.batches,
+                "batched_queries": b.batched_queries,
+                "response_cache": b.response_cache.stats(),
+            }
+        if method == "POST" and path in ("/derive", "/derive/bulk"):
+            try:
+                req = json.loads(body or b"{}")
+            except ValueError:
+                raise BadRequest("body must be JSON")
+            if not isinstance(req, dict):
+                raise BadRequest("body must be a JSON object")
+            if path == "/derive":
+                return await self.batcher.submit(parse_query(req))
+            return {"results": await self.bulk(req)}
+        raise LookupError(f"no route for {method} {path}")
+
+    async def bulk(self, req: dict) -> list:
+        charts = req.get("charts")
+        queries = req.get("queries")
+        if not isinstance(charts, list) or not isinstance(queries, list):
+            raise BadRequest("'charts' and 'queries' must be lists")
+        parsed = []
+        for q in queries:
+            idx = q.get("chart") if isinstance(q, dict) else None
+            if not isinstance(idx, int) or not 0 <= idx < len(charts):
+                raise BadRequest("each query needs a valid 'chart' index")
+            parsed.append(parse_query(q, charts[idx]))
+        return list(await asyncio.gather(*(self.batcher.submit(q) for q in parsed)))
+
+app = App()
+
+# =========================
+# STDLIB SERVER
+# =========================
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, asgi):
+    """Minimal HTTP/1.1 keep-alive front end that feeds the ASGI app."""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            lines = head.decode("latin-1").split("\r\n")
+            method, target, _ = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                if ":" in line:
+                    k, v = line.split(":", 1)
+                    headers[k.strip().lower()] = v.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+
+            sent = {}
+
+            async def receive():
+                return {"type": "http.request", "body": body, "more_body": False}
+
+            async def send(msg):
+                if msg["type"] == "http.response.start":
+                    sent["start"] = msg
+                else:
+                    start = sent["start"]
+                    out = [f"HTTP/1.1 {start['status']} {'OK' if start['status'] == 200 else 'ERR'}"]
+                    out += [f"{k.decode()}: {v.decode()}" for k, v in start["headers"]]
+                    writer.write(("\r\n".join(out) + "\r\n\r\n").encode("latin-1") + msg.get("body", b""))
+
+            path = target.split("?", 1)[0]
+            await asgi({"type": "http", "method": method, "path": path, "headers": []}, receive, send)
+            await writer.drain()
+            if headers.get("connection", "").lower() == "close":
+                break
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(host: str = "127.0.0.1", port: int = 8765, asgi=app):
+    server = await asyncio.start_server(lambda r, w: _handle(r, w, asgi), host, port)
+    async with server:
+        await server.serve_forever()
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Local derived-house HTTP API.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--max-batch", type=int, default=256)
+    p.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = p.parse_args(argv)
+    asgi = App(MicroBatcher(args.max_batch, args.max_wait_ms))
+    print(f"listening on http://{args.host}:{args.port}")
+    asyncio.run(serve(args.host, args.port, asgi))
+
+if __name__ == "__main__":
+    main()
@@ -1,503 +1,45 @@
-import streamlit as st
-import re
-
-# =========================
-# CONSTANTS
-# =========================
-SIGNS = ["Koç", "Boğa", "İkizler", "Yengeç", "Aslan", "Başak", "Terazi", "Akrep", "Yay", "Oğlak", "Kova", "Balık"]
-SIGN_TO_IDX = {s: i for i, s in enumerate(SIGNS)}
-IDX_TO_SIGN = {i: s for i, s in enumerate(SIGNS)}
-
-SIGN_ALIASES = {
-    # EN
-    "Aries": "Koç", "Taurus": "Boğa", "Gemini": "İkizler", "Cancer": "Yengeç",
-    "Leo": "Aslan", "Virgo": "Başak", "Libra": "Terazi", "Scorpio": "Akrep",
-    "Sagittarius": "Yay", "Capricorn": "Oğlak", "Aquarius": "Kova", "Pisces": "Balık",
-    # TR variants
-    "Koç": "Koç", "Koc": "Koç",
-    "Boğa": "Boğa", "Boga": "Boğa",
-    "İkizler": "İkizler", "Ikizler": "İkizler",
-    "Yengeç": "Yengeç", "Yengec": "Yengeç",
-    "Aslan": "Aslan",
-    "Başak": "Başak", "Basak": "Başak",
-    "Terazi": "Terazi",
-    "Akrep": "Akrep",
-    "Yay": "Yay",
-    "Oğlak": "Oğlak", "Oglak": "Oğlak",
-    "Kova": "Kova",
-    "Balık": "Balık", "Balik": "Balık",
-    # Symbols
-    "♈": "Koç", "♉": "Boğa", "♊": "İkizler", "♋": "Yengeç",
-    "♌": "Aslan", "♍": "Başak", "♎": "Terazi", "♏": "Akrep",
-    "♐": "Yay", "♑": "Oğlak", "♒": "Kova", "♓": "Balık",
-}
-
-# Sign "micro meaning" for overlay, short & readable
-SIGN_MICRO = {
-    "Koç": ("hız, cesaret, başlangıç", "Hızlı karar, ilk adımı atma, liderlik dürtüsü."),
-    "Boğa": ("güven, istikrar, somutluk", "Yavaş ama kalıcı ilerleme; kaynakları sağlamlaştırma."),
-    "İkizler": ("iletişim, seçenek, hareket", "Bilgi akışı, bağlantı kurma, çoklu planlar."),
-    "Yengeç": ("aidiyet, koruma, duygu", "Güvenli alan ihtiyacı; duygusal bağ üzerinden ilerler."),
-    "Aslan": ("görünürlük, gurur, yaratıcılık", "Sahne/ifade; takdir ve kalpten motivasyon."),
-    "Başak": ("detay, düzen, verim", "Plan–program, iyileştirme; küçük adımlarla büyütme."),
-    "Terazi": ("denge, ortaklık, uyum", "İşbirliği, adalet; karşılıklı kazanım arar."),
-    "Akrep": ("yoğunluk, dönüşüm, kontrol", "Derinleşme; kriz/bağlılık temasıyla güçlenme."),
-    "Yay": ("vizyon, büyüme, ufuk", "Uzaklar/eğitim/fırsat; risk–ödül dengesi önemli."),
-    "Oğlak": ("hedef, disiplin, yapı", "Uzun vadeli plan; sorumlulukla somut sonuç."),
-    "Kova": ("özgürlük, yenilik, farklılık", "Kalabalıklar/projeler; sıra dışı çözüm üretir."),
-    "Balık": ("sezgi, akış, anlam", "Bırakma–kabullenme; yaratıcı/ruhsal kanal."),
-}
-
-# Planets -> Turkish keys
-PLANET_ALIASES = {
-    "Sun": "Güneş", "Moon": "Ay", "Mercury": "Merkür", "Venus": "Venüs", "Mars": "Mars",
-    "Jupiter": "Jüpiter", "Saturn": "Satürn", "Uranus": "Uranüs", "Neptune": "Neptün", "Pluto": "Plüton",
-    "Node": "KuzeyAyDüğümü", "Lilith": "Lilith", "Chiron": "Chiron", "Fortune": "Fortuna", "Vertex": "Vertex",
-    # passthrough
-    "Güneş": "Güneş", "Ay": "Ay", "Merkür": "Merkür", "Venüs": "Venüs", "Mars": "Mars",
-    "Jüpiter": "Jüpiter", "Satürn": "Satürn", "Uranüs": "Uranüs", "Neptün": "Neptün", "Plüton": "Plüton",
-    "KuzeyAyDüğümü": "KuzeyAyDüğümü", "Fortuna": "Fortuna",
-}
-
-RULERS_MODERN = {
-    "Koç": "Mars", "Boğa": "Venüs", "İkizler": "Merkür", "Yengeç": "Ay",
-    "Aslan": "Güneş", "Başak": "Merkür", "Terazi": "Venüs", "Akrep": "Plüton",
-    "Yay": "Jüpiter", "Oğlak": "Satürn", "Kova": "Uranüs", "Balık": "Neptün",
-}
-RULERS_TRAD = {
-    "Koç": "Mars", "Boğa": "Venüs", "İkizler": "Merkür", "Yengeç": "Ay",
-    "Aslan": "Güneş", "Başak": "Merkür", "Terazi": "Venüs", "Akrep": "Mars",
-    "Yay": "Jüpiter", "Oğlak": "Satürn", "Kova": "Satürn", "Balık": "Jüpiter",
-}
-
-HOUSE_MEANINGS = {
-    1: "Benlik, beden, yaklaşım",
-    2: "Para, gelir, özdeğer",
-    3: "İletişim, yakın çevre, kardeşler",
-    4: "Ev, aile, kökler",
-    5: "Aşk, çocuklar, yaratıcılık",
-    6: "İş rutinleri, sağlık, hizmet",
-    7: "Eş/ortak, ilişkiler",
-    8: "Paylaşımlar, kriz/dönüşüm, miras",
-    9: "Uzaklar, eğitim, inançlar, hukuk",
-    10: "Kariyer, statü, hedefler",
-    11: "Sosyal çevre, projeler, umutlar",
-    12: "Bilinçdışı, kapanışlar, izolasyon",
-}
-
-TOPIC_TO_ROOT = {
-    "Ben / Kimlik": 1,
-    "Para / Gelir": 2,
-    "Kardeşler / İletişim": 3,
-    "Ev / Aile": 4,
-    "Aşk / Çocuk": 5,
-    "İş Rutini / Sağlık": 6,
-    "Eş / Ortaklık": 7,
-    "Kriz / Paylaşımlar": 8,
-    "Uzaklar / Eğitim": 9,
-    "Kariyer": 10,
-    "Arkadaşlar / Projeler": 11,
-    "Bilinçdışı / Kapanış": 12,
-}
-
-OPPOSITE = {
-    "Koç": "Terazi", "Boğa": "Akrep", "İkizler": "Yay", "Yengeç": "Oğlak",
-    "Aslan": "Kova", "Başak": "Balık", "Terazi": "Koç", "Akrep": "Boğa",
-    "Yay": "İkizler", "Oğlak": "Yengeç", "Kova": "Aslan", "Balık": "Başak"
-}
-
-# =========================
-# HELPERS
-# =========================
-def clamp(x, lo=0, hi=100):
-    return max(lo, min(hi, x))
-
-def derived_house(root_house: int, n: int) -> int:
-    return ((root_house - 1) + (n - 1)) % 12 + 1
-
-def overlay_sign(root_sign: str, n: int) -> str:
-    idx = SIGN_TO_IDX[root_sign]
-    return IDX_TO_SIGN[(idx + (n - 1)) % 12]
-
-def normalize_sign(token: str):
-    token = token.strip()
-    if token in SIGN_ALIASES:
-        return SIGN_ALIASES[token]
-    for k, v in SIGN_ALIASES.items():
-        if k.lower() == token.lower():
-            return v
-    return None
+import os
 
-def normalize_planet(raw: str) -> str:
-    raw = raw.strip().strip(":").replace("\t", " ").strip()
-    raw_nospace = raw.replace(" ", "")
-
-    # Node / Lilith (M) variants
-    if raw_nospace.lower().startswith("node"):
-        return PLANET_ALIASES.get("Node", "KuzeyAyDüğümü")
-    if raw_nospace.lower().startswith("lilith"):
-        return PLANET_ALIASES.get("Lilith", "Lilith")
-
-    raw_clean = re.sub(r"[^A-Za-zÇĞİÖŞÜçğıöşü]", "", raw)
-
-    if raw in PLANET_ALIASES:
-        return PLANET_ALIASES[raw]
-    if raw_nospace in PLANET_ALIASES:
-        return PLANET_ALIASES[raw_nospace]
-    if raw_clean in PLANET_ALIASES:
-        return PLANET_ALIASES[raw_clean]
-
-    for en in ["Sun","Moon","Mercury","Venus","Mars","Jupiter","Saturn","Uranus","Neptune","Pluto","Chiron","Fortune","Vertex","Node","Lilith"]:
-        if en.lower() in raw_nospace.lower():
-            return PLANET_ALIASES.get(en, en)
-
-    return raw_clean or raw
-
-def get_ruler(sign: str, system: str) -> str:
-    return (RULERS_MODERN if system == "Modern" else RULERS_TRAD)[sign]
+import streamlit as st
 
-# =========================
-# PARSERS (Astro-Seek)
-# =========================
-# Spaced format:
-# Sun: Sagittarius 4°26’10’’  end of 7  Direct
-# NOTE: \D+ for unicode quotes
-PLANET_LINE_RE = re.compile(
-    r"""^\s*
-    (?P<planet>[A-Za-zÇĞİÖŞÜçğıöşü]+(?:\s*\(M\))?)\s*:?\s*
-    (?P<sign>[A-Za-zÇĞİÖŞÜçğıöşü♈♉♊♋♌♍♎♏♐♑♒♓]+)\s+
-    (?P<deg>\d{1,2})\s*°\s*
-    (?P<min>\d{1,2})\D+
-    (?:(?P<sec>\d{1,2})\D+)?      # seconds optional, any non-digit separators
-    (?:(?:end\s+of\s+)?(?P<house>\d{1,2}))\s*
-    (?P<motion>Direct|Retrograde|R)?\s*$
-    """,
-    re.IGNORECASE | re.VERBOSE
+from cache import (
+    TTLCache, parse_planets_cached, parse_cusps_cached, parse_cusp_lons_cached, aspects_cached, matrix_cached,
 )
-
-# Compact format:
-# UranusScorpio26°23’7
-PLANET_COMPACT_RE = re.compile(
-    r"""^\s*
-    (?P<planet>[A-Za-zÇĞİÖŞÜçğıöşü]+)
-    (?P<sign>[A-Za-zÇĞİÖŞÜçğıöşü♈♉♊♋♌♍♎♏♐♑♒♓]+)
-    (?P<deg>\d{1,2})\s*°\s*
-    (?P<min>\d{1,2})\D+
-    (?P<house>\d{1,2})
-    \s*$""",
-    re.VERBOSE | re.IGNORECASE
+from dag import Dag
+from jobs import STATUS_TR, UPLOAD_TYPES, JobManager, result_rows
+from tables import matrix_table, ruler_aspects_table, to_parquet
+from engine import (
+    SIGNS, SIGN_TO_IDX, HOUSE_MEANINGS, TOPIC_TO_ROOT, DIGNITY_MODELS, DIGNITY_MODEL_TR, AspectIndex, AspectTable, aspect_table,
+    derive, houses_from_cusps, pattern_text, score_label, make_readable_comment, default_questions,
 )
+from timing import Timings, TimingAggregate, export as export_timings
 
-def parse_planets_from_text(text: str):
-    planets = {}
-    errors = []
-    ignored = []
-
-    for raw in text.splitlines():
-        line = raw.strip()
-        if not line:
-            continue
-
-        # ignore lunar phase lines
-        if any(w in line.lower() for w in ["disseminating", "balsamic", "gibbous", "crescent", "phase"]):
-            ignored.append(line)
-            continue
-
-        m = PLANET_LINE_RE.match(line)
-        if not m:
-            m = PLANET_COMPACT_RE.match(line)
-        if not m:
-            ignored.append(line)
-            continue
-
-        planet = normalize_planet(m.group("planet"))
-        sign = normalize_sign(m.group("sign"))
-        if sign not in SIGN_TO_IDX:
-            errors.append(line)
-            continue
-
-        deg = int(m.group("deg"))
-        minute = int(m.group("min"))
-        sec = int(m.group("sec")) if m.groupdict().get("sec") else 0
-        house = int(m.group("house"))
-
-        motion = (m.groupdict().get("motion") or "").strip().lower()
-        retro = motion in ["retrograde", "r"]
-
-        deg_float = deg + minute / 60.0 + sec / 3600.0
-        lon = SIGN_TO_IDX[sign] * 30.0 + deg_float
-
-        planets[planet] = {"sign": sign, "deg": deg_float, "house": house, "lon": lon, "retro": retro}
-
-    return planets, errors, ignored
-
-def parse_house_cusps_from_text(text: str):
-    cusps = {}
-    errors = []
-    cusp_re = re.compile(
-        r"^\s*(?P<h>[1-9]|1[0-2])\s*:\s*(?P<sign>[A-Za-zÇĞİÖŞÜçğıöşü♈♉♊♋♌♍♎♏♐♑♒♓]+)\b",
-        re.IGNORECASE
-    )
-    for raw in text.splitlines():
-        line = raw.strip()
-        if not line:
-            continue
-        m = cusp_re.match(line)
-        if not m:
-            continue
-        h = int(m.group("h"))
-        sign = normalize_sign(m.group("sign"))
-        if sign not in SIGN_TO_IDX:
-            errors.append(line)
-            continue
-        cusps[h] = sign
-    return cusps, errors
-
-# =========================
-# ASPECTS
-# =========================
-ASPECTS_DEF = [
-    ("conjunction", 0, 6),
-    ("sextile", 60, 4.5),
-    ("square", 90, 6),
-    ("trine", 120, 6),
-    ("opposition", 180, 6),
-]
-ASPECT_WEIGHTS = {"conjunction": 10, "sextile": 8, "trine": 12, "square": -12, "opposition": -14}
-ASPECT_TR_LABEL = {
-    "conjunction": "kavuşum",
-    "sextile": "sekstil",
-    "square": "kare",
-    "trine": "üçgen",
-    "opposition": "karşıt",
-}
-
-def aspect_nature(a_type: str) -> str:
-    if a_type in ["trine", "sextile"]:
-        return "destek"
-    if a_type in ["square", "opposition"]:
-        return "zorlayıcı"
-    return "karışık"
-
-def angle_diff(a, b):
-    d = abs(a - b) % 360.0
-    return min(d, 360.0 - d)
-
-def compute_aspects(planets: dict):
-    keys = list(planets.keys())
-    aspects = []
-    for i in range(len(keys)):
-        for j in range(i + 1, len(keys)):
-            p1, p2 = keys[i], keys[j]
-            lon1, lon2 = planets[p1]["lon"], planets[p2]["lon"]
-            d = angle_diff(lon1, lon2)
-            for name, exact, orbmax in ASPECTS_DEF:
-                orb = abs(d - exact)
-                if orb <= orbmax:
-                    aspects.append({"p1": p1, "p2": p2, "type": name, "orb": round(orb, 2)})
-                    break
-    return aspects
-
-# =========================
-# SCORING
-# =========================
-ANGULAR = {1, 4, 7, 10}
-SUCCEDENT = {2, 5, 8, 11}
-
-def house_score(house: int) -> int:
-    if house in ANGULAR:
-        return 12
-    if house in SUCCEDENT:
-        return 6
-    return 0
-
-def rulership_score(planet: str, sign: str, rulers_map: dict) -> int:
-    if rulers_map.get(sign) == planet:
-        return 10
-    ruled = [s for s, p in rulers_map.items() if p == planet]
-    for s in ruled:
-        if OPPOSITE.get(s) == sign:
-            return -10
-    return 0
-
-def aspect_score_for(planet: str, aspects: list[dict]) -> float:
-    score = 0.0
-    for a in aspects:
-        if a["p1"] != planet and a["p2"] != planet:
-            continue
-        t = a["type"]
-        if t not in ASPECT_WEIGHTS:
-            continue
-        orb = float(a.get("orb", 6))
-        w = max(0.0, 1.0 - orb / 6.0)
-        score += ASPECT_WEIGHTS[t] * w
-    return score
-
-def compute_ruler_strength(ruler: str, planets: dict, aspects: list, rulers_map: dict) -> dict:
-    pos = planets.get(ruler)
-    if not pos:
-        return {"score": None, "parts": {}, "pos": None}
-
-    hs = house_score(int(pos["house"]))
-    rs = rulership_score(ruler, pos["sign"], rulers_map)
-    aps = aspect_score_for(ruler, aspects)
-
-    raw = 50 + hs + rs + aps
-    final = clamp(raw)
-    return {
-        "score": round(final, 1),
-        "pos": pos,
-        "parts": {"base": 50, "house": hs, "rulership": rs, "aspects": round(aps, 1)},
-    }
-
-def score_label(score):
-    if score is None:
-        return "bilinmiyor"
-    if score >= 75:
-        return "akıcı"
-    if score >= 55:
-        return "orta"
-    if score >= 35:
-        return "zorlayıcı"
-    return "yoğun"
-
-def pick_ruler_with_fallback(ov_sign: str, primary_system: str, planets: dict):
-    """
-    If chosen ruler not found in chart, fallback to other system's ruler.
-    Returns (ruler_name, used_system, fallback_used: bool)
-    """
-    primary_map = RULERS_MODERN if primary_system == "Modern" else RULERS_TRAD
-    alt_map = RULERS_TRAD if primary_system == "Modern" else RULERS_MODERN
-
-    r1 = primary_map[ov_sign]
-    if r1 in planets:
-        return r1, primary_system, False
-
-    alt_system = "Klasik" if primary_system == "Modern" else "Modern"
-    r2 = alt_map[ov_sign]
-    if r2 in planets:
-        return r2, alt_system, True
-
-    # neither present
-    return r1, primary_system, False
-
-def short_action_tips(ov_sign: str, ruler_house: int | None):
-    """
-    Simple, readable action tips.
-    """
-    tips = []
-    if ov_sign == "Yay":
-        tips.append("Eğitim/sertifika, yurtdışı bağlantı veya yayınlama gibi 'ufuk genişleten' bir hamle ekle.")
-        tips.append("Riskli büyümeyi plan–bütçe–takvim ile çerçevele.")
-    elif ov_sign == "Başak":
-        tips.append("Planı küçült: ölç–iyileştir–tekrar et (verim odaklı).")
-        tips.append("Detay/sağlık/iş rutini aksarsa tema zorlanır.")
-    elif ov_sign == "Kova":
-        tips.append("Yeni yöntem/teknoloji veya farklı bir network kanalı dene.")
-        tips.append("Esneklik + net sınır: özgürlük ihtiyacını yönet.")
-    else:
-        tips.append("Bindirme burcunun 'tarzına' uygun küçük bir somut adım seç ve 2 hafta takip et.")
-
-    if ruler_house is not None:
-        tips.append(f"Yönetici {ruler_house}. evde: aksiyonu '{HOUSE_MEANINGS[ruler_house]}' kanalından başlatmak daha verimli olur.")
-    return tips[:3]
-
-def make_readable_comment(root_house, n, result_house, ov_sign, ruler, strength, aspects, topic_name=None, ruler_used_system=None, fallback_used=False):
-    """
-    Human-friendly comment block: summary + bullets + reasons + tips
-    """
-    s = strength["score"]
-    lbl = score_label(s)
-
-    # Micro meaning
-    micro_tags, micro_desc = SIGN_MICRO.get(ov_sign, ("", ""))
-
-    # Header line
-    subject = topic_name if topic_name else f"{root_house}. ev ({HOUSE_MEANINGS[root_house]})"
-    header = (
-        f"**Özet:** **{subject}** konusunun **{n}. alt başlığı**, "
-        f"**{result_house}. ev** ({HOUSE_MEANINGS[result_house]}) alanında çalışıyor. "
-        f"Genel akış: **{lbl}**."
-    )
+# Append per-rerun stage timings here (*.prom = Prometheus textfile, else JSONL)
+TIMINGS_FILE = os.environ.get("EVTURETME_TIMINGS_FILE")
 
-    sys_note = ""
-    if ruler_used_system:
-        sys_note = f" (**Yönetici sistemi:** {ruler_used_system})"
-    if fallback_used:
-        sys_note += " _(haritada bulunmadığı için alternatif yönetici kullanıldı)_"
-
-    base_lines = [
-        f"- **Kök:** {root_house}. ev → {HOUSE_MEANINGS[root_house]}",
-        f"- **Sonuç:** {result_house}. ev → {HOUSE_MEANINGS[result_house]}",
-        f"- **Bindirme burcu:** **{ov_sign}** ({micro_tags})",
-        f"  - {micro_desc}" if micro_desc else "",
-        f"- **Yönetici:** **{ruler}**{sys_note}",
-    ]
-    base_block = "\n".join([x for x in base_lines if x])
-
-    if s is None or strength["pos"] is None:
-        return (
-            header + "\n\n" +
-            base_block + "\n\n" +
-            "⚠️ Yönetici gezegen harita verisinde bulunamadığı için skor/yorum sınırlı."
-        )
+@st.cache_resource
+def chart_cache() -> TTLCache:
+    """One parse/aspect cache per server process, shared by all sessions."""
+    return TTLCache(maxsize=1024, ttl=6 * 3600)
 
-    pos = strength["pos"]
-    retro = " (R)" if pos.get("retro") else ""
-    ruler_loc = f"- **Yönetici konumu:** **{pos['house']}. ev / {pos['sign']}**{retro}"
-    parts = strength["parts"]
-
-    # Ruler aspects
-    ruler_asps = [a for a in aspects if a["p1"] == ruler or a["p2"] == ruler]
-    ruler_asps = sorted(ruler_asps, key=lambda x: x.get("orb", 99))[:5]
-
-    asp_lines = []
-    for a in ruler_asps:
-        other = a["p2"] if a["p1"] == ruler else a["p1"]
-        tr = ASPECT_TR_LABEL.get(a["type"], a["type"])
-        nat = aspect_nature(a["type"])
-        icon = "✅" if nat == "destek" else ("⚠️" if nat == "zorlayıcı" else "⚖️")
-        asp_lines.append(f"  - {icon} {other} ile **{tr}** (orb {a['orb']}) → *{nat}*")
-
-    if asp_lines:
-        asp_block = "**Yönetici açıları (en yakınlar):**\n" + "\n".join(asp_lines)
-    else:
-        asp_block = "**Yönetici açıları:** belirgin orb içi majör açı görünmüyor."
-
-    score_block = (
-        f"**Skor:** **{s}/100** → **{lbl}**\n\n"
-        f"**Skor neden böyle?**\n"
-        f"- Ev vurgusu: {parts['house']:+}\n"
-        f"- Yöneticilik (domicile/detriment): {parts['rulership']:+}\n"
-        f"- Açılar: {parts['aspects']:+}\n"
-    )
+@st.cache_resource
+def timing_aggregate() -> TimingAggregate:
+    return TimingAggregate()
 
-    interp = (
-        "**Ne anlatıyor?**\n"
-        f"- {ov_sign} bindirmesi temayı **{micro_tags or 'o burcun tarzı'}** üzerinden çalıştırır.\n"
-        f"- Yönetici {ruler}’ün **{pos['house']}. evde** olması, konunun en çok **{HOUSE_MEANINGS[int(pos['house'])]}** kanalından aktığını gösterir.\n"
-    )
+@st.cache_resource
+def job_manager() -> JobManager:
+    """Upload jobs and their process pool, shared by all sessions."""
+    return JobManager()
 
-    tips = short_action_tips(ov_sign, int(pos["house"]))
-    tips_block = "**Hızlı aksiyon:**\n" + "\n".join([f"- {t}" for t in tips])
-
-    return (
-        header + "\n\n" +
-        base_block + "\n" +
-        ruler_loc + "\n\n" +
-        score_block + "\n" +
-        asp_block + "\n\n" +
-        interp + "\n" +
-        tips_block
-    )
+timings = Timings(enabled=st.session_state.get("timing_enabled", False))
+# handed to derivation_section(); absent when only that fragment reruns
+st.session_state["run_timings"] = timings
 
-def default_questions(root_house: int, n: int, result_house: int, ov_sign: str, ruler: str):
-    return [
-        f"{HOUSE_MEANINGS[root_house]} konusunun {n}. alt başlığı hangi koşullarda ilerliyor? (Bindirme: {ov_sign})",
-        f"Bu tema {HOUSE_MEANINGS[result_house]} alanında nasıl görünür? (Sonuç ev: {result_house})",
-        f"Yönetici {ruler} hangi evde/burçta? Bu, konunun çalıştığı kanalı gösterir.",
-        f"{ruler}’ün güçlü/zorlayıcı açıları hangileri? (Sağ panelde listelenir.)",
-    ]
+# Per-session DAG: text → planets/cusps → houses/aspects → per-ruler strengths → derived → comment
+if "dag" not in st.session_state:
+    st.session_state["dag"] = Dag()
+dag = st.session_state["dag"]
+dag.begin_run()
 
 # =========================
 # UI
@@ -535,6 +77,11 @@ with st.sidebar:
     st.divider()
     ruler_system = st.radio("Yöneticilik sistemi", ["Modern", "Klasik"], index=0)
     allow_fallback = st.checkbox("Yönetici bulunamazsa alternatif yöneticiye düş (önerilir)", value=True)
+    dignity = st.selectbox("Temel yücelik puanı", list(DIGNITY_MODELS), format_func=DIGNITY_MODEL_TR.get, index=0)
+    minor_aspects = st.checkbox("Minör açılar (yarım sekstil, yarım kare, bir buçuk kare, quincunx)", value=False)
+    wide_luminaries = st.checkbox("Güneş/Ay açılarında geniş orb (×4/3)", value=False)
+    table = aspect_table(minor_aspects, wide_luminaries)
+    use_patterns = st.checkbox("Açı kalıplarını skora kat (büyük üçgen, T-kare, yod, stelyum)", value=False)
 
     st.divider()
     st.header("2) Türetme sorusu")
@@ -550,9 +97,47 @@ with st.sidebar:
         topic_name = None
         root_house = st.number_input("Kök ev numarası", min_value=1, max_value=12, value=7, step=1)
 
-# Parse inputs
-planets, planet_errors, ignored_lines = parse_planets_from_text(planets_text)
-cusps, cusp_errors = parse_house_cusps_from_text(cusps_text)
+    st.divider()
+    rehouse = st.checkbox("Evleri cusp derecelerinden hesapla (metindeki ev sütununu yok say)", value=False)
+
+    st.divider()
+    matrix_mode = st.checkbox("Matris modu: tüm kök ev × n kombinasyonları (12×12)", value=False)
+    st.checkbox("⏱️ Aşama sürelerini ölç (Debug)", value=False, key="timing_enabled")
+
+    st.divider()
+    st.header("3) Toplu yükleme")
+    upload = st.file_uploader(
+        "Harita dosyası (CSV / JSONL / ZIP)", type=UPLOAD_TYPES, key="upload_file",
+        help="CSV/JSONL: id, planets, cusps alanları. ZIP: bu dosyalar ve/veya harita başına bir Astro-Seek .txt",
+    )
+    if st.button("Arka planda işle", disabled=upload is None, key="upload_start"):
+        # scored with the sidebar settings above; the question is the current root house and n
+        job_id = job_manager().submit(
+            upload.name, upload.getvalue(), ruler_system, (int(root_house), int(derived_n)),
+            rehouse, use_patterns, dignity,
+        )
+        st.session_state.setdefault("upload_jobs", []).insert(0, job_id)
+
+# Parse inputs (cached by content hash across reruns and sessions)
+cache = chart_cache()
+with timings.span("parse"):
+    planets, planet_errors, ignored_lines = dag.node(
+        "planets", lambda text: parse_planets_cached(cache, text), params=(planets_text,))
+with timings.span("cusps"):
+    cusps, cusp_errors = dag.node("cusps", lambda text: parse_cusps_cached(cache, text), params=(cusps_text,))
+    cusp_lons, _ = dag.node("cusp_lons", lambda text: parse_cusp_lons_cached(cache, text), params=(cusps_text,))
+    # missing houses (all of them with rehouse) from the cusp degrees
+    planets = dag.node(
+        "houses", lambda parsed, cl, rehouse: houses_from_cusps(parsed[0], cl[0], rehouse),
+        deps=("planets", "cusp_lons"), params=(rehouse,),
+    )
+with timings.span("aspects"):
+    aspects = dag.node(
+        "aspects",
+        lambda parsed, text, minor, wide: (
+            aspects_cached(cache, text, parsed[0], aspect_table(minor, wide)) if parsed[0] else AspectIndex()),
+        deps=("planets",), params=(planets_text, minor_aspects, wide_luminaries),
+    )
 
 st.divider()
 col1, col2 = st.columns([1.2, 0.8], gap="large")
@@ -565,19 +150,30 @@ with col1:
         st.warning("Gezegen verisi okunamadı. (Debug bölümünde görmezden gelen satırları kontrol et.)")
 
     if cusps:
-        st.success(f"Okunan cusps: {len(cusps)}/12")
+        st.success(f"Okunan cusps: {len(cusps)}/12" + (" (dereceli)" if len(cusp_lons) == 12 else ""))
     else:
         st.info("Cusps yoksa sorun değil; aşağıdan manuel seçebilirsin.")
+    no_house = [p for p, pos in planets.items() if not pos["house"]]
+    if no_house:
+        st.warning(f"Evi bilinmeyen yerleşim: {', '.join(no_house)} (ev sütunu ya da 12 dereceli cusp gerekli)")
 
-    st.subheader("🏠 Ev cusp burçları (manuel/otomatik)")
-    cusp_signs = {}
-    for h in range(1, 13):
-        default = cusps.get(h, SIGNS[h-1])
-        idx = SIGN_TO_IDX.get(default, h-1)
-        cusp_signs[h] = st.selectbox(f"{h}. ev burcu", SIGNS, index=idx, key=f"cusp_{h}")
-
-with col2:
+# =========================
+# FRAGMENTS
+# =========================
+# Widgets inside a fragment rerun only that fragment, so editing a cusp or
+# opening a panel does not rebuild the sidebar, the parse status or Debug.
+@st.fragment
+def debug_panel(planets: dict, planet_errors: list, ignored_lines: list):
     st.subheader("🧪 Debug")
+    cs = cache.stats()
+    st.caption(
+        f"Önbellek: {cs['hits']} isabet / {cs['misses']} ıska "
+        f"(oran: {cs['hit_rate']}) · {cs['size']}/{cs['maxsize']} kayıt"
+    )
+    if planet_errors:
+        st.error(f"Hata verilen satır: {len(planet_errors)}")
+    if not st.toggle("Ayrıntıları göster", key="debug_open"):
+        return
     if planet_errors:
         st.error("Hata verilen satırlar:")
         st.code("\n".join(planet_errors), language="text")
@@ -588,95 +184,230 @@ with col2:
         st.write("Okunan gezegen anahtarları:")
         st.code(", ".join(planets.keys()), language="text")
 
-# Derived result
-root_sign = cusp_signs[int(root_house)]
-result_house = derived_house(int(root_house), int(derived_n))
-ov_sign = overlay_sign(root_sign, int(derived_n))
-
-# Choose ruler (with fallback)
-if allow_fallback:
-    ruler, used_system, fallback_used = pick_ruler_with_fallback(ov_sign, ruler_system, planets)
-else:
-    ruler = get_ruler(ov_sign, ruler_system)
-    used_system = ruler_system
-    fallback_used = False
+@st.fragment
+def ruler_aspect_panel(aspects: AspectIndex, ruler: str):
+    ruler_asps = aspects.for_body(ruler)
+    st.write(f"Toplam açı: **{len(aspects)}**")
+    st.write(f"Yönetici ({ruler}) açıları: **{len(ruler_asps)}**")
+    if not ruler_asps:
+        st.write("Yöneticinin orb içi majör açısı olmayabilir.")
+    elif st.toggle("Açı tablosunu göster", key="aspects_open"):
+        # other body, Turkish label and nature per aspect, as an Arrow table (no pandas round trip)
+        st.dataframe(ruler_aspects_table(aspects, ruler), use_container_width=True)
+
+@st.fragment
+def derivation_section(planets: dict, cusps: dict, aspects: AspectIndex, table: AspectTable, planets_text: str,
+                       root_house: int, derived_n: int, topic_name: str | None, ruler_system: str,
+                       allow_fallback: bool, matrix_mode: bool, use_patterns: bool, dignity: str):
+    """Cusp editor plus everything that depends on it."""
+    timings = st.session_state.pop("run_timings", None)
+    scope = "app"
+    if timings is None:
+        # fragment-only rerun: the parse stages above did not run
+        timings = Timings(enabled=st.session_state.get("timing_enabled", False))
+        dag.begin_run()
+        scope = "fragment"
 
-# Aspects & score
-aspects = compute_aspects(planets) if planets else []
-rulers_map_used = RULERS_MODERN if used_system == "Modern" else RULERS_TRAD
-strength = compute_ruler_strength(ruler, planets, aspects, rulers_map_used)
+    st.subheader("🏠 Ev cusp burçları (manuel/otomatik)")
+    with timings.span("cusp_editor"):
+        cusp_signs = {}
+        grid = st.columns(6)
+        for h in range(1, 13):
+            default = cusps.get(h, SIGNS[h-1])
+            idx = SIGN_TO_IDX.get(default, h-1)
+            cusp_signs[h] = grid[(h - 1) % 6].selectbox(f"{h}. ev burcu", SIGNS, index=idx, key=f"cusp_{h}")
+
+    # Derived result
+    cusp_key = tuple(sorted(cusp_signs.items()))
+    with timings.span("strength"):
+        # memo of strength per (ruler, system); reset only when the chart changes
+        dag.node("ruler_strengths", lambda housed, asp, pat, dig: {}, deps=("houses", "aspects"),
+                 params=(use_patterns, dignity))
+        derived = dag.node(
+            "derived",
+            lambda housed, asp, memo, cs, root, n, system, fallback, pat, dig: derive(
+                housed, asp, dict(cs), root, n, system, fallback, memo, pat, dig),
+            deps=("houses", "aspects", "ruler_strengths"),
+            params=(cusp_key, root_house, derived_n, ruler_system, allow_fallback, use_patterns, dignity),
+        )
+    root_sign = derived["root_sign"]
+    result_house = derived["result_house"]
+    ov_sign = derived["ov_sign"]
+    ruler = derived["ruler"]
+    used_system = derived["used_system"]
+    fallback_used = derived["fallback_used"]
+    strength = derived["strength"]
 
-st.divider()
-left, right = st.columns([1.15, 0.85], gap="large")
+    st.divider()
+    left, right = st.columns([1.15, 0.85], gap="large")
 
-with left:
-    st.subheader("🎯 Türetme sonucu")
-    if topic_name:
-        st.write(f"**Konu:** {topic_name} → **{int(root_house)}. ev** ({HOUSE_MEANINGS[int(root_house)]})")
-    else:
-        st.write(f"**Kök ev:** **{int(root_house)}. ev** ({HOUSE_MEANINGS[int(root_house)]})")
+    with left:
+        st.subheader("🎯 Türetme sonucu")
+        # one markdown element per block: every element costs a delta on each rerun
+        if topic_name:
+            head = f"**Konu:** {topic_name} → **{root_house}. ev** ({HOUSE_MEANINGS[root_house]})"
+        else:
+            head = f"**Kök ev:** **{root_house}. ev** ({HOUSE_MEANINGS[root_house]})"
+        st.markdown("\n\n".join([
+            head,
+            f"**Kök ev cusp burcu:** **{root_sign}**",
+            f"**Türetilmiş (n):** **{derived_n}**",
+            f"**Sonuç ev:** **{result_house}. ev** ({HOUSE_MEANINGS[result_house]})",
+            f"**Burç bindirmesi:** **{ov_sign}**",
+            f"**Yönetici:** **{ruler}** (sistem: {used_system})" + (" — _alternatif yönetici kullanıldı_" if fallback_used else ""),
+        ]))
+
+        st.divider()
+        st.subheader("📈 Skor + Yorum")
+
+        score = strength["score"]
+        with timings.span("comment"):
+            comment_md = dag.node(
+                "comment",
+                lambda d, asp, topic: make_readable_comment(
+                    d["root_house"], d["n"], d["result_house"], d["ov_sign"], d["ruler"], d["strength"],
+                    asp, topic, d["used_system"], d["fallback_used"]),
+                deps=("derived", "aspects"), params=(topic_name,),
+            )
+        if score is None:
+            st.warning(f"Yönetici **{ruler}** harita verisinde yok. (Debug → Okunan gezegen anahtarlarına bak.)")
+            st.markdown(comment_md)
+        else:
+            # nice metric-like line
+            st.metric("Skor", f"{score}/100", score_label(score))
+            st.markdown(comment_md)
+
+        st.divider()
+        st.subheader("❓ Soru şablonları")
+        st.markdown("\n\n".join(
+            f"**{i}.** {q}" for i, q in enumerate(default_questions(root_house, derived_n, result_house, ov_sign, ruler), 1)
+        ))
+
+    with right:
+        st.subheader("🧩 Yönetici detayı")
+        if strength["pos"]:
+            pos = strength["pos"]
+            retro = " (R)" if pos.get("retro") else ""
+            st.write(f"**{ruler}** → {pos['sign']} {pos['deg']:.3f}° | **{pos['house'] or '?'}. ev**{retro}")
+            st.write("**Puan bileşenleri:**")
+            st.json(strength["parts"])
+        else:
+            st.write("Yönetici konumu yok.")
 
-    st.write(f"**Kök ev cusp burcu:** **{root_sign}**")
-    st.write(f"**Türetilmiş (n):** **{int(derived_n)}**")
-    st.write(f"**Sonuç ev:** **{result_house}. ev** ({HOUSE_MEANINGS[result_house]})")
-    st.write(f"**Burç bindirmesi:** **{ov_sign}**")
-    st.write(f"**Yönetici:** **{ruler}** (sistem: {used_system})" + (" — _alternatif yönetici kullanıldı_" if fallback_used else ""))
+        st.divider()
+        st.subheader("🔭 Otomatik açılar (dereceden)")
+        if aspects:
+            ruler_aspect_panel(aspects, ruler)
+        else:
+            st.write("Açı üretmek için en az 2 yerleşim okunmalı.")
+
+        st.divider()
+        st.subheader("🔺 Açı kalıpları")
+        with timings.span("patterns"):
+            patterns = dag.node("patterns", lambda asp: asp.patterns(), deps=("aspects",))
+        if patterns:
+            st.markdown("\n".join(
+                f"- {'⭐ ' if ruler in p['bodies'] else ''}{pattern_text(p)}" for p in patterns
+            ))
+            if any(ruler in p["bodies"] for p in patterns):
+                st.caption(f"⭐ = yönetici {ruler} bu kalıbın parçası")
+        else:
+            st.write("Belirgin açı kalıbı yok.")
+        if "quincunx" not in table.names:
+            st.caption("Yod için minör açılar (quincunx) açık olmalı.")
+
+    if matrix_mode:
+        st.divider()
+        st.subheader("🧮 Türetme matrisi (12×12)")
+        with timings.span("matrix"):
+            matrix = dag.node(
+                "matrix",
+                lambda housed, asp, cs, system, fallback, pat, dig: matrix_cached(
+                    cache, planets_text, housed, asp, dict(cs), system, fallback, table, pat, dig),
+                deps=("houses", "aspects"), params=(cusp_key, ruler_system, allow_fallback, use_patterns, dignity),
+            )
+        mtable = matrix_table(matrix)
+        st.dataframe(mtable, use_container_width=True, hide_index=True)
+        st.download_button("Matrisi indir (Parquet)", to_parquet(mtable), file_name="turetme_matrisi.parquet",
+                           mime="application/vnd.apache.parquet", key="matrix_parquet")
+
+        st.write("**Hücre detayı** (matristen okunur, yeniden hesaplanmaz):")
+        mc1, mc2 = st.columns(2)
+        cell_root = mc1.selectbox("Kök ev", list(range(1, 13)), key="matrix_root")
+        cell_n = mc2.selectbox("n", list(range(1, 13)), key="matrix_n")
+        cell = matrix[(cell_root, cell_n)]
+        st.markdown(make_readable_comment(
+            cell_root, cell_n, cell["result_house"], cell["ov_sign"], cell["ruler"], cell["strength"],
+            aspects, None, cell["used_system"], cell["fallback_used"],
+        ))
 
     st.divider()
-    st.subheader("📈 Skor + Yorum")
-
-    score = strength["score"]
-    if score is None:
-        st.warning(f"Yönetici **{ruler}** harita verisinde yok. (Debug → Okunan gezegen anahtarlarına bak.)")
-        st.markdown(make_readable_comment(int(root_house), int(derived_n), result_house, ov_sign, ruler, strength, aspects, topic_name, used_system, fallback_used))
-    else:
-        # nice metric-like line
-        st.metric("Skor", f"{score}/100", score_label(score))
-        st.markdown(make_readable_comment(int(root_house), int(derived_n), result_house, ov_sign, ruler, strength, aspects, topic_name, used_system, fallback_used))
+    st.code(
+        f"derived_house(root={root_house}, n={derived_n}) = {result_house}\n"
+        f"overlay_sign(root_sign='{root_sign}', n={derived_n}) = '{ov_sign}'\n"
+        f"ruler_used('{ov_sign}') = '{ruler}' (system={used_system}, fallback={fallback_used})",
+        language="text"
+    )
 
-    st.divider()
-    st.subheader("❓ Soru şablonları")
-    for i, q in enumerate(default_questions(int(root_house), int(derived_n), result_house, ov_sign, ruler), 1):
-        st.write(f"**{i}.** {q}")
-
-with right:
-    st.subheader("🧩 Yönetici detayı")
-    if strength["pos"]:
-        pos = strength["pos"]
-        retro = " (R)" if pos.get("retro") else ""
-        st.write(f"**{ruler}** → {pos['sign']} {pos['deg']:.3f}° | **{pos['house']}. ev**{retro}")
-        st.write("**Puan bileşenleri:**")
-        st.json(strength["parts"])
-    else:
-        st.write("Yönetici konumu yok.")
+    # Stage timings for this rerun (everything outside a span counts as "render")
+    timings.finish("render")
+    if st.session_state.get("debug_open") or timings.enabled:
+        dag_col, timing_col = st.columns(2)
+        if st.session_state.get("debug_open"):
+            dag_col.write(f"**Hesap grafiği (bu çalıştırma, {scope}):**")
+            dag_col.dataframe(dag.status_rows(), use_container_width=True, hide_index=True)
+        if timings.enabled:
+            timing_col.write(f"**Aşama süreleri (ms, bu çalıştırma, {scope}):**")
+            timing_col.dataframe(
+                [{"aşama": k, "ms": v} for k, v in timings.as_dict(unit=1000).items()],
+                use_container_width=True, hide_index=True,
+            )
+    export_timings(timings, timing_aggregate(), TIMINGS_FILE, scope=scope, ruler=ruler, root=root_house, n=derived_n)
+
+def upload_panel(job_ids: list, polling: bool):
+    """Progress and partial results of this session's uploads; polls while one is running."""
+    manager = job_manager()
+    jobs = [j for j in (manager.get(i) for i in job_ids) if j is not None]
+    if polling and not any(j.active for j in jobs):
+        # the last job just ended: one full rerun turns polling off
+        st.rerun()
+    st.subheader("📦 Toplu yükleme")
+    for i, job in enumerate(jobs):
+        snap = job.snapshot(tail=200)
+        done, total = snap["done"], snap["total"]
+        with st.expander(f"{snap['name']} — {STATUS_TR[snap['status']]} ({done}/{total if total is not None else '?'})",
+                         expanded=i == 0):
+            st.progress(done / total if total else 0.0)
+            info = [f"{snap['seconds']} sn"]
+            if snap["charts_per_sec"]:
+                info.append(f"{snap['charts_per_sec']} harita/sn")
+            if snap["eta_seconds"] is not None:
+                info.append(f"kalan ~{snap['eta_seconds']} sn")
+            if snap["charts_with_errors"]:
+                info.append(f"hatalı satırı olan harita: {snap['charts_with_errors']}")
+            st.caption(" · ".join(info))
+            if snap["error"]:
+                st.error(snap["error"])
+            if job.active:
+                st.button("İptal", key=f"upload_cancel_{job.id}", on_click=manager.cancel, args=(job.id,))
+            elif done:
+                st.download_button("Sonuçları indir (JSONL)", job.to_jsonl(), file_name=f"{job.id}.jsonl",
+                                   mime="application/json", key=f"upload_download_{job.id}")
+            if snap["recent"]:
+                if done > len(snap["recent"]):
+                    st.caption(f"Son {len(snap['recent'])} sonuç gösteriliyor.")
+                st.dataframe(result_rows(snap["recent"]), use_container_width=True, hide_index=True)
 
-    st.divider()
-    st.subheader("🔭 Otomatik açılar (dereceden)")
-    if aspects:
-        ruler_asps = [a for a in aspects if a["p1"] == ruler or a["p2"] == ruler]
-        st.write(f"Toplam açı: **{len(aspects)}**")
-        st.write(f"Yönetici ({ruler}) açıları: **{len(ruler_asps)}**")
-        if ruler_asps:
-            # add nature column for readability
-            rows = []
-            for a in sorted(ruler_asps, key=lambda x: x.get("orb", 99)):
-                other = a["p2"] if a["p1"] == ruler else a["p1"]
-                rows.append({
-                    "diğer": other,
-                    "açı": ASPECT_TR_LABEL.get(a["type"], a["type"]),
-                    "doğa": aspect_nature(a["type"]),
-                    "orb": a["orb"],
-                })
-            st.dataframe(rows, use_container_width=True)
-        else:
-            st.write("Yöneticinin orb içi majör açısı olmayabilir.")
-    else:
-        st.write("Açı üretmek için en az 2 yerleşim okunmalı.")
+with col2:
+    debug_panel(planets, planet_errors, ignored_lines)
 
 st.divider()
-st.code(
-    f"derived_house(root={int(root_house)}, n={int(derived_n)}) = {result_house}\n"
-    f"overlay_sign(root_sign='{root_sign}', n={int(derived_n)}) = '{ov_sign}'\n"
-    f"ruler_used('{ov_sign}') = '{ruler}' (system={used_system}, fallback={fallback_used})",
-    language="text"
-)
+derivation_section(planets, cusps, aspects, table, planets_text, int(root_house), int(derived_n), topic_name,
+                   ruler_system, allow_fallback, matrix_mode, use_patterns, dignity)
+
+upload_ids = st.session_state.get("upload_jobs", [])
+if upload_ids:
+    st.divider()
+    polling = any(j is not None and j.active for j in map(job_manager().get, upload_ids))
+    # a fragment of its own: while a job runs only this panel reruns, once a second
+    st.fragment(run_every=1.0 if polling else None)(upload_panel)(upload_ids, polling)
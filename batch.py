@@ -0,0 +1,311 @@
+"""
+Batch mode: score many pasted Astro-Seek charts from a JSONL/CSV export.
+
+Usage:
+    python batch.py charts.jsonl -o results.jsonl --workers 8 --chunk-size 256
+    python batch.py charts.csv --format csv --planets-field planets --cusps-field cusps
+
+Each input record holds the pasted planets block (and optionally the cusps
+block). Records are streamed, scored over a process pool and written as JSONL
+in input order as soon as each chunk finishes. At most `workers * 2` chunks are
+in flight, so memory stays bounded regardless of input size.
+
+Charts without a house column get their houses from the cusp degrees; with
+--rehouse every house is recomputed from the cusps (e.g. to switch a corpus to
+another house system). Houses are assigned per chunk in one NumPy pass.
+With --patterns each chart also lists its aspect patterns (grand trine,
+T-square, ...) and ruler strengths include the pattern component. --dignity
+widens the rulership points from domicile/detriment to exaltation/fall and
+triplicity (engine.DIGNITY_MODELS). With --parquet DIR the results are
+written as Parquet tables (charts, strengths, aspects) built column-wise by
+tables.py instead of JSONL.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from engine import (
+    DEFAULT_DIGNITY, DIGNITY_MODELS, RULERS_MODERN, RULERS_TRAD, AspectIndex,
+    parse_planets_from_text, parse_house_cusps_from_text, parse_cusp_longitudes, compute_aspect_index,
+    compute_ruler_strength, default_cusp_signs, derive,
+)
+from vectorized import assign_houses_batch, charts_to_array
+
+# =========================
+# INPUT
+# =========================
+def _open_text(path: str, mode: str):
+    if path == "-":
+        return sys.stdin if "r" in mode else sys.stdout
+    return open(path, mode, encoding="utf-8", newline="")
+
+def detect_format(path: str, fmt: str | None = None) -> str:
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+def iter_records(fh, fmt: str, planets_field="planets", cusps_field="cusps", id_field="id"):
+    """
+    Lazily yield (record_id, planets_text, cusps_text) from an open JSONL/CSV file.
+    Records without an id get their 1-based line/row number.
+    """
+    if fmt == "csv":
+        # Astro-Seek blocks are multi-line, so CSV fields are allowed to be large
+        csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+        rows = csv.DictReader(fh)
+    else:
+        rows = (json.loads(line) for line in fh if line.strip())
+
+    for i, row in enumerate(rows, 1):
+        yield (
+            row.get(id_field) or i,
+            row.get(planets_field) or "",
+            row.get(cusps_field) or "",
+        )
+
+def iter_chunks(it, size: int):
+    it = iter(it)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+# =========================
+# WORKER
+# =========================
+def parse_record(record_id, planets_text: str, cusps_text: str) -> dict:
+    planets, planet_errors, _ = parse_planets_from_text(planets_text)
+    cusps, cusp_errors = parse_house_cusps_from_text(cusps_text)
+    cusp_lons, _ = parse_cusp_longitudes(cusps_text)
+    return {"id": record_id, "planets": planets, "cusps": cusps, "cusp_lons": cusp_lons,
+            "errors": len(planet_errors) + len(cusp_errors)}
+
+def house_charts(parsed: list, rehouse: bool = False):
+    """
+    engine.houses_from_cusps for a list of parse_record() dicts, in place, with
+    one vectorized house assignment for all of them.
+    """
+    todo = [
+        p for p in parsed
+        if len(p["cusp_lons"]) == 12 and (rehouse or any(not pos.get("house") for pos in p["planets"].values()))
+    ]
+    if not todo:
+        return
+    lons, bodies = charts_to_array([p["planets"] for p in todo])
+    cusps = np.array([[p["cusp_lons"][h] for h in range(1, 13)] for p in todo], dtype=np.float64)
+    houses = assign_houses_batch(lons, cusps)
+    col = {b: i for i, b in enumerate(bodies)}
+    for p, row in zip(todo, houses):
+        if not row.any():
+            continue  # cusps out of zodiac order: keep the text houses
+        p["planets"] = {
+            name: pos if not rehouse and pos.get("house") else {**pos, "house": int(row[col[name]])}
+            for name, pos in p["planets"].items()
+        }
+
+def score_parsed(p: dict, ruler_system="Modern", question=None, include_aspects=False, patterns=False,
+                 dignity=DEFAULT_DIGNITY) -> dict:
+    """
+    Aspects + ruler strength for every ruler body present in a parse_record() chart.
+    question: optional (root_house, n) to also run the derived-house pipeline.
+    """
+    record_id, planets, cusps = p["id"], p["planets"], p["cusps"]
+    aspects = compute_aspect_index(planets) if planets else AspectIndex()
+    found = aspects.patterns() if patterns else None
+    rulers_map = RULERS_MODERN if ruler_system == "Modern" else RULERS_TRAD
+
+    strengths = {}
+    for ruler in sorted(set(rulers_map.values())):
+        if ruler in planets:
+            s = compute_ruler_strength(ruler, planets, aspects, rulers_map, found, dignity)
+            strengths[ruler] = {"score": s["score"], "parts": s["parts"]}
+
+    out = {
+        "id": record_id,
+        "planets": len(planets),
+        "cusps": len(cusps),
+        "aspect_count": len(aspects),
+        "errors": p["errors"],
+        "strengths": strengths,
+    }
+    if include_aspects:
+        out["aspects"] = aspects
+    if patterns:
+        out["patterns"] = found
+    if question:
+        root_house, n = question
+        d = derive(planets, aspects, default_cusp_signs(cusps), root_house, n, ruler_system, use_patterns=patterns,
+                   dignity=dignity)
+        out["derived"] = {
+            "result_house": d["result_house"],
+            "ov_sign": d["ov_sign"],
+            "ruler": d["ruler"],
+            "used_system": d["used_system"],
+            "score": d["strength"]["score"],
+        }
+    return out
+
+def score_chart(record_id, planets_text: str, cusps_text: str, ruler_system="Modern",
+                question=None, include_aspects=False, rehouse=False, patterns=False,
+                dignity=DEFAULT_DIGNITY) -> dict:
+    """Parse and score one chart (see score_parsed)."""
+    return score_chunk([(record_id, planets_text, cusps_text)], ruler_system, question, include_aspects,
+                       rehouse, patterns, dignity)[0]
+
+def score_chunk(chunk: list, ruler_system: str, question, include_aspects: bool, rehouse: bool = False,
+                patterns: bool = False, dignity: str = DEFAULT_DIGNITY) -> list:
+    parsed = [parse_record(*rec) for rec in chunk]
+    house_charts(parsed, rehouse)
+    return [score_parsed(p, ruler_system, question, include_aspects, patterns, dignity) for p in parsed]
+
+# =========================
+# DRIVER
+# =========================
+def ordered_results(chunks, fn, args: tuple, workers: int = 0, pool: ProcessPoolExecutor | None = None):
+    """
+    fn(chunk, *args) for every chunk, yielded in input order. Without `pool`,
+    workers <= 1 runs in-process and more workers get a pool of their own;
+    at most `workers * 2` chunks are in flight. A given `pool` is left running,
+    and closing the generator early cancels the chunks not yet started.
+    """
+    if pool is None:
+        if workers <= 1:
+            for chunk in chunks:
+                yield fn(chunk, *args)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as own:
+            yield from ordered_results(chunks, fn, args, workers, own)
+        return
+    pending = deque()
+    try:
+        for chunk in chunks:
+            pending.append(pool.submit(fn, chunk, *args))
+            if len(pending) >= max(1, workers) * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for fut in pending:
+            fut.cancel()
+
+def _summary(charts: int, errors: int, t0: float, workers: int, chunk_size: int) -> dict:
+    elapsed = time.perf_counter() - t0
+    return {
+        "charts": charts,
+        "charts_with_errors": errors,
+        "seconds": round(elapsed, 3),
+        "charts_per_sec": round(charts / elapsed, 1) if elapsed > 0 else None,
+        "workers": workers,
+        "chunk_size": chunk_size,
+    }
+
+def run_batch(records, out_fh, workers: int = 0, chunk_size: int = 256, ruler_system="Modern",
+              question=None, include_aspects=False, rehouse=False, patterns=False, dignity=DEFAULT_DIGNITY) -> dict:
+    """
+    Score `records` ((id, planets_text, cusps_text) tuples) and write JSONL to out_fh.
+    workers <= 1 runs in-process. Returns a throughput summary dict.
+    """
+    t0 = time.perf_counter()
+    charts = errors = 0
+    args = (ruler_system, question, include_aspects, rehouse, patterns, dignity)
+    for results in ordered_results(iter_chunks(records, chunk_size), score_chunk, args, workers):
+        for r in results:
+            out_fh.write(json.dumps(r, ensure_ascii=False) + "\n")
+            charts += 1
+            errors += 1 if r["errors"] else 0
+    out_fh.flush()
+    return _summary(charts, errors, t0, workers, chunk_size)
+
+def run_batch_parquet(records, out_dir: str, workers: int = 0, chunk_size: int = 256, ruler_system="Modern",
+                      question=None, include_aspects=False, rehouse=False, patterns=False,
+                      dignity=DEFAULT_DIGNITY) -> dict:
+    """
+    run_batch(), written as Parquet tables in out_dir (tables.TABLES, one row
+    group per chunk) from tables.score_chunk_arrow().
+    """
+    from tables import ParquetSink, score_chunk_arrow  # pyarrow only for this path
+
+    t0 = time.perf_counter()
+    charts = errors = 0
+    sink = ParquetSink(out_dir)
+    args = (ruler_system, question, include_aspects, rehouse, patterns, dignity)
+    try:
+        for batches in ordered_results(iter_chunks(records, chunk_size), score_chunk_arrow, args, workers):
+            sink.write(batches)
+            charts += batches["charts"].num_rows
+            errors += int(np.count_nonzero(batches["charts"].column("errors").to_numpy()))
+    finally:
+        sink.close()
+    return _summary(charts, errors, t0, workers, chunk_size)
+
+def positive_int(text: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1: {text}")
+    return value
+
+def build_arg_parser():
+    p = argparse.ArgumentParser(description="Score Astro-Seek chart exports in parallel.")
+    p.add_argument("input", help="JSONL/CSV file, or - for stdin")
+    p.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    p.add_argument("--parquet", metavar="DIR", help="write Parquet tables to DIR instead of JSONL")
+    p.add_argument("--format", choices=["jsonl", "csv"], help="input format (default: from extension)")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="process count (1 = in-process)")
+    p.add_argument("--chunk-size", type=positive_int, default=256, help="charts per worker task")
+    p.add_argument("--ruler-system", choices=["Modern", "Klasik"], default="Modern")
+    p.add_argument("--planets-field", default="planets")
+    p.add_argument("--cusps-field", default="cusps")
+    p.add_argument("--id-field", default="id")
+    p.add_argument("--root", type=int, choices=range(1, 13), metavar="1-12",
+                   help="root house for a derived-house question (with --n)")
+    p.add_argument("--n", type=int, choices=range(1, 13), metavar="1-12", help="derived house number (with --root)")
+    p.add_argument("--include-aspects", action="store_true", help="write the full aspect list per chart")
+    p.add_argument("--rehouse", action="store_true", help="recompute every house from the cusp degrees")
+    p.add_argument("--patterns", action="store_true", help="detect aspect patterns and add them to the ruler scores")
+    p.add_argument("--dignity", choices=list(DIGNITY_MODELS), default=DEFAULT_DIGNITY,
+                   help="essential dignities in the rulership points")
+    return p
+
+def main(argv=None):
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    if (args.root is None) != (args.n is None):
+        parser.error("--root and --n must be given together")
+    question = (args.root, args.n) if args.root is not None else None
+    fmt = detect_format(args.input, args.format)
+
+    in_fh = _open_text(args.input, "r")
+    out_fh = None if args.parquet else _open_text(args.output, "w")
+    try:
+        records = iter_records(in_fh, fmt, args.planets_field, args.cusps_field, args.id_field)
+        options = (args.ruler_system, question, args.include_aspects, args.rehouse, args.patterns, args.dignity)
+        if args.parquet:
+            summary = run_batch_parquet(records, args.parquet, args.workers, args.chunk_size, *options)
+        else:
+            summary = run_batch(records, out_fh, args.workers, args.chunk_size, *options)
+    finally:
+        if in_fh is not sys.stdin:
+            in_fh.close()
+        if out_fh not in (None, sys.stdout):
+            out_fh.close()
+
+    print(
+        f"{summary['charts']} charts in {summary['seconds']}s "
+        f"({summary['charts_per_sec']} charts/sec, workers={summary['workers']}, "
+        f"chunk={summary['chunk_size']}, with errors={summary['charts_with_errors']})",
+        file=sys.stderr,
+    )
+    return summary
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Benchmarks and load harnesses; run from the repo root with `python -m benchmarks.<name>`."""
@@ -0,0 +1,132 @@
+"""
+Dict results vs Arrow tables for batch scoring.
+
+    python -m benchmarks.arrow --sizes 1000,100000 --out benchmarks/results/arrow.json
+
+For N seeded synthetic charts (generated before timing), both paths run
+in-process over the same chunks with the same options:
+
+    dict    batch.score_chunk → JSONL file, and the table view of the
+            results (jobs.result_rows → pa.Table, what st.dataframe gets)
+    arrow   tables.score_chunk_arrow → RecordBatches → Parquet files, and
+            one concatenated table per name
+
+Per path: scoring seconds, export seconds, table seconds, charts/s overall,
+output bytes, and retained bytes per chart of the results in memory
+(tracemalloc for dicts, buffer sizes for Arrow, on --alloc-sample charts).
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import pyarrow as pa
+
+from batch import iter_chunks, score_chunk
+from benchmarks import synth
+from jobs import result_rows
+from tables import TABLES, ParquetSink, score_chunk_arrow
+
+def _records(seed: int, n: int) -> list:
+    return [(i, p, c) for i, (p, c) in enumerate(synth.charts(seed, n))]
+
+def run_dict(records: list, chunk_size: int, args: tuple, workdir: str) -> dict:
+    t0 = time.perf_counter()
+    results = [r for chunk in iter_chunks(records, chunk_size) for r in score_chunk(chunk, *args)]
+    t1 = time.perf_counter()
+    path = os.path.join(workdir, "results.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for r in results:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    t2 = time.perf_counter()
+    table = pa.Table.from_pylist(result_rows(results))
+    t3 = time.perf_counter()
+    return {"score_s": t1 - t0, "export_s": t2 - t1, "table_s": t3 - t2, "rows": table.num_rows,
+            "output_bytes": os.path.getsize(path)}
+
+def run_arrow(records: list, chunk_size: int, args: tuple, workdir: str) -> dict:
+    t0 = time.perf_counter()
+    batches = [score_chunk_arrow(chunk, *args) for chunk in iter_chunks(records, chunk_size)]
+    t1 = time.perf_counter()
+    out_dir = os.path.join(workdir, "parquet")
+    sink = ParquetSink(out_dir)
+    for b in batches:
+        sink.write(b)
+    sink.close()
+    t2 = time.perf_counter()
+    tables = {name: pa.Table.from_batches([b[name] for b in batches]) for name in batches[0]} if batches else {}
+    t3 = time.perf_counter()
+    return {"score_s": t1 - t0, "export_s": t2 - t1, "table_s": t3 - t2,
+            "rows": tables["charts"].num_rows if tables else 0,
+            "output_bytes": sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir))}
+
+def retained_per_chart(records: list, chunk_size: int, args: tuple) -> dict:
+    """Bytes per chart held by the results of `records` (kept alive) on each path."""
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    kept = [score_chunk(chunk, *args) for chunk in iter_chunks(records, chunk_size)]
+    dict_bytes = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del kept
+    batches = [score_chunk_arrow(chunk, *args) for chunk in iter_chunks(records, chunk_size)]
+    arrow_bytes = sum(b.nbytes for chunk in batches for b in chunk.values())
+    n = max(1, len(records))
+    return {"dict": round(dict_bytes / n), "arrow": round(arrow_bytes / n)}
+
+def bench(sizes: list, seed: int, chunk_size: int, alloc_sample: int, args: tuple) -> list:
+    results = []
+    for n in sizes:
+        records = _records(seed, n)
+        row = {"charts": n}
+        for name, fn in (("dict", run_dict), ("arrow", run_arrow)):
+            workdir = tempfile.mkdtemp(prefix=f"arrow_bench_{name}_")
+            try:
+                r = fn(records, chunk_size, args, workdir)
+            finally:
+                shutil.rmtree(workdir)
+            total = r["score_s"] + r["export_s"] + r["table_s"]
+            row[name] = {k: round(v, 3) if k.endswith("_s") else v for k, v in r.items()}
+            row[name]["charts_per_sec"] = round(n / total, 1) if total > 0 else None
+        row["retained_bytes_per_chart"] = retained_per_chart(records[:alloc_sample], chunk_size, args)
+        results.append(row)
+        print(f"{n} charts: dict {row['dict']['charts_per_sec']}/s, arrow {row['arrow']['charts_per_sec']}/s",
+              flush=True)
+    return results
+
+def print_report(results: list):
+    print(f"{'charts':>8} {'path':<6}{'score s':>9}{'export s':>10}{'table s':>9}{'charts/s':>10}"
+          f"{'out MiB':>9}{'B/chart':>9}")
+    for row in results:
+        for name in ("dict", "arrow"):
+            r = row[name]
+            print(f"{row['charts']:>8} {name:<6}{r['score_s']:>9.2f}{r['export_s']:>10.2f}{r['table_s']:>9.2f}"
+                  f"{r['charts_per_sec'] or 0:>10.1f}{r['output_bytes'] / 2 ** 20:>9.1f}"
+                  f"{row['retained_bytes_per_chart'][name]:>9}")
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Dict vs Arrow result tables for batch scoring.")
+    p.add_argument("--sizes", default="1000,100000", help="comma-separated chart counts")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--chunk-size", type=int, default=256)
+    p.add_argument("--alloc-sample", type=int, default=1000, help="charts for the retained-memory measure")
+    p.add_argument("--root", type=int, default=7, help="derived question root house (0 = no question)")
+    p.add_argument("--n", type=int, default=5)
+    p.add_argument("--include-aspects", action="store_true")
+    p.add_argument("--patterns", action="store_true")
+    p.add_argument("--out", help="write results JSON here")
+    args = p.parse_args(argv)
+
+    question = (args.root, args.n) if args.root else None
+    options = ("Modern", question, args.include_aspects, False, args.patterns)
+    results = bench([int(s) for s in args.sizes.split(",")], args.seed, args.chunk_size, args.alloc_sample, options)
+    print()
+    print_report(results)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"options": vars(args), "tables": list(TABLES), "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Micro-benchmarks for every pipeline stage.
+
+    python -m benchmarks.run --sizes 1,100,10000 --out benchmarks/results/HEAD.json
+    python -m benchmarks.run --compare benchmarks/results/base.json benchmarks/results/HEAD.json
+
+Each stage runs over N seeded synthetic charts (benchmarks/synth.py). Inputs
+are generated in chunks outside the timed region, so 1M-chart runs stay in
+bounded memory. Allocations (tracemalloc) are measured on a sample of at most
+--alloc-sample items per stage, because tracing slows the stage itself.
+Results are written as JSON for comparison between commits.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+
+import engine
+from benchmarks import synth
+
+CHUNK = 10000
+
+# =========================
+# STAGES
+# =========================
+# Each stage: (prepare(rng, k) -> list of inputs, run(inputs) -> None).
+def _charts(rng, k, fmt="spaced"):
+    return [synth.planets_text(rng, fmt) for _ in range(k)]
+
+def _parsed(rng, k):
+    out = []
+    for text in _charts(rng, k):
+        planets, _, _ = engine.parse_planets_from_text(text)
+        out.append(planets)
+    return out
+
+def _with_aspects(rng, k):
+    return [(p, engine.compute_aspects(p)) for p in _parsed(rng, k)]
+
+def _derived(rng, k):
+    out = []
+    for planets, aspects in _with_aspects(rng, k):
+        cusp_signs = engine.default_cusp_signs(engine.parse_house_cusps_from_text(synth.cusps_text(rng))[0])
+        d = engine.derive(planets, aspects, cusp_signs, rng.randint(1, 12), rng.randint(1, 12))
+        out.append((d, aspects))
+    return out
+
+def _run_rulers(items):
+    rulers = sorted(set(engine.RULERS_MODERN.values()))
+    for planets, aspects in items:
+        for r in rulers:
+            engine.compute_ruler_strength(r, planets, aspects, engine.RULERS_MODERN)
+
+def _run_comment(items):
+    for d, aspects in items:
+        engine.make_readable_comment(d["root_house"], d["n"], d["result_house"], d["ov_sign"], d["ruler"],
+                                     d["strength"], aspects, None, d["used_system"], d["fallback_used"])
+
+STAGES = {
+    "parse_planets_spaced": (lambda rng, k: _charts(rng, k, "spaced"),
+                             lambda xs: [engine.parse_planets_from_text(x) for x in xs]),
+    "parse_planets_compact": (lambda rng, k: _charts(rng, k, "compact"),
+                              lambda xs: [engine.parse_planets_from_text(x) for x in xs]),
+    "parse_house_cusps": (lambda rng, k: [synth.cusps_text(rng) for _ in range(k)],
+                          lambda xs: [engine.parse_house_cusps_from_text(x) for x in xs]),
+    "normalize_sign": (lambda rng, k: synth.tokens(rng, "sign", 20 * k),
+                       lambda xs: [engine.normalize_sign(x) for x in xs]),
+    "normalize_planet": (lambda rng, k: synth.tokens(rng, "planet", 20 * k),
+                         lambda xs: [engine.normalize_planet(x) for x in xs]),
+    "compute_aspects": (_parsed, lambda xs: [engine.compute_aspects(x) for x in xs]),
+    "find_patterns": (lambda rng, k: [a for _, a in _with_aspects(rng, k)],
+                      lambda xs: [engine.find_patterns(x) for x in xs]),
+    "compute_ruler_strength": (_with_aspects, _run_rulers),
+    "make_readable_comment": (_derived, _run_comment),
+}
+# normalize_* stages time 20 tokens per chart
+ITEMS_PER_CHART = {"normalize_sign": 20, "normalize_planet": 20}
+
+def bench_stage(name: str, n: int, seed: int, alloc_sample: int) -> dict:
+    prepare, run = STAGES[name]
+    rng = random.Random(f"{seed}:{name}")
+    elapsed = 0.0
+    left = n
+    while left > 0:
+        k = min(CHUNK, left)
+        inputs = prepare(rng, k)
+        t0 = time.perf_counter()
+        run(inputs)
+        elapsed += time.perf_counter() - t0
+        left -= k
+        del inputs
+
+    k = min(n, alloc_sample)
+    inputs = prepare(rng, k)
+    tracemalloc.start()
+    snap0 = tracemalloc.take_snapshot()
+    run(inputs)
+    snap1 = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    diff = snap1.compare_to(snap0, "filename")
+    allocated_blocks = sum(max(0, s.count_diff) for s in diff)
+
+    items = n * ITEMS_PER_CHART.get(name, 1)
+    return {
+        "stage": name,
+        "charts": n,
+        "items": items,
+        "seconds": round(elapsed, 6),
+        "us_per_item": round(elapsed / items * 1e6, 3),
+        "items_per_sec": round(items / elapsed, 1) if elapsed > 0 else None,
+        "alloc_peak_bytes_per_chart": round(peak / k, 1),
+        "alloc_retained_blocks_per_chart": round(allocated_blocks / k, 2),
+    }
+
+# =========================
+# REPORTING
+# =========================
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_scaling(results: list):
+    sizes = sorted({r["charts"] for r in results})
+    stages = list(dict.fromkeys(r["stage"] for r in results))
+    by = {(r["stage"], r["charts"]): r for r in results}
+    print(f"{'stage':<26}" + "".join(f"{f'N={s}':>14}" for s in sizes) + f"{'peak B/chart':>15}")
+    for st in stages:
+        row = "".join(f"{by[(st, s)]['us_per_item']:>11.2f} us" if (st, s) in by else " " * 14 for s in sizes)
+        peak = by[(st, sizes[-1])]["alloc_peak_bytes_per_chart"] if (st, sizes[-1]) in by else 0
+        print(f"{st:<26}{row}{peak:>15.0f}")
+
+def compare(old_path: str, new_path: str):
+    with open(old_path, encoding="utf-8") as f:
+        old = {(r["stage"], r["charts"]): r for r in json.load(f)["results"]}
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)["results"]
+    print(f"{'stage':<26}{'N':>9}{'old us':>11}{'new us':>11}{'ratio':>8}")
+    for r in new:
+        o = old.get((r["stage"], r["charts"]))
+        if o is None:
+            continue
+        ratio = r["us_per_item"] / o["us_per_item"] if o["us_per_item"] else float("nan")
+        flag = "  REGRESSION" if ratio > 1.10 else ""
+        print(f"{r['stage']:<26}{r['charts']:>9}{o['us_per_item']:>11.2f}{r['us_per_item']:>11.2f}{ratio:>8.2f}{flag}")
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Per-stage pipeline micro-benchmarks.")
+    p.add_argument("--sizes", default="1,100,10000", help="comma-separated chart counts (up to 1000000)")
+    p.add_argument("--stages", help="comma-separated subset of: " + ", ".join(STAGES))
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--alloc-sample", type=int, default=1000)
+    p.add_argument("--out", help="write results JSON here")
+    p.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = p.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    stages = args.stages.split(",") if args.stages else list(STAGES)
+    results = []
+    for name in stages:
+        for n in sizes:
+            results.append(bench_stage(name, n, args.seed, args.alloc_sample))
+            print(f"{name:<26} N={n:<8} {results[-1]['us_per_item']:>10.2f} us/item", flush=True)
+
+    print()
+    print_scaling(results)
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "seed": args.seed,
+                "results": results,
+            }, f, indent=2)
+
+if __name__ == "__main__":
+    main()
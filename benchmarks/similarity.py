@@ -0,0 +1,142 @@
+"""
+Build time, memory and query latency of the chart similarity index.
+
+    python -m benchmarks.similarity --charts 100000
+    python -m benchmarks.similarity --charts 1000000 --store /tmp/sim_store   # keeps the corpus for reruns
+
+The corpus is a ChartStore of seeded random charts (10-15 bodies, uniform
+longitudes and houses, aspects from the vectorized engine). Reported:
+
+    build     seconds for SimilarityIndex.build (embedding, k-means, postings, scores)
+    memory    index bytes in total and per chart
+    top-k     p50/p95 latency and recall@k against an exact scan, unfiltered
+    filtered  p50/p95 latency with the --where conditions, via postings and,
+              for comparison, via a full column scan
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks import synth
+from engine import SIGNS, normalize_planet
+from similarity import _OPS, SimilarityIndex, parse_where
+from store import ChartStore
+from vectorized import compute_aspects_batch
+
+CHUNK = 10000
+
+def fill_store(store: ChartStore, n: int, seed: int):
+    rng = np.random.default_rng(seed)
+    bodies = [normalize_planet(b) for b in synth.BODIES_EN]
+    p = len(bodies)
+    for start in range(len(store), n, CHUNK):
+        k = min(CHUNK, n - start)
+        lons = rng.uniform(0, 360, (k, p))
+        count = rng.integers(10, p + 1, k)
+        houses = rng.integers(1, 13, (k, p))
+        retro = rng.random((k, p)) < 0.15
+        charts = [
+            {bodies[j]: {"sign": SIGNS[int(lons[r, j] // 30)], "deg": float(lons[r, j] % 30),
+                         "house": int(houses[r, j]), "lon": float(lons[r, j]), "retro": bool(retro[r, j])}
+             for j in range(count[r])}
+            for r in range(k)
+        ]
+        keys = [rng.bytes(16) for _ in range(k)]
+        store.append_many(zip(charts, [{}] * k, keys, compute_aspects_batch(charts)))
+
+def _pct_ms(xs: list, q: float) -> float:
+    xs = sorted(xs)
+    return round(xs[min(len(xs) - 1, int(q * len(xs)))] * 1000, 3)
+
+def _timed(fn, args_list: list):
+    out, times = [], []
+    for args in args_list:
+        t0 = time.perf_counter()
+        out.append(fn(*args))
+        times.append(time.perf_counter() - t0)
+    return out, times
+
+def scan_filter(index: SimilarityIndex, where: list) -> np.ndarray:
+    """The same filter as a full scan of the index columns (baseline)."""
+    cols = {"house": index.houses, "sign": index.signs, "score": index.scores}
+    mask = np.ones(len(index), dtype=bool)
+    for b, field, op, value in where:
+        mask &= _OPS[op](cols[field][:, b], value)
+    return np.nonzero(mask)[0]
+
+def bench(store: ChartStore, queries: int, k: int, nprobe: int, where: list, seed: int) -> dict:
+    t0 = time.perf_counter()
+    index = SimilarityIndex.build(store, seed=seed)
+    build_s = time.perf_counter() - t0
+    nbytes = sum(index.nbytes().values())
+
+    rng = np.random.default_rng(seed + 1)
+    qrows = rng.choice(len(index), min(queries, len(index)), replace=False)
+    qvecs = [index.vectors[r] for r in qrows]
+
+    hits, topk_t = _timed(index.search, [(q, k, nprobe) for q in qvecs])
+    recall = []
+    for q, got in zip(qvecs[:50], hits):
+        d = ((index.vectors - q) ** 2).sum(axis=1)
+        exact = set(np.argpartition(d, k - 1)[:k].tolist())
+        recall.append(len(exact & {r for r, _ in got}) / k)
+
+    fhits, filt_t = _timed(index.search, [(q, k, nprobe, where) for q in qvecs])
+    rows, post_t = _timed(index.filter_rows, [(where,)] * len(qvecs))
+    scan, scan_t = _timed(scan_filter, [(index, where)] * min(len(qvecs), 20))
+    assert np.array_equal(rows[0], scan[0]), "postings and scan disagree"
+
+    return {
+        "charts": len(index),
+        "nlist": index.meta["nlist"],
+        "build_s": round(build_s, 3),
+        "index_mib": round(nbytes / 2 ** 20, 2),
+        "index_bytes_per_chart": round(nbytes / len(index), 1),
+        "topk_p50_ms": _pct_ms(topk_t, 0.5),
+        "topk_p95_ms": _pct_ms(topk_t, 0.95),
+        "recall_at_k": round(float(np.mean(recall)), 3),
+        "filter_matches": int(len(rows[0])),
+        "filtered_topk_p50_ms": _pct_ms(filt_t, 0.5),
+        "filtered_topk_p95_ms": _pct_ms(filt_t, 0.95),
+        "filter_postings_p50_ms": _pct_ms(post_t, 0.5),
+        "filter_scan_p50_ms": _pct_ms(scan_t, 0.5),
+    }
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Similarity index build/query benchmark.")
+    p.add_argument("--charts", type=int, default=100000)
+    p.add_argument("--store", help="reuse/extend this ChartStore directory (default: temporary)")
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--nprobe", type=int, default=8)
+    p.add_argument("--where", action="append", help='filter, repeatable (default: "Jüpiter.house=10", "Jüpiter.score>=75")')
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--out", help="write results JSON here")
+    args = p.parse_args(argv)
+
+    path = args.store or tempfile.mkdtemp(prefix="simstore_")
+    try:
+        store = ChartStore(path)
+        t0 = time.perf_counter()
+        fill_store(store, args.charts, args.seed)
+        print(f"corpus: {len(store)} charts ({time.perf_counter() - t0:.1f}s to generate)", flush=True)
+        where = [parse_where(w) for w in (args.where or ["Jüpiter.house=10", "Jüpiter.score>=75"])]
+        res = bench(store, args.queries, args.k, args.nprobe, where, args.seed)
+    finally:
+        if not args.store:
+            shutil.rmtree(path, ignore_errors=True)
+
+    for key, value in res.items():
+        print(f"{key:<26}{value:>12}")
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"where": args.where, "results": res}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Seeded generator of realistic Astro-Seek text.
+
+Charts use the two pasted planet formats the parser accepts (spaced and
+compact), the house-cusp block, and the lunar-phase noise lines that real
+pastes contain. The same seed always yields the same charts.
+"""
+import random
+
+BODIES_EN = ["Sun", "Moon", "Mercury", "Venus", "Mars", "Jupiter", "Saturn", "Uranus",
+             "Neptune", "Pluto", "Node", "Lilith (M)", "Chiron", "Fortune", "Vertex"]
+SIGNS_EN = ["Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo", "Libra", "Scorpio",
+            "Sagittarius", "Capricorn", "Aquarius", "Pisces"]
+SIGN_SYMBOLS = ["♈", "♉", "♊", "♋", "♌", "♍", "♎", "♏", "♐", "♑", "♒", "♓"]
+PHASE_LINES = ["Waxing Crescent", "Disseminating phase", "Balsamic Moon", "Waning Gibbous"]
+
+def _dms(rng: random.Random):
+    return rng.randint(0, 29), rng.randint(0, 59), rng.randint(0, 59)
+
+def spaced_line(rng: random.Random, body: str) -> str:
+    d, m, s = _dms(rng)
+    sign = rng.choice(SIGN_SYMBOLS) if rng.random() < 0.05 else rng.choice(SIGNS_EN)
+    house = rng.randint(1, 12)
+    end_of = "end of " if rng.random() < 0.2 else ""
+    motion = "Retrograde" if rng.random() < 0.15 else "Direct"
+    return f"{body}: {sign} {d}°{m:02d}’{s:02d}’’  {end_of}{house}  {motion}"
+
+def compact_line(rng: random.Random, body: str) -> str:
+    d, m, _ = _dms(rng)
+    return f"{body.replace(' (M)', '')}{rng.choice(SIGNS_EN)}{d}°{m:02d}’{rng.randint(1, 12)}"
+
+def planets_text(rng: random.Random, fmt: str = "spaced", bodies: int | None = None, noise: bool = True) -> str:
+    n = bodies or rng.randint(10, len(BODIES_EN))
+    make = spaced_line if fmt == "spaced" else compact_line
+    lines = [make(rng, b) for b in BODIES_EN[:n]]
+    if noise and rng.random() < 0.3:
+        lines.insert(rng.randrange(len(lines) + 1), rng.choice(PHASE_LINES))
+    return "\n".join(lines)
+
+def cusps_text(rng: random.Random) -> str:
+    asc = rng.randrange(12)
+    out = []
+    for h in range(1, 13):
+        # occasional repeated sign, as with intercepted houses
+        sign = SIGNS_EN[(asc + h - 1 - (rng.random() < 0.1)) % 12]
+        tag = " (ASC)" if h == 1 else (" (MC)" if h == 10 else "")
+        d, m, s = _dms(rng)
+        out.append(f"{h}: {sign}{tag} {d}°{m:02d}’{s:02d}’’")
+    return "\n".join(out)
+
+def tokens(rng: random.Random, kind: str, n: int) -> list[str]:
+    """Sign or planet tokens with the spellings/casings seen in pastes."""
+    base = SIGNS_EN + ["Koç", "Boga", "İkizler", "Yengec"] + SIGN_SYMBOLS if kind == "sign" else BODIES_EN + ["Güneş", "Ay"]
+    out = []
+    for _ in range(n):
+        t = rng.choice(base)
+        r = rng.random()
+        if r < 0.1:
+            t = t.upper()
+        elif r < 0.2:
+            t = t.lower()
+        elif r < 0.25:
+            t = f" {t}: "
+        out.append(t)
+    return out
+
+def charts(seed: int, n: int, fmt: str = "spaced"):
+    """Lazily yield n (planets_text, cusps_text) pairs."""
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield planets_text(rng, fmt), cusps_text(rng)
@@ -0,0 +1,215 @@
+"""
+Rerun latency of the Streamlit app, driven headless with AppTest.
+
+    python -m benchmarks.ui --runs 30
+    python -m benchmarks.ui --app /tmp/app_before.py     # e.g. git show HEAD~1:app.py
+    python -m benchmarks.ui --upload 10000               # also while a 10k-chart upload is scored
+
+Each scenario changes one widget and reruns either the whole script or just
+the fragment holding that widget, which is what the browser asks for.
+Reported per scenario:
+
+    wall   time around AppTest.run(), including AppTest's own per-run cost
+           (it recompiles the script on every run, a real server does not)
+    app    time measured by the app's own timing spans (EVTURETME_TIMINGS_FILE);
+           "-" for fragments that record no timings
+
+With --upload the cusp scenarios and the upload panel's poll are measured
+again while a background upload job of that many synthetic charts runs, until
+it ends or `runs` rounds are done.
+
+AppTest has no public API for fragment-scoped reruns, so run_fragment()
+patches the RerunData it sends; it relies on Streamlit internals (1.37+).
+The patch is per thread, so sessions driven from several threads
+(benchmarks/ui_load.py) can mix full and fragment reruns.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from streamlit.testing.v1 import AppTest
+import streamlit.testing.v1.local_script_runner as _runner
+
+from benchmarks import synth
+from jobs import STATUS_TR
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+def fragment_id(at: AppTest, name: str) -> str | None:
+    """Id of the registered fragment whose function is called `name`."""
+    for fid, wrapped in at._fragment_storage._fragments.items():
+        for cell in wrapped.__closure__ or ():
+            if getattr(cell.cell_contents, "__name__", None) == name:
+                return fid
+    return None
+
+def has_fragment_internals(at: AppTest) -> bool:
+    """Whether this Streamlit has the internals fragment_id() and run_fragment() use."""
+    return (hasattr(_runner, "RerunData")
+            and isinstance(getattr(getattr(at, "_fragment_storage", None), "_fragments", None), dict))
+
+_RerunData = getattr(_runner, "RerunData", None)
+_scope = threading.local()
+_patch_lock = threading.Lock()
+_patch_users = 0
+
+def _scoped_rerun_data(*args, **kwargs):
+    fid = getattr(_scope, "fragment_id", None)
+    if fid is None:
+        return _RerunData(*args, **kwargs)
+    return _RerunData(*args, fragment_id_queue=[fid], is_fragment_scoped_rerun=True, **kwargs)
+
+def run_fragment(at: AppTest, fid: str):
+    """at.run(), but as the browser's rerun of fragment `fid` only."""
+    # AppTest builds the RerunData in the calling thread, so a thread-local id scopes the patch;
+    # it is installed while any thread is inside run_fragment() and the original put back after
+    global _patch_users
+    with _patch_lock:
+        _patch_users += 1
+        _runner.RerunData = _scoped_rerun_data
+    _scope.fragment_id = fid
+    try:
+        at.run()
+    finally:
+        _scope.fragment_id = None
+        with _patch_lock:
+            _patch_users -= 1
+            if not _patch_users:
+                _runner.RerunData = _RerunData
+
+def _last_record(path: str) -> dict | None:
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    return json.loads(lines[-1]) if lines else None
+
+def _pct(xs: list, q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+def bench(app: str, runs: int, seed: int, upload: int = 0) -> list:
+    rng = random.Random(seed)
+    fd, timings_file = tempfile.mkstemp(suffix=".jsonl")
+    os.close(fd)
+    os.environ["EVTURETME_TIMINGS_FILE"] = timings_file
+
+    at = AppTest.from_file(app, default_timeout=60).run()
+    at.text_area[0].input(synth.planets_text(rng, noise=False))
+    at.text_area[1].input(synth.cusps_text(rng))
+    at.checkbox(key="timing_enabled").check()
+    at.run()
+
+    cusp = at.selectbox(key="cusp_3")
+    other_signs = [s for s in cusp.options if s != cusp.value][:2]
+
+    def flip_cusp(i):
+        at.selectbox(key="cusp_3").set_value(other_signs[i % 2])
+
+    def flip_toggle(key):
+        def step(i):
+            at.toggle(key=key).set_value(i % 2 == 0)
+        return step
+
+    scenarios = [
+        ("cusp, full rerun", flip_cusp, None),
+        ("cusp, fragment rerun", flip_cusp, "derivation_section"),
+        ("debug panel toggle", flip_toggle("debug_open"), "debug_panel"),
+        ("aspect table toggle", flip_toggle("aspects_open"), "ruler_aspect_panel"),
+    ]
+
+    def usable(label, step, frag):
+        fid = fragment_id(at, frag) if frag else None
+        if frag and fid is None:
+            print(f"{label:<24} skipped (no fragment {frag!r} in {os.path.basename(app)})")
+            return False, None
+        try:
+            step(0)
+        except KeyError:
+            print(f"{label:<24} skipped (widget missing in {os.path.basename(app)})")
+            return False, None
+        return True, fid
+
+    def run_once(label, step, i, fid, wall, inner):
+        step(i)
+        open(timings_file, "w").close()  # only this run's record; panels without spans leave none
+        t0 = time.perf_counter()
+        run_fragment(at, fid) if fid else at.run()
+        wall.append(time.perf_counter() - t0)
+        if at.exception:
+            raise RuntimeError(f"{label}: {at.exception[0].value}")
+        rec = _last_record(timings_file)
+        if rec is not None:
+            inner.append(sum(rec["seconds"].values()))
+        # a fragment run leaves only its own elements in the tree; restore the full page
+        if fid:
+            at.run()
+
+    def row(label, wall, inner):
+        return {
+            "scenario": label,
+            "runs": len(wall),
+            "wall_p50_ms": round(_pct(wall, 0.5) * 1000, 2),
+            "wall_p95_ms": round(_pct(wall, 0.95) * 1000, 2),
+            "app_p50_ms": round(_pct(inner, 0.5) * 1000, 2) if inner else None,
+        }
+
+    results = []
+    for label, step, frag in scenarios:
+        ok, fid = usable(label, step, frag)
+        if not ok:
+            continue
+        wall, inner = [], []
+        for i in range(runs):
+            run_once(label, step, i, fid, wall, inner)
+        results.append(row(label, wall, inner))
+
+    if upload:
+        data = "".join(
+            json.dumps({"id": i, "planets": p, "cusps": c}, ensure_ascii=False) + "\n"
+            for i, (p, c) in enumerate(synth.charts(seed, upload))
+        ).encode("utf-8")
+        try:
+            at.file_uploader(key="upload_file").set_value(("upload.jsonl", data, "application/json")).run()
+            at.button(key="upload_start").click()
+        except KeyError:
+            print(f"upload skipped (no upload widgets in {os.path.basename(app)})")
+        else:
+            at.run()
+            busy = [(f"{label} +upload", step, frag) for label, step, frag in scenarios[:2]]
+            busy.append(("upload panel poll", lambda i: None, "upload_panel"))
+            busy = [(label, step, fid, [], [])
+                    for label, step, frag in busy
+                    for ok, fid in [usable(label, step, frag)] if ok]
+            for i in range(runs):
+                # round-robin, so every scenario is measured while the job runs
+                for label, step, fid, wall, inner in busy:
+                    run_once(label, step, i, fid, wall, inner)
+                if not any(STATUS_TR["running"] in e.label for e in at.expander):
+                    break
+            results += [row(label, wall, inner) for label, _, _, wall, inner in busy if wall]
+    os.remove(timings_file)
+    return results
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="AppTest rerun latency per UI interaction.")
+    p.add_argument("--app", default=APP)
+    p.add_argument("--runs", type=int, default=30)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--upload", type=int, default=0, help="also measure while scoring an upload of this many charts")
+    p.add_argument("--out", help="write results JSON here")
+    args = p.parse_args(argv)
+
+    results = bench(os.path.abspath(args.app), args.runs, args.seed, args.upload)
+    print(f"{'scenario':<30}{'wall p50':>10}{'wall p95':>10}{'app p50':>10}   (ms)")
+    for r in results:
+        app_ms = f"{r['app_p50_ms']:>10.2f}" if r["app_p50_ms"] is not None else f"{'-':>10}"
+        print(f"{r['scenario']:<30}{r['wall_p50_ms']:>10.2f}{r['wall_p95_ms']:>10.2f}{app_ms}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"app": args.app, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
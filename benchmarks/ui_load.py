@@ -0,0 +1,220 @@
+"""
+Concurrent-session load harness for the Streamlit app, driven headless with AppTest.
+
+    python -m benchmarks.ui_load --sessions 1,2,4,8 --interactions 20
+    python -m benchmarks.ui_load --sessions 4,16 --think-ms 500 --out load.json
+
+All sessions run in this process, one thread each, sharing the st.cache_resource
+caches the way sessions on one server do, each with its own session state.
+Every session pastes its own seeded chart, then loops over the interactions a
+consultant makes:
+
+    derived_n   change "Türetilmiş kaçıncı ev? (n)"        (full rerun)
+    root_house  change "Kök ev numarası"                  (full rerun)
+    cusp        change one cusp sign                      (derivation fragment rerun)
+
+Per session count the report gives p50/p95/p99 rerun latency (overall and per
+interaction), interactions/sec and the process RSS, i.e. the server memory.
+There is no websocket or browser in the loop, so absolute latencies are lower
+than a user sees; the trend with session count is the signal.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from unittest.mock import MagicMock
+
+from streamlit.runtime import Runtime
+from streamlit.testing.v1 import AppTest, app_test as _app_test, local_script_runner as _local_runner
+from streamlit.testing.v1.util import patch_config_options
+
+from benchmarks import synth
+from benchmarks.ui import APP, fragment_id, run_fragment
+
+INTERACTIONS = ("derived_n", "root_house", "cusp")
+
+@contextlib.contextmanager
+def shared_server(app: str):
+    """
+    Make AppTest runs safe to overlap across threads, as sessions on one server.
+
+    For each run AppTest installs a mock Runtime, patches config.get_option
+    and compiles the script into a fresh ScriptCache, and undoes the first two
+    on exit, under the feet of runs in other threads (ast.parse is not
+    thread-safe on 3.11 either). Install one runtime, config override and
+    script cache for all sessions instead, as the server's Runtime has, and
+    point AppTest's per-run versions at them.
+    """
+    mod, runner = _app_test, _local_runner
+    saved = mod.Runtime, mod.patch_config_options, mod.ScriptCache, runner.ScriptCache, Runtime._instance
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = mod.MediaFileManager(mod.MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = mod.DataframeSourceManager()
+    runtime.cache_storage_manager = mod.MemoryCacheStorageManager()
+    runtime.bidi_component_registry = mod.BidiComponentManager()
+    runtime.bidi_component_registry.discover_and_register_components(start_file_watching=False)
+    script_cache = mod.ScriptCache()
+    script_cache.get_bytecode(app)  # compiled once, before any session thread starts
+    Runtime._instance = runtime
+    # AppTest sets and clears _instance on this subclass, leaving the shared one alone
+    mod.Runtime = type("Runtime", (Runtime,), {})
+    mod.patch_config_options = lambda overrides: contextlib.nullcontext()
+    mod.ScriptCache = runner.ScriptCache = lambda: script_cache
+    try:
+        with patch_config_options({"global.appTest": True}):
+            yield
+    finally:
+        mod.Runtime, mod.patch_config_options, mod.ScriptCache, runner.ScriptCache, Runtime._instance = saved
+
+def rss_mib() -> float:
+    """Current resident set size of this process (peak RSS where /proc is missing)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+def _widget(seq, label: str):
+    for w in seq:
+        if w.label == label:
+            return w
+    raise KeyError(label)
+
+def _pct(xs: list, q: float):
+    if not xs:
+        return None
+    xs = sorted(xs)
+    return round(xs[min(len(xs) - 1, int(q * len(xs)))] * 1000, 2)
+
+class Session:
+    """One simulated consultant: its own AppTest, chart and RNG."""
+
+    def __init__(self, app: str, seed: str, timeout: float):
+        self.rng = random.Random(seed)
+        self.at = AppTest.from_file(app, default_timeout=timeout)
+        self.records = []  # (interaction, seconds, rss MiB)
+        self.error = None
+
+    def _timed(self, kind: str, fid: str | None = None):
+        t0 = time.perf_counter()
+        run_fragment(self.at, fid) if fid else self.at.run()
+        elapsed = time.perf_counter() - t0
+        if self.at.exception:
+            raise RuntimeError(f"{kind}: {self.at.exception[0].value}")
+        self.records.append((kind, elapsed, rss_mib()))
+
+    def paste(self):
+        at = self.at
+        at.run()
+        at.text_area[0].input(synth.planets_text(self.rng, noise=False))
+        at.text_area[1].input(synth.cusps_text(self.rng))
+        _widget(at.selectbox, "Kök ev seçimi").set_value("Ev numarası seç")
+        self._timed("paste")
+        self.fid = fragment_id(at, "derivation_section")
+
+    def step(self):
+        at, rng = self.at, self.rng
+        kind = rng.choice(INTERACTIONS)
+        if kind == "derived_n":
+            _widget(at.number_input, "Türetilmiş kaçıncı ev? (n)").set_value(rng.randint(1, 12))
+            self._timed(kind)
+        elif kind == "root_house":
+            _widget(at.number_input, "Kök ev numarası").set_value(rng.randint(1, 12))
+            self._timed(kind)
+        else:
+            box = at.selectbox(key=f"cusp_{rng.randint(1, 12)}")
+            box.set_value(rng.choice([s for s in box.options if s != box.value]))
+            self._timed(kind, self.fid)
+            # a fragment run leaves only its own elements in the tree; restore the page untimed
+            at.run()
+
+    def run(self, interactions: int, think: float, start: threading.Barrier):
+        try:
+            self.paste()
+            start.wait()
+            for _ in range(interactions):
+                if think:
+                    time.sleep(self.rng.expovariate(1 / think))
+                self.step()
+        except Exception as e:  # reported per level, the other sessions keep going
+            self.error = f"{type(e).__name__}: {e}"
+            start.abort()
+
+def run_level(app: str, n: int, interactions: int, think: float, seed: int, timeout: float) -> dict:
+    sessions = [Session(app, f"{seed}:{n}:{i}", timeout) for i in range(n)]
+    start = threading.Barrier(n + 1)
+    threads = [threading.Thread(target=s.run, args=(interactions, think, start), daemon=True) for s in sessions]
+    rss0 = rss_mib()
+    for t in threads:
+        t.start()
+    try:
+        start.wait()  # every session has pasted its chart
+    except threading.BrokenBarrierError:
+        pass
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    recs = [r for s in sessions for r in s.records if r[0] != "paste"]
+    lat = [r[1] for r in recs]
+    row = {
+        "sessions": n,
+        "interactions": len(recs),
+        "per_sec": round(len(recs) / elapsed, 2) if elapsed > 0 else None,
+        "p50_ms": _pct(lat, 0.5),
+        "p95_ms": _pct(lat, 0.95),
+        "p99_ms": _pct(lat, 0.99),
+        "by_interaction": {
+            kind: {"p50_ms": _pct(xs, 0.5), "p95_ms": _pct(xs, 0.95), "p99_ms": _pct(xs, 0.99)}
+            for kind in ("paste",) + INTERACTIONS
+            if (xs := [r[1] for s in sessions for r in s.records if r[0] == kind])
+        },
+        "rss_start_mib": round(rss0, 1),
+        "rss_peak_mib": round(max([r[2] for s in sessions for r in s.records], default=rss0), 1),
+        "errors": [s.error for s in sessions if s.error],
+    }
+    return row
+
+def print_report(rows: list):
+    print(f"{'sessions':>8}{'inter.':>8}{'/sec':>8}{'p50':>9}{'p95':>9}{'p99':>9}"
+          f"{'cusp p95':>10}{'RSS MiB':>9}   (ms)")
+    for r in rows:
+        cusp = r["by_interaction"].get("cusp", {}).get("p95_ms")
+        print(f"{r['sessions']:>8}{r['interactions']:>8}{r['per_sec'] or 0:>8.1f}"
+              f"{r['p50_ms'] or 0:>9.1f}{r['p95_ms'] or 0:>9.1f}{r['p99_ms'] or 0:>9.1f}"
+              f"{cusp or 0:>10.1f}{r['rss_peak_mib']:>9.1f}"
+              + (f"   {len(r['errors'])} session error(s): {r['errors'][0]}" if r["errors"] else ""))
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Concurrent AppTest sessions against app.py.")
+    p.add_argument("--app", default=APP)
+    p.add_argument("--sessions", default="1,2,4,8", help="comma-separated session counts")
+    p.add_argument("--interactions", type=int, default=20, help="interactions per session after the paste")
+    p.add_argument("--think-ms", type=float, default=0.0, help="mean think time between interactions")
+    p.add_argument("--timeout", type=float, default=120.0, help="per-rerun AppTest timeout (s)")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--out", help="write results JSON here")
+    args = p.parse_args(argv)
+
+    app = os.path.abspath(args.app)
+    rows = []
+    with shared_server(app):
+        for n in (int(s) for s in args.sessions.split(",")):
+            rows.append(run_level(app, n, args.interactions, args.think_ms / 1000, args.seed, args.timeout))
+            print(f"{n} session(s): p95 {rows[-1]['p95_ms']} ms, RSS {rows[-1]['rss_peak_mib']} MiB", flush=True)
+    print()
+    print_report(rows)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"app": args.app, "interactions": args.interactions, "think_ms": args.think_ms,
+                       "results": rows}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
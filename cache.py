@@ -0,0 +1,111 @@
+"""
+Content-hashed LRU cache with TTL, safe to share across threads/sessions.
+
+Values are returned as stored (no copy), so callers must treat them as read-only.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from engine import (
+    DEFAULT_ASPECT_TABLE, DEFAULT_DIGNITY, AspectTable,
+    parse_planets_from_text, parse_house_cusps_from_text, parse_cusp_longitudes, compute_aspect_index,
+    derive_matrix,
+)
+
+def content_key(*parts) -> str:
+    """Stable digest for text/scalar inputs, used as the cache key."""
+    h = hashlib.blake2b(digest_size=16)
+    for p in parts:
+        h.update(str(p).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+class TTLCache:
+    """Bounded LRU; entries older than `ttl` seconds count as misses."""
+
+    def __init__(self, maxsize: int = 512, ttl: float = 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                stamp, value = item
+                if time.monotonic() - stamp <= self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key, fn, *args):
+        """Return the cached value for key, computing fn(*args) on a miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = fn(*args)
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else None,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+# =========================
+# CHART CACHE
+# =========================
+def parse_planets_cached(cache: TTLCache, text: str):
+    return cache.get_or_compute(content_key("planets", text), parse_planets_from_text, text)
+
+def parse_cusps_cached(cache: TTLCache, text: str):
+    return cache.get_or_compute(content_key("cusps", text), parse_house_cusps_from_text, text)
+
+def parse_cusp_lons_cached(cache: TTLCache, text: str):
+    return cache.get_or_compute(content_key("cusp_lons", text), parse_cusp_longitudes, text)
+
+def aspects_cached(cache: TTLCache, text: str, planets: dict, table: AspectTable | None = None):
+    """Aspects are a pure function of the planets text and the aspect table."""
+    table = table or DEFAULT_ASPECT_TABLE
+    return cache.get_or_compute(content_key("aspects", text, table.key), compute_aspect_index, planets, table)
+
+def matrix_cached(cache: TTLCache, text: str, planets: dict, aspects: list, cusp_signs: dict,
+                  ruler_system: str, allow_fallback: bool, table: AspectTable | None = None,
+                  use_patterns: bool = False, dignity: str = DEFAULT_DIGNITY):
+    """`table` must be the one `aspects` were computed with; it is only part of the key."""
+    # houses can come from the cusp degrees rather than the text, so they are keyed too
+    houses = [(p, pos.get("house")) for p, pos in planets.items()]
+    key = content_key("matrix", text, houses, sorted(cusp_signs.items()), ruler_system, allow_fallback,
+                      (table or DEFAULT_ASPECT_TABLE).key, use_patterns, dignity)
+    return cache.get_or_compute(key, derive_matrix, planets, aspects, cusp_signs, ruler_system, allow_fallback,
+                                use_patterns, dignity)
@@ -0,0 +1,170 @@
+"""
+Compact chart representation for keeping many parsed charts resident.
+
+A CompactChart packs the planets dict into two bytes objects (body id, sign id
+and house per body; float32 longitudes) plus an int retrograde bitmask.
+to_planets() rebuilds the usual {"sign","deg","house","lon","retro"} dict, so
+the scoring and comment functions in engine.py keep working unchanged.
+
+Longitudes round-trip through float32 (~1e-5° error), so orbs recomputed from
+a compact chart can differ from the text parse in the last rounded digit.
+
+    python compact.py        # prints per-chart memory, dict vs compact
+"""
+import struct
+import sys
+from array import array
+
+from engine import PLANET_ALIASES, SIGNS
+
+# Stable body ids: canonical Turkish names in PLANET_ALIASES order.
+BODIES = list(dict.fromkeys(PLANET_ALIASES.values()))
+BODY_TO_ID = {b: i for i, b in enumerate(BODIES)}
+
+class CompactChart:
+    """
+    meta:  3 bytes per body in chart order (body id, sign id, house; house 0 = unknown)
+    lons:  float32 longitudes, same order
+    retro: bit i set if body i (chart order) is retrograde
+    extra: names for bodies outside BODIES (ids len(BODIES)+k), usually None
+    """
+
+    __slots__ = ("meta", "lons", "retro", "extra")
+
+    def __init__(self, meta: bytes, lons: bytes, retro: int = 0, extra: tuple | None = None):
+        self.meta = meta
+        self.lons = lons
+        self.retro = retro
+        self.extra = extra
+
+    @classmethod
+    def from_planets(cls, planets: dict) -> "CompactChart":
+        meta = bytearray()
+        lons = array("f")
+        retro = 0
+        extra = []
+        for k, (name, pos) in enumerate(planets.items()):
+            bid = BODY_TO_ID.get(name)
+            if bid is None:
+                bid = len(BODIES) + len(extra)
+                extra.append(name)
+            meta += bytes((bid, SIGNS.index(pos["sign"]), pos.get("house") or 0))
+            lons.append(pos["lon"])
+            if pos.get("retro"):
+                retro |= 1 << k
+        return cls(bytes(meta), lons.tobytes(), retro, tuple(extra) or None)
+
+    def __len__(self):
+        return len(self.meta) // 3
+
+    def body_name(self, bid: int) -> str:
+        return BODIES[bid] if bid < len(BODIES) else self.extra[bid - len(BODIES)]
+
+    def to_planets(self) -> dict:
+        lons = array("f")
+        lons.frombytes(self.lons)
+        planets = {}
+        m = self.meta
+        for k in range(len(lons)):
+            bid, sid, house = m[3 * k], m[3 * k + 1], m[3 * k + 2]
+            lon = float(lons[k])
+            planets[self.body_name(bid)] = {
+                "sign": SIGNS[sid],
+                "deg": max(0.0, lon - sid * 30.0),
+                "house": house or None,
+                "lon": lon,
+                "retro": bool(self.retro >> k & 1),
+            }
+        return planets
+
+    def __getstate__(self):
+        return (self.meta, self.lons, self.retro, self.extra)
+
+    def __setstate__(self, state):
+        self.meta, self.lons, self.retro, self.extra = state
+
+    def __eq__(self, other):
+        return isinstance(other, CompactChart) and self.__getstate__() == other.__getstate__()
+
+    def __repr__(self):
+        return f"CompactChart({len(self)} bodies)"
+
+# Aspects as one fixed-width record per aspect: body ids, type index, orb*100.
+_ASPECT_REC = struct.Struct("<BBBH")
+
+def pack_aspects(aspects: list, chart: CompactChart, aspect_names: list) -> bytes:
+    """Pack {"p1","p2","type","orb"} records into bytes (orb kept to 0.01)."""
+    ids = {chart.body_name(chart.meta[3 * k]): chart.meta[3 * k] for k in range(len(chart))}
+    type_idx = {n: i for i, n in enumerate(aspect_names)}
+    return b"".join(
+        _ASPECT_REC.pack(ids[a["p1"]], ids[a["p2"]], type_idx[a["type"]], int(round(a["orb"] * 100)))
+        for a in aspects
+    )
+
+def unpack_aspects(blob: bytes, chart: CompactChart, aspect_names: list) -> list:
+    return [
+        {"p1": chart.body_name(b1), "p2": chart.body_name(b2), "type": aspect_names[t], "orb": o / 100}
+        for b1, b2, t, o in _ASPECT_REC.iter_unpack(blob)
+    ]
+
+# =========================
+# MEMORY
+# =========================
+def deep_sizeof(obj, seen=None) -> int:
+    """
+    Bytes owned by obj, following dicts/lists/tuples/slots. Objects reachable
+    from more than one chart (interned names, small ints, True/False) are not
+    chart-owned and are skipped.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or isinstance(obj, (str, bool)) or obj is None:
+        return 0
+    if isinstance(obj, int) and -5 <= obj <= 256:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_sizeof(x, seen) for x in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_sizeof(getattr(obj, s), seen) for s in obj.__slots__)
+    return size
+
+def memory_report(planets: dict, aspects: list | None = None, aspect_names: list | None = None) -> dict:
+    """Per-chart bytes for the dict form vs the compact form."""
+    chart = CompactChart.from_planets(planets)
+    out = {"bodies": len(planets), "dict_bytes": deep_sizeof(planets), "compact_bytes": deep_sizeof(chart)}
+    if aspects is not None:
+        out["aspects"] = len(aspects)
+        out["aspects_dict_bytes"] = deep_sizeof(list(aspects))
+        out["aspects_compact_bytes"] = sys.getsizeof(pack_aspects(aspects, chart, aspect_names))
+    return out
+
+if __name__ == "__main__":
+    from engine import ASPECTS_DEF, parse_planets_from_text, compute_aspects
+
+    sample = "\n".join([
+        "Sun: Sagittarius 4°26’10’’  end of 7  Direct",
+        "Moon: Leo 0°53’40’’  4  Direct",
+        "Mercury: Scorpio 20°11’02’’  6  Direct",
+        "Venus: Capricorn 15°40’12’’  8  Direct",
+        "Mars: Capricorn 3°23’09’’  8  Direct",
+        "Jupiter: Aries 28°02’17’’  11  Retrograde",
+        "Saturn: Capricorn 12°34’56’’  8  Direct",
+        "Uranus: Capricorn 4°10’05’’  8  Direct",
+        "Neptune: Capricorn 11°22’33’’  8  Direct",
+        "Pluto: Scorpio 16°44’01’’  6  Direct",
+        "Node: Aquarius 8°12’00’’  9  R",
+        "Lilith (M): Libra 2°02’02’’  5  Direct",
+        "Chiron: Cancer 6°06’06’’  3  R",
+    ])
+    planets, _, _ = parse_planets_from_text(sample)
+    aspects = compute_aspects(planets)
+    r = memory_report(planets, aspects, [name for name, _, _ in ASPECTS_DEF])
+    print(f"bodies={r['bodies']} aspects={r['aspects']}")
+    print(f"planets: dict {r['dict_bytes']} B  vs compact {r['compact_bytes']} B "
+          f"({r['dict_bytes'] / r['compact_bytes']:.1f}x)")
+    print(f"aspects: dict {r['aspects_dict_bytes']} B  vs packed {r['aspects_compact_bytes']} B "
+          f"({r['aspects_dict_bytes'] / r['aspects_compact_bytes']:.1f}x)")
@@ -0,0 +1,52 @@
+"""
+Small incremental computation graph for Streamlit reruns.
+
+Each node is identified by name and recomputed only when its fingerprint
+changes. The fingerprint is made of the versions of the upstream nodes plus a
+hash of its plain parameters. Keep one Dag per session (st.session_state) and
+call begin_run() at the top of every rerun.
+
+    dag.node("planets", parse, params=(planets_text,))
+    dag.node("aspects", compute_aspects, deps=("planets",))
+    dag.status  # {"planets": "reused", "aspects": "reused"}
+"""
+from cache import content_key
+
+class Dag:
+    def __init__(self):
+        self._nodes = {}  # name -> {"fp", "value", "version"}
+        self.status = {}
+
+    def begin_run(self):
+        self.status = {}
+
+    def node(self, name: str, fn, deps: tuple = (), params: tuple = ()):
+        """
+        Value of `name` = fn(*dep_values, *params), reusing the previous value if
+        no dependency version and no parameter changed since it was computed.
+        """
+        fp = (tuple(self._nodes[d]["version"] for d in deps), content_key(*(repr(p) for p in params)))
+        state = self._nodes.get(name)
+        if state is not None and state["fp"] == fp:
+            self.status[name] = "reused"
+            return state["value"]
+
+        value = fn(*(self._nodes[d]["value"] for d in deps), *params)
+        version = state["version"] + 1 if state is not None else 1
+        self._nodes[name] = {"fp": fp, "value": value, "version": version}
+        self.status[name] = "recomputed"
+        return value
+
+    def value(self, name: str):
+        return self._nodes[name]["value"]
+
+    def invalidate(self, name: str | None = None):
+        """Drop one node (or all) so it recomputes on next use."""
+        if name is None:
+            self._nodes.clear()
+        else:
+            self._nodes.pop(name, None)
+
+    def status_rows(self) -> list[dict]:
+        return [{"düğüm": k, "durum": "♻️ yeniden kullanıldı" if v == "reused" else "🔄 hesaplandı"}
+                for k, v in self.status.items()]
@@ -0,0 +1,1242 @@
+"""
+Streamlit-free chart engine for Ev Türetme.
+
+Plain pipeline: parse → aspects → derived house → score → comment.
+Importing this module must stay cheap (stdlib only) so worker processes,
+batch jobs and tests can use it without starting Streamlit.
+"""
+import bisect
+import functools
+import json
+import os
+import re
+import unicodedata
+
+# =========================
+# CONSTANTS
+# =========================
+SIGNS = ["Koç", "Boğa", "İkizler", "Yengeç", "Aslan", "Başak", "Terazi", "Akrep", "Yay", "Oğlak", "Kova", "Balık"]
+SIGN_TO_IDX = {s: i for i, s in enumerate(SIGNS)}
+IDX_TO_SIGN = {i: s for i, s in enumerate(SIGNS)}
+
+SIGN_ALIASES = {
+    # EN
+    "Aries": "Koç", "Taurus": "Boğa", "Gemini": "İkizler", "Cancer": "Yengeç",
+    "Leo": "Aslan", "Virgo": "Başak", "Libra": "Terazi", "Scorpio": "Akrep",
+    "Sagittarius": "Yay", "Capricorn": "Oğlak", "Aquarius": "Kova", "Pisces": "Balık",
+    # TR variants
+    "Koç": "Koç", "Koc": "Koç",
+    "Boğa": "Boğa", "Boga": "Boğa",
+    "İkizler": "İkizler", "Ikizler": "İkizler",
+    "Yengeç": "Yengeç", "Yengec": "Yengeç",
+    "Aslan": "Aslan",
+    "Başak": "Başak", "Basak": "Başak",
+    "Terazi": "Terazi",
+    "Akrep": "Akrep",
+    "Yay": "Yay",
+    "Oğlak": "Oğlak", "Oglak": "Oğlak",
+    "Kova": "Kova",
+    "Balık": "Balık", "Balik": "Balık",
+    # Symbols
+    "♈": "Koç", "♉": "Boğa", "♊": "İkizler", "♋": "Yengeç",
+    "♌": "Aslan", "♍": "Başak", "♎": "Terazi", "♏": "Akrep",
+    "♐": "Yay", "♑": "Oğlak", "♒": "Kova", "♓": "Balık",
+}
+
+# Sign "micro meaning" for overlay, short & readable
+SIGN_MICRO = {
+    "Koç": ("hız, cesaret, başlangıç", "Hızlı karar, ilk adımı atma, liderlik dürtüsü."),
+    "Boğa": ("güven, istikrar, somutluk", "Yavaş ama kalıcı ilerleme; kaynakları sağlamlaştırma."),
+    "İkizler": ("iletişim, seçenek, hareket", "Bilgi akışı, bağlantı kurma, çoklu planlar."),
+    "Yengeç": ("aidiyet, koruma, duygu", "Güvenli alan ihtiyacı; duygusal bağ üzerinden ilerler."),
+    "Aslan": ("görünürlük, gurur, yaratıcılık", "Sahne/ifade; takdir ve kalpten motivasyon."),
+    "Başak": ("detay, düzen, verim", "Plan–program, iyileştirme; küçük adımlarla büyütme."),
+    "Terazi": ("denge, ortaklık, uyum", "İşbirliği, adalet; karşılıklı kazanım arar."),
+    "Akrep": ("yoğunluk, dönüşüm, kontrol", "Derinleşme; kriz/bağlılık temasıyla güçlenme."),
+    "Yay": ("vizyon, büyüme, ufuk", "Uzaklar/eğitim/fırsat; risk–ödül dengesi önemli."),
+    "Oğlak": ("hedef, disiplin, yapı", "Uzun vadeli plan; sorumlulukla somut sonuç."),
+    "Kova": ("özgürlük, yenilik, farklılık", "Kalabalıklar/projeler; sıra dışı çözüm üretir."),
+    "Balık": ("sezgi, akış, anlam", "Bırakma–kabullenme; yaratıcı/ruhsal kanal."),
+}
+
+# Planets -> Turkish keys
+PLANET_ALIASES = {
+    "Sun": "Güneş", "Moon": "Ay", "Mercury": "Merkür", "Venus": "Venüs", "Mars": "Mars",
+    "Jupiter": "Jüpiter", "Saturn": "Satürn", "Uranus": "Uranüs", "Neptune": "Neptün", "Pluto": "Plüton",
+    "Node": "KuzeyAyDüğümü", "Lilith": "Lilith", "Chiron": "Chiron", "Fortune": "Fortuna", "Vertex": "Vertex",
+    # passthrough
+    "Güneş": "Güneş", "Ay": "Ay", "Merkür": "Merkür", "Venüs": "Venüs", "Mars": "Mars",
+    "Jüpiter": "Jüpiter", "Satürn": "Satürn", "Uranüs": "Uranüs", "Neptün": "Neptün", "Plüton": "Plüton",
+    "KuzeyAyDüğümü": "KuzeyAyDüğümü", "Fortuna": "Fortuna",
+}
+
+RULERS_MODERN = {
+    "Koç": "Mars", "Boğa": "Venüs", "İkizler": "Merkür", "Yengeç": "Ay",
+    "Aslan": "Güneş", "Başak": "Merkür", "Terazi": "Venüs", "Akrep": "Plüton",
+    "Yay": "Jüpiter", "Oğlak": "Satürn", "Kova": "Uranüs", "Balık": "Neptün",
+}
+RULERS_TRAD = {
+    "Koç": "Mars", "Boğa": "Venüs", "İkizler": "Merkür", "Yengeç": "Ay",
+    "Aslan": "Güneş", "Başak": "Merkür", "Terazi": "Venüs", "Akrep": "Mars",
+    "Yay": "Jüpiter", "Oğlak": "Satürn", "Kova": "Satürn", "Balık": "Jüpiter",
+}
+
+HOUSE_MEANINGS = {
+    1: "Benlik, beden, yaklaşım",
+    2: "Para, gelir, özdeğer",
+    3: "İletişim, yakın çevre, kardeşler",
+    4: "Ev, aile, kökler",
+    5: "Aşk, çocuklar, yaratıcılık",
+    6: "İş rutinleri, sağlık, hizmet",
+    7: "Eş/ortak, ilişkiler",
+    8: "Paylaşımlar, kriz/dönüşüm, miras",
+    9: "Uzaklar, eğitim, inançlar, hukuk",
+    10: "Kariyer, statü, hedefler",
+    11: "Sosyal çevre, projeler, umutlar",
+    12: "Bilinçdışı, kapanışlar, izolasyon",
+}
+
+TOPIC_TO_ROOT = {
+    "Ben / Kimlik": 1,
+    "Para / Gelir": 2,
+    "Kardeşler / İletişim": 3,
+    "Ev / Aile": 4,
+    "Aşk / Çocuk": 5,
+    "İş Rutini / Sağlık": 6,
+    "Eş / Ortaklık": 7,
+    "Kriz / Paylaşımlar": 8,
+    "Uzaklar / Eğitim": 9,
+    "Kariyer": 10,
+    "Arkadaşlar / Projeler": 11,
+    "Bilinçdışı / Kapanış": 12,
+}
+
+OPPOSITE = {
+    "Koç": "Terazi", "Boğa": "Akrep", "İkizler": "Yay", "Yengeç": "Oğlak",
+    "Aslan": "Kova", "Başak": "Balık", "Terazi": "Koç", "Akrep": "Boğa",
+    "Yay": "İkizler", "Oğlak": "Yengeç", "Kova": "Aslan", "Balık": "Başak"
+}
+
+# =========================
+# HELPERS
+# =========================
+def clamp(x, lo=0, hi=100):
+    return max(lo, min(hi, x))
+
+def derived_house(root_house: int, n: int) -> int:
+    return ((root_house - 1) + (n - 1)) % 12 + 1
+
+def overlay_sign(root_sign: str, n: int) -> str:
+    idx = SIGN_TO_IDX[root_sign]
+    return IDX_TO_SIGN[(idx + (n - 1)) % 12]
+
+# =========================
+# ALIAS INDEX
+# =========================
+# Sign/planet tokens resolve through one dict keyed by a folded form:
+# Turkish dotless/dotted i mapped, casefolded, accents stripped. Extra
+# languages come from aliases.json next to this file (or load_aliases()).
+ALIASES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "aliases.json")
+_TR_FOLD = str.maketrans({"ı": "i", "İ": "i", "I": "i"})
+_EN_PLANETS = ["Sun","Moon","Mercury","Venus","Mars","Jupiter","Saturn","Uranus","Neptune","Pluto","Chiron","Fortune","Vertex","Node","Lilith"]
+_NON_LETTER_RE = re.compile(r"[^A-Za-zÀ-ÖØ-öø-ɏ]")
+
+def fold_token(token: str) -> str:
+    """Case- and accent-insensitive lookup key ("İkizler", "ikizler", "IKIZLER" → "ikizler")."""
+    s = unicodedata.normalize("NFKD", token.translate(_TR_FOLD).casefold())
+    return "".join(c for c in s if not unicodedata.combining(c))
+
+SIGN_INDEX = {}
+PLANET_INDEX = {}
+
+def _add_aliases(index: dict, aliases: dict, canonical: set, source: str):
+    for alias, target in aliases.items():
+        if target not in canonical:
+            raise ValueError(f"{source}: unknown canonical name {target!r} for alias {alias!r}")
+        key = fold_token(alias)
+        if index.get(key, target) != target:
+            raise ValueError(f"{source}: alias {alias!r} maps to both {index[key]!r} and {target!r}")
+        index[key] = target
+
+def load_aliases(path: str):
+    """Merge a {"signs": {lang: {...}}, "planets": {lang: {...}}} JSON file into the index."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    planet_names = set(PLANET_ALIASES.values())
+    for lang, aliases in data.get("signs", {}).items():
+        _add_aliases(SIGN_INDEX, aliases, SIGN_TO_IDX.keys(), f"{path} [signs.{lang}]")
+    for lang, aliases in data.get("planets", {}).items():
+        _add_aliases(PLANET_INDEX, aliases, planet_names, f"{path} [planets.{lang}]")
+    normalize_sign.cache_clear()
+    normalize_planet.cache_clear()
+
+@functools.lru_cache(maxsize=4096)
+def normalize_sign(token: str):
+    return SIGN_INDEX.get(fold_token(token.strip()))
+
+@functools.lru_cache(maxsize=4096)
+def normalize_planet(raw: str) -> str:
+    raw = raw.strip().strip(":").replace("\t", " ").strip()
+    raw_nospace = raw.replace(" ", "")
+    key_nospace = fold_token(raw_nospace)
+
+    # Node / Lilith (M) variants
+    if key_nospace.startswith("node"):
+        return PLANET_ALIASES.get("Node", "KuzeyAyDüğümü")
+    if key_nospace.startswith("lilith"):
+        return PLANET_ALIASES.get("Lilith", "Lilith")
+
+    raw_clean = _NON_LETTER_RE.sub("", raw)
+    hit = PLANET_INDEX.get(fold_token(raw_clean))
+    if hit:
+        return hit
+
+    for en in _EN_PLANETS:
+        if en.lower() in key_nospace:
+            return PLANET_ALIASES.get(en, en)
+
+    return raw_clean or raw
+
+_add_aliases(SIGN_INDEX, SIGN_ALIASES, SIGN_TO_IDX.keys(), "SIGN_ALIASES")
+_add_aliases(PLANET_INDEX, PLANET_ALIASES, set(PLANET_ALIASES.values()), "PLANET_ALIASES")
+if os.path.exists(ALIASES_PATH):
+    load_aliases(ALIASES_PATH)
+
+def get_ruler(sign: str, system: str) -> str:
+    return (RULERS_MODERN if system == "Modern" else RULERS_TRAD)[sign]
+
+# =========================
+# PARSERS (Astro-Seek)
+# =========================
+# Letters are ASCII plus Latin-1 and Latin Extended-A/B (À-ɏ without × and ÷),
+# so Turkish and the accented aliases.json spellings (Bélier, Júpiter) match;
+# same set as _NON_LETTER_RE.
+# Spaced format:
+# Sun: Sagittarius 4°26’10’’  end of 7  Direct
+# NOTE: \D+ for unicode quotes
+PLANET_LINE_RE = re.compile(
+    r"""^\s*
+    (?P<planet>[A-Za-zÀ-ÖØ-öø-ɏ]+(?:\s*\(M\))?)(?:\s*:\s*|\s+)   # a colon or space, so one word is not split
+    (?P<sign>[A-Za-zÀ-ÖØ-öø-ɏ♈♉♊♋♌♍♎♏♐♑♒♓]+)\s+
+    (?P<deg>\d{1,2})\s*°\s*
+    (?P<min>\d{1,2})\D+
+    (?:(?P<sec>\d{1,2})\D+)?      # seconds optional, any non-digit separators
+    (?:(?:end\s+of\s+)?(?P<house>\d{1,2}))\s*
+    (?P<motion>Direct|Retrograde|R)?\s*$
+    """,
+    re.IGNORECASE | re.VERBOSE
+)
+
+# Compact format:
+# UranusScorpio26°23’7
+PLANET_COMPACT_RE = re.compile(
+    r"""^\s*
+    (?P<planet>[A-Za-zÀ-ÖØ-öø-ɏ]+)
+    (?P<sign>[A-Za-zÀ-ÖØ-öø-ɏ♈♉♊♋♌♍♎♏♐♑♒♓]+)
+    (?P<deg>\d{1,2})\s*°\s*
+    (?P<min>\d{1,2})\D+
+    (?P<house>\d{1,2})
+    \s*$""",
+    re.VERBOSE | re.IGNORECASE
+)
+
+# Spaced format without the house column (houses then come from cusp degrees):
+# Sun: Sagittarius 4°26’10’’  Direct
+PLANET_NO_HOUSE_RE = re.compile(
+    r"""^\s*
+    (?P<planet>[A-Za-zÀ-ÖØ-öø-ɏ]+(?:\s*\(M\))?)(?:\s*:\s*|\s+)
+    (?P<sign>[A-Za-zÀ-ÖØ-öø-ɏ♈♉♊♋♌♍♎♏♐♑♒♓]+)\s+
+    (?P<deg>\d{1,2})\s*°\s*
+    (?P<min>\d{1,2})                      # then only minute/second marks and spaces,
+    (?:\s*['’′]{1,2}(?:\s*(?P<sec>\d{1,2})\s*(?:['’′]{1,2}|[″"]))?)?\s*   # seconds after a minute mark
+    (?P<motion>Direct|Retrograde|R)?\s*$
+    """,
+    re.IGNORECASE | re.VERBOSE
+)
+
+# Lunar phase lines are skipped. The words use explicit ASCII case classes so
+# the match is the same as the old `w in line.lower()` test (re.IGNORECASE
+# would also fold e.g. "ſ" to "s").
+PHASE_WORDS = ["disseminating", "balsamic", "gibbous", "crescent", "phase"]
+
+def _ascii_nocase(word: str) -> str:
+    return "".join(f"[{c}{c.upper()}]" for c in word)
+
+def _prefixed_groups(pattern: str, prefix: str) -> str:
+    return pattern.replace("(?P<", f"(?P<{prefix}")
+
+# One matcher per line: phase → spaced → compact → spaced without house, tried
+# in that order, same as running the checks one after another. The house-less
+# form goes last so a number after the minutes is still read as the house.
+PLANET_ANY_RE = re.compile(
+    r"(?P<phase>(?-i:(?=.*?(?:" + "|".join(_ascii_nocase(w) for w in PHASE_WORDS) + r"))))"
+    + "|(?:" + _prefixed_groups(PLANET_LINE_RE.pattern, "s_") + ")"
+    + "|(?:" + _prefixed_groups(PLANET_COMPACT_RE.pattern, "c_") + ")"
+    + "|(?:" + _prefixed_groups(PLANET_NO_HOUSE_RE.pattern, "n_") + ")",
+    re.IGNORECASE | re.VERBOSE
+)
+
+def _planet_from_match(m: re.Match):
+    """(planet, pos) from a PLANET_ANY_RE match, or None if the sign is unknown or the house is not 1-12."""
+    g = m.groupdict()
+    pre = "s_" if g["s_planet"] is not None else ("c_" if g["c_planet"] is not None else "n_")
+
+    planet = normalize_planet(g[pre + "planet"])
+    sign = normalize_sign(g[pre + "sign"])
+    if sign not in SIGN_TO_IDX:
+        return None
+
+    deg = int(g[pre + "deg"])
+    minute = int(g[pre + "min"])
+    sec = int(g[pre + "sec"]) if pre != "c_" and g[pre + "sec"] else 0
+    house = int(g[pre + "house"]) if pre != "n_" else None
+    if house is not None and not 1 <= house <= 12:
+        return None
+
+    motion = ((g[pre + "motion"] if pre != "c_" else None) or "").strip().lower()
+    retro = motion in ["retrograde", "r"]
+
+    deg_float = deg + minute / 60.0 + sec / 3600.0
+    lon = SIGN_TO_IDX[sign] * 30.0 + deg_float
+    return planet, {"sign": sign, "deg": deg_float, "house": house, "lon": lon, "retro": retro}
+
+def iter_planet_lines(lines):
+    """
+    Lazily classify Astro-Seek planet lines in a single regex pass per line.
+
+    lines: a str, or any iterable of str/bytes lines (open text or binary file,
+    socket reader, generator). Bytes are decoded as UTF-8.
+    Yields ("planet", line, (name, pos)), ("error", line, None) or ("ignored", line, None).
+    """
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    match = PLANET_ANY_RE.match
+    for raw in lines:
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8", errors="replace")
+        line = raw.strip()
+        if not line:
+            continue
+
+        m = match(line)
+        if m is None or m.group("phase") is not None:
+            yield "ignored", line, None
+            continue
+
+        rec = _planet_from_match(m)
+        if rec is None:
+            yield "error", line, None
+        else:
+            yield "planet", line, rec
+
+# Astro-Seek lists the bodies in this order (Sun, Moon, ... Vertex)
+_EXPORT_RANK = {b: i for i, b in enumerate(dict.fromkeys(PLANET_ALIASES.values()))}
+
+def iter_charts(lines):
+    """
+    Split a concatenated export into charts and yield (planets, errors, ignored)
+    per chart, holding only one chart in memory. A body that repeats, or that
+    comes before the previous body in the export order, starts a new chart, so
+    a chart may skip bodies but must list the others once and in that order.
+    """
+    planets, errors, ignored = {}, [], []
+    rank = -1
+    for kind, line, rec in iter_planet_lines(lines):
+        if kind == "planet":
+            name, pos = rec
+            r = _EXPORT_RANK.get(name, rank)
+            if name in planets or r < rank:
+                yield planets, errors, ignored
+                planets, errors, ignored = {}, [], []
+            planets[name] = pos
+            rank = r
+        elif kind == "error":
+            errors.append(line)
+        else:
+            ignored.append(line)
+    if planets or errors or ignored:
+        yield planets, errors, ignored
+
+def parse_planets_from_text(text: str):
+    planets = {}
+    errors = []
+    ignored = []
+
+    for kind, line, rec in iter_planet_lines(text):
+        if kind == "planet":
+            planets[rec[0]] = rec[1]
+        elif kind == "error":
+            errors.append(line)
+        else:
+            ignored.append(line)
+
+    return planets, errors, ignored
+
+# 1: Taurus (ASC) 2°50’49’’   (degrees optional)
+CUSP_LINE_RE = re.compile(
+    r"""^\s*(?P<h>[1-9]|1[0-2])\s*:\s*(?P<sign>[A-Za-zÀ-ÖØ-öø-ɏ♈♉♊♋♌♍♎♏♐♑♒♓]+)\b
+    (?:\s*(?:\(\w+\)\s*)?
+       (?P<deg>\d{1,2})\s*°\s*(?P<min>\d{1,2})(?:\D+(?P<sec>\d{1,2}))?)?
+    """,
+    re.IGNORECASE | re.VERBOSE
+)
+
+def iter_cusp_lines(text: str):
+    """Yields (line, house, sign or None if unknown, match) for each cusp line."""
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        m = CUSP_LINE_RE.match(line)
+        if not m:
+            continue
+        sign = normalize_sign(m.group("sign"))
+        yield line, int(m.group("h")), sign if sign in SIGN_TO_IDX else None, m
+
+def parse_house_cusps_from_text(text: str):
+    cusps = {}
+    errors = []
+    for line, h, sign, _ in iter_cusp_lines(text):
+        if sign is None:
+            errors.append(line)
+            continue
+        cusps[h] = sign
+    return cusps, errors
+
+def parse_cusp_longitudes(text: str):
+    """
+    Cusp longitudes from the same block: ({house: lon}, errors).
+    Lines without degrees are skipped (they still give parse_house_cusps_from_text a sign).
+    """
+    lons = {}
+    errors = []
+    for line, h, sign, m in iter_cusp_lines(text):
+        if sign is None:
+            errors.append(line)
+            continue
+        if m.group("deg") is None:
+            continue
+        deg = int(m.group("deg")) + int(m.group("min")) / 60.0 + int(m.group("sec") or 0) / 3600.0
+        lons[h] = SIGN_TO_IDX[sign] * 30.0 + deg
+    return lons, errors
+
+# =========================
+# HOUSE ASSIGNMENT
+# =========================
+def cusp_circle(cusp_lons) -> tuple:
+    """
+    (1st cusp, 12 cusp offsets from it) for house_of(), from a dict house→lon or
+    a list in house order. Raises ValueError if a cusp is missing or the cusps
+    are not in zodiac order starting from the 1st.
+    """
+    if isinstance(cusp_lons, dict):
+        missing = [h for h in range(1, 13) if h not in cusp_lons]
+        if missing:
+            raise ValueError(f"missing cusp longitudes for houses {missing}")
+        cusp_lons = [cusp_lons[h] for h in range(1, 13)]
+    if len(cusp_lons) != 12:
+        raise ValueError("need 12 cusp longitudes")
+    first = cusp_lons[0]
+    rel = [(c - first) % 360.0 for c in cusp_lons]
+    if any(b < a for a, b in zip(rel, rel[1:])):
+        raise ValueError("cusp longitudes are not in zodiac order")
+    return first, rel
+
+def house_of(lon: float, circle: tuple) -> int | None:
+    """House (1-12) by binary search; a body exactly on a cusp is in that cusp's house. None for NaN."""
+    first, rel = circle
+    if lon != lon:
+        return None
+    # offsets wrap at the 1st cusp, so 0° Aries needs no special case
+    return bisect.bisect_right(rel, (lon - first) % 360.0)
+
+def assign_houses(planets: dict, cusp_lons, only_missing: bool = False) -> dict:
+    """
+    Copy of `planets` with houses taken from the cusp longitudes (any house
+    system). only_missing keeps the houses the text already had.
+    """
+    circle = cusp_circle(cusp_lons)
+    out = {}
+    for name, pos in planets.items():
+        if only_missing and pos.get("house"):
+            out[name] = pos
+        else:
+            out[name] = {**pos, "house": house_of(pos["lon"], circle)}
+    return out
+
+def houses_from_cusps(planets: dict, cusp_lons: dict, rehouse: bool = False) -> dict:
+    """
+    Fill missing houses (all houses with rehouse=True) from the cusp longitudes.
+    Returns `planets` itself when there is nothing to do or the cusps are
+    incomplete or out of order.
+    """
+    if len(cusp_lons) != 12 or not (rehouse or any(not p.get("house") for p in planets.values())):
+        return planets
+    try:
+        return assign_houses(planets, cusp_lons, only_missing=not rehouse)
+    except ValueError:
+        return planets
+
+# =========================
+# ASPECTS
+# =========================
+# (name, exact angle, orb); on overlapping orbs the first entry wins
+ASPECTS_DEF = [
+    ("conjunction", 0, 6),
+    ("sextile", 60, 4.5),
+    ("square", 90, 6),
+    ("trine", 120, 6),
+    ("opposition", 180, 6),
+]
+MINOR_ASPECTS_DEF = [
+    ("semisextile", 30, 2),
+    ("semisquare", 45, 2),
+    ("sesquiquadrate", 135, 2),
+    ("quincunx", 150, 3),
+]
+ASPECT_WEIGHTS = {
+    "conjunction": 10, "sextile": 8, "trine": 12, "square": -12, "opposition": -14,
+    "semisextile": 3, "semisquare": -5, "sesquiquadrate": -5, "quincunx": -6,
+}
+ASPECT_TR_LABEL = {
+    "conjunction": "kavuşum",
+    "sextile": "sekstil",
+    "square": "kare",
+    "trine": "üçgen",
+    "opposition": "karşıt",
+    "semisextile": "yarım sekstil",
+    "semisquare": "yarım kare",
+    "sesquiquadrate": "bir buçuk kare",
+    "quincunx": "quincunx",
+}
+# Orb multipliers per body; a pair uses the larger of its two bodies' factors.
+LUMINARY_ORB_FACTORS = {"Güneş": 4 / 3, "Ay": 4 / 3}
+# Orb at which an aspect's score weight reaches 0, times the pair's orb factor:
+# 6° for the majors (the scale their scores always had), a minor's own orb.
+ASPECT_WEIGHT_ORBS = {
+    **{name: 6.0 for name, _, _ in ASPECTS_DEF},
+    **{name: float(orb) for name, _, orb in MINOR_ASPECTS_DEF},
+}
+
+def aspect_nature(a_type: str) -> str:
+    if a_type in ["trine", "sextile", "semisextile"]:
+        return "destek"
+    if a_type in ["square", "opposition", "semisquare", "sesquiquadrate"]:
+        return "zorlayıcı"
+    return "karışık"
+
+def angle_diff(a, b):
+    d = abs(a - b) % 360.0
+    return min(d, 360.0 - d)
+
+class AspectTable:
+    """
+    Aspect classifier precomputed over 1° separation buckets.
+
+    Each bucket holds the (index, exact, orb) entries whose orb window touches
+    it, in definition order, so classify() checks one or two candidates
+    however many aspects are enabled, and still returns exactly what a
+    first-match scan over `aspects` would. Buckets are built lazily per orb
+    factor (one table per body-pair class).
+    """
+
+    def __init__(self, aspects=ASPECTS_DEF, orb_factors: dict | None = None):
+        self.aspects = [(name, exact, orb) for name, exact, orb in aspects]
+        self.names = [name for name, _, _ in self.aspects]
+        self.exacts = [exact for _, exact, _ in self.aspects]
+        self.weight_orbs = [ASPECT_WEIGHT_ORBS.get(name, float(orb)) for name, _, orb in self.aspects]
+        self.orb_factors = dict(orb_factors or {})
+        self.key = (tuple(self.aspects), tuple(sorted(self.orb_factors.items())))
+        self._buckets = {}
+
+    def orb_factor(self, body: str) -> float:
+        return self.orb_factors.get(body, 1.0)
+
+    def orb_limit(self, k: int, factor: float = 1.0) -> float:
+        """Weight scale of aspect k for a pair with this orb factor (see aspect_weight)."""
+        return self.weight_orbs[k] * factor
+
+    def buckets(self, factor: float = 1.0) -> list:
+        """181 candidate tuples: bucket b covers separations in [b, b+1)."""
+        table = self._buckets.get(factor)
+        if table is None:
+            table = []
+            for b in range(181):
+                table.append(tuple(
+                    (k, exact, orb * factor)
+                    for k, (_, exact, orb) in enumerate(self.aspects)
+                    if exact - orb * factor <= b + 1 and exact + orb * factor >= b
+                ))
+            self._buckets[factor] = table
+        return table
+
+    def classify(self, d: float, factor: float = 1.0):
+        """(aspect index, orb) for a separation in [0, 180], or None."""
+        if d != d:
+            return None
+        for k, exact, orbmax in self.buckets(factor)[int(d)]:
+            orb = abs(d - exact)
+            if orb <= orbmax:
+                return k, orb
+        return None
+
+DEFAULT_ASPECT_TABLE = AspectTable()
+
+@functools.lru_cache(maxsize=None)
+def aspect_table(minor: bool = False, wide_luminaries: bool = False) -> AspectTable:
+    """Shared tables for the built-in configurations (majors only by default)."""
+    if not minor and not wide_luminaries:
+        return DEFAULT_ASPECT_TABLE
+    return AspectTable(ASPECTS_DEF + (MINOR_ASPECTS_DEF if minor else []),
+                       LUMINARY_ORB_FACTORS if wide_luminaries else None)
+
+def compute_aspects(planets: dict, table: AspectTable | None = None):
+    table = table or DEFAULT_ASPECT_TABLE
+    keys = list(planets.keys())
+    lons = [planets[p]["lon"] for p in keys]
+    factors = [table.orb_factor(p) for p in keys]
+    names = table.names
+    weight_orbs = table.weight_orbs
+    # table.classify() inlined: this loop runs for every pair of every chart
+    buckets = {f: table.buckets(f) for f in set(factors)}
+    aspects = []
+    for i in range(len(keys)):
+        li, fi = lons[i], factors[i]
+        for j in range(i + 1, len(keys)):
+            d = angle_diff(li, lons[j])
+            if d != d:
+                continue
+            fj = factors[j]
+            f = fi if fi >= fj else fj
+            for k, exact, orbmax in buckets[f][int(d)]:
+                orb = abs(d - exact)
+                if orb <= orbmax:
+                    a = {"p1": keys[i], "p2": keys[j], "type": names[k], "orb": round(orb, 2)}
+                    if f != 1.0:  # a wider pair orb widens the weight scale too (see aspect_weight)
+                        a["orb_limit"] = weight_orbs[k] * f
+                    aspects.append(a)
+                    break
+    return aspects
+
+# =========================
+# PATTERNS
+# =========================
+# Multi-body configurations found in an aspect list. Bodies are numbered in
+# first-seen order and each aspect type becomes one bitmask per body
+# (bit j set = aspect to body j), so every search step is an AND of masks.
+PATTERN_TR_LABEL = {
+    "grand_trine": "Büyük üçgen",
+    "grand_cross": "Büyük haç",
+    "t_square": "T-kare",
+    "yod": "Yod",
+    "stellium": "Stelyum",
+}
+# score added to a ruler for each pattern it takes part in
+PATTERN_WEIGHTS = {"grand_trine": 6, "stellium": 3, "yod": -3, "t_square": -6, "grand_cross": -8}
+
+def _bits(mask: int):
+    """Indices of the set bits, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def aspect_graph(aspects: list):
+    """Returns (bodies, {aspect type: [adjacency bitmask per body]})."""
+    idx = {}
+    for a in aspects:
+        idx.setdefault(a["p1"], len(idx))
+        idx.setdefault(a["p2"], len(idx))
+    adj = {}
+    for a in aspects:
+        masks = adj.get(a["type"])
+        if masks is None:
+            masks = adj[a["type"]] = [0] * len(idx)
+        i, j = idx[a["p1"]], idx[a["p2"]]
+        masks[i] |= 1 << j
+        masks[j] |= 1 << i
+    return list(idx), adj
+
+def _cliques(adj: list, r: int, p: int, x: int, out: list):
+    """Bron–Kerbosch with pivot over bitmasks: maximal cliques containing r."""
+    if not p and not x:
+        out.append(r)
+        return
+    pivot = max(_bits(p | x), key=lambda u: (adj[u] & p).bit_count())
+    for v in _bits(p & ~adj[pivot]):
+        _cliques(adj, r | 1 << v, p & adj[v], x & adj[v], out)
+        p &= ~(1 << v)
+        x |= 1 << v
+
+def find_patterns(aspects: list) -> list[dict]:
+    """
+    Grand trines, grand crosses, T-squares, yods and stelliums in an aspect list.
+    Each pattern: {"type", "bodies": [...], "apex": body or None}. Yods need
+    quincunx aspects (minor aspect table). A stellium is a maximal group of
+    3+ bodies all conjunct each other.
+    """
+    bodies, adj = aspect_graph(aspects)
+    n = len(bodies)
+    none = [0] * n
+    trine, square, opp = adj.get("trine", none), adj.get("square", none), adj.get("opposition", none)
+    sextile, quincunx, conj = adj.get("sextile", none), adj.get("quincunx", none), adj.get("conjunction", none)
+    found = []
+
+    def add(kind, members, apex=None):
+        found.append({"type": kind, "bodies": [bodies[i] for i in sorted(members)],
+                      "apex": bodies[apex] if apex is not None else None})
+
+    for i in range(n):
+        above_i = ~((2 << i) - 1)  # bodies with a higher index than i
+        for j in _bits(trine[i] & above_i) if trine[i] else ():
+            for k in _bits(trine[i] & trine[j] & ~((2 << j) - 1)):
+                add("grand_trine", (i, j, k))
+        for j in _bits(opp[i] & above_i) if opp[i] else ():
+            both = square[i] & square[j]
+            for k in _bits(both):
+                # the cross is reported once, from its lowest body
+                for m in _bits(both & opp[k] & ~((2 << k) - 1)):
+                    if i < k:
+                        add("grand_cross", (i, j, k, m))
+                add("t_square", (i, j, k), apex=k)
+        for j in _bits(quincunx[i]) if quincunx[i] else ():
+            for k in _bits(quincunx[i] & sextile[j] & ~((2 << j) - 1)):
+                add("yod", (i, j, k), apex=i)
+
+    # only bodies with 2+ conjunctions can be in a 3-clique; maximality is unaffected
+    cand = sum(1 << v for v in range(n) if conj[v].bit_count() >= 2)
+    if cand:
+        cliques = []
+        _cliques(conj, 0, cand, 0, cliques)
+        for c in cliques:
+            if c.bit_count() >= 3:
+                add("stellium", list(_bits(c)))
+
+    # a grand cross already contains its four T-squares
+    crosses = [set(p["bodies"]) for p in found if p["type"] == "grand_cross"]
+    found = [p for p in found if p["type"] != "t_square" or not any(c >= set(p["bodies"]) for c in crosses)]
+    order = list(PATTERN_TR_LABEL)
+    found.sort(key=lambda p: order.index(p["type"]))
+    return found
+
+def pattern_score_for(planet: str, patterns: list) -> int:
+    return sum(PATTERN_WEIGHTS[p["type"]] for p in patterns if planet in p["bodies"])
+
+def pattern_text(p: dict) -> str:
+    text = f"{PATTERN_TR_LABEL[p['type']]}: {', '.join(p['bodies'])}"
+    return text + (f" (tepe: {p['apex']})" if p["apex"] else "")
+
+# =========================
+# ESSENTIAL DIGNITY
+# =========================
+# Points per (body id × sign id), built at import for both ruler systems.
+# Body ids follow DIGNITY_BODIES (the same order as compact.BODIES), sign ids
+# follow SIGNS. A model selects which dignities count; "domicile" is the
+# original domicile/detriment score.
+DIGNITY_BODIES = list(dict.fromkeys(PLANET_ALIASES.values()))
+DIGNITY_BODY_IDX = {b: i for i, b in enumerate(DIGNITY_BODIES)}
+
+DIGNITY_POINTS = {"domicile": 10, "detriment": -10, "exaltation": 8, "fall": -8, "triplicity": 4}
+DIGNITY_TR_LABEL = {
+    "domicile": "yönetim", "detriment": "zarar", "exaltation": "yücelim", "fall": "düşüş", "triplicity": "üçlük",
+}
+DIGNITY_MODELS = {
+    "domicile": ("domicile", "detriment"),
+    "exaltation": ("domicile", "detriment", "exaltation", "fall"),
+    "triplicity": ("domicile", "detriment", "exaltation", "fall", "triplicity"),
+}
+DIGNITY_MODEL_TR = {
+    "domicile": "Yönetim / zarar",
+    "exaltation": "Yönetim / zarar + yücelim / düşüş",
+    "triplicity": "Yönetim / zarar + yücelim / düşüş + üçlük",
+}
+DEFAULT_DIGNITY = "domicile"
+
+# traditional exaltations; fall is the opposite sign
+EXALTATIONS = {
+    "Güneş": "Koç", "Ay": "Boğa", "Merkür": "Başak", "Venüs": "Balık",
+    "Mars": "Oğlak", "Jüpiter": "Yengeç", "Satürn": "Terazi",
+}
+# Dorothean triplicity rulers by element (fire, earth, air, water: sign id % 4).
+# Without a day/night chart the day, night and participating rulers all count.
+TRIPLICITIES = (
+    ("Güneş", "Jüpiter", "Satürn"),
+    ("Venüs", "Ay", "Mars"),
+    ("Satürn", "Merkür", "Jüpiter"),
+    ("Venüs", "Mars", "Ay"),
+)
+
+def _dignity_kinds(planet: str, sign: str, rulers_map: dict) -> tuple:
+    """Every dignity `planet` has in `sign` (the reference definition the tables are built from)."""
+    kinds = []
+    if rulers_map.get(sign) == planet:
+        kinds.append("domicile")
+    elif any(p == planet and OPPOSITE[s] == sign for s, p in rulers_map.items()):
+        kinds.append("detriment")
+    if EXALTATIONS.get(planet) == sign:
+        kinds.append("exaltation")
+    elif EXALTATIONS.get(planet) == OPPOSITE[sign]:
+        kinds.append("fall")
+    if planet in TRIPLICITIES[SIGN_TO_IDX[sign] % 4]:
+        kinds.append("triplicity")
+    return tuple(kinds)
+
+@functools.lru_cache(maxsize=None)
+def _dignity_table(rulers_items: tuple, dignity: str) -> tuple:
+    rulers_map = dict(rulers_items)
+    use = DIGNITY_MODELS[dignity]
+    return tuple(
+        tuple(sum(DIGNITY_POINTS[k] for k in _dignity_kinds(b, s, rulers_map) if k in use) for s in SIGNS)
+        for b in DIGNITY_BODIES
+    )
+
+DIGNITY_TABLES = {
+    (system, dignity): _dignity_table(tuple(rulers_map.items()), dignity)
+    for system, rulers_map in (("Modern", RULERS_MODERN), ("Klasik", RULERS_TRAD))
+    for dignity in DIGNITY_MODELS
+}
+
+def dignity_table(rulers_map: dict, dignity: str = DEFAULT_DIGNITY) -> tuple:
+    """Points table for a rulers map: table[body id][sign id]."""
+    if rulers_map is RULERS_MODERN:
+        return DIGNITY_TABLES[("Modern", dignity)]
+    if rulers_map is RULERS_TRAD:
+        return DIGNITY_TABLES[("Klasik", dignity)]
+    return _dignity_table(tuple(rulers_map.items()), dignity)
+
+def dignity_parts(planet: str, sign: str, rulers_map: dict, dignity: str = DEFAULT_DIGNITY) -> dict:
+    """{dignity: points} behind one table cell, for explanations."""
+    if planet not in DIGNITY_BODY_IDX or sign not in SIGN_TO_IDX:
+        return {}
+    use = DIGNITY_MODELS[dignity]
+    return {k: DIGNITY_POINTS[k] for k in _dignity_kinds(planet, sign, rulers_map) if k in use}
+
+# =========================
+# SCORING
+# =========================
+ANGULAR = {1, 4, 7, 10}
+SUCCEDENT = {2, 5, 8, 11}
+
+def house_score(house: int) -> int:
+    if house in ANGULAR:
+        return 12
+    if house in SUCCEDENT:
+        return 6
+    return 0
+
+def rulership_score(planet: str, sign: str, rulers_map: dict, dignity: str = DEFAULT_DIGNITY) -> int:
+    """Essential-dignity points of `planet` in `sign`: one dignity_table() lookup."""
+    b = DIGNITY_BODY_IDX.get(planet)
+    s = SIGN_TO_IDX.get(sign)
+    if b is None or s is None:
+        return 0
+    return dignity_table(rulers_map, dignity)[b][s]
+
+def aspect_weight(a: dict):
+    """
+    Orb-weighted score of one aspect, or None if its type is unscored. The
+    weight falls to 0 at the aspect's "orb_limit" (AspectTable.orb_limit,
+    carried for pairs with an orb factor), else at ASPECT_WEIGHT_ORBS.
+    """
+    t = a["type"]
+    if t not in ASPECT_WEIGHTS:
+        return None
+    orb = float(a.get("orb", 6))
+    w = max(0.0, 1.0 - orb / (a.get("orb_limit") or ASPECT_WEIGHT_ORBS.get(t, 6.0)))
+    return ASPECT_WEIGHTS[t] * w
+
+def aspect_score_for(planet: str, aspects: list[dict]) -> float:
+    if isinstance(aspects, AspectIndex):
+        return aspects.score(planet)
+    score = 0.0
+    for a in aspects:
+        if a["p1"] != planet and a["p2"] != planet:
+            continue
+        w = aspect_weight(a)
+        if w is None:
+            continue
+        score += w
+    return score
+
+class AspectIndex(list):
+    """
+    Aspect list plus per-body lookups, built once per chart.
+    by_body: {body: [aspects]} sorted by orb (stable, like the old per-call sorts)
+    scores:  {body: aspect_score_for(body, aspects)}
+    Being a list, it can be passed anywhere a plain aspect list is expected.
+    """
+
+    def __init__(self, aspects=()):
+        super().__init__(aspects)
+        by_body = {}
+        scores = {}
+        for a in self:
+            w = aspect_weight(a)
+            for p in (a["p1"], a["p2"]):
+                by_body.setdefault(p, []).append(a)
+                if w is not None:
+                    # summed in list order so totals equal the linear scan exactly
+                    scores[p] = scores.get(p, 0.0) + w
+        for lst in by_body.values():
+            lst.sort(key=lambda x: x.get("orb", 99))
+        self.by_body = by_body
+        self.scores = scores
+        self._patterns = None
+
+    def for_body(self, body: str) -> list:
+        """Aspects touching `body`, closest orb first."""
+        return self.by_body.get(body, [])
+
+    def score(self, body: str) -> float:
+        return self.scores.get(body, 0.0)
+
+    def patterns(self) -> list:
+        """find_patterns(self), computed on first use."""
+        if self._patterns is None:
+            self._patterns = find_patterns(self)
+        return self._patterns
+
+def index_aspects(aspects) -> AspectIndex:
+    return aspects if isinstance(aspects, AspectIndex) else AspectIndex(aspects)
+
+def compute_aspect_index(planets: dict, table: AspectTable | None = None) -> AspectIndex:
+    """compute_aspects() wrapped in an AspectIndex."""
+    return AspectIndex(compute_aspects(planets, table))
+
+def compute_ruler_strength(ruler: str, planets: dict, aspects: list, rulers_map: dict,
+                           patterns: list | None = None, dignity: str = DEFAULT_DIGNITY) -> dict:
+    """
+    patterns: optional find_patterns() output, adds a "patterns" part.
+    dignity: a DIGNITY_MODELS key; other than the default it adds a "dignities"
+    part ({dignity: points} behind the rulership points).
+    """
+    pos = planets.get(ruler)
+    if not pos:
+        return {"score": None, "parts": {}, "pos": None}
+
+    hs = house_score(pos["house"])
+    rs = rulership_score(ruler, pos["sign"], rulers_map, dignity)
+    aps = aspect_score_for(ruler, aspects)
+
+    raw = 50 + hs + rs + aps
+    parts = {"base": 50, "house": hs, "rulership": rs, "aspects": round(aps, 1)}
+    if dignity != DEFAULT_DIGNITY:
+        parts["dignities"] = dignity_parts(ruler, pos["sign"], rulers_map, dignity)
+    if patterns is not None:
+        ps = pattern_score_for(ruler, patterns)
+        raw += ps
+        parts["patterns"] = ps
+    final = clamp(raw)
+    return {
+        "score": round(final, 1),
+        "pos": pos,
+        "parts": parts,
+    }
+
+def score_label(score):
+    if score is None:
+        return "bilinmiyor"
+    if score >= 75:
+        return "akıcı"
+    if score >= 55:
+        return "orta"
+    if score >= 35:
+        return "zorlayıcı"
+    return "yoğun"
+
+def pick_ruler_with_fallback(ov_sign: str, primary_system: str, planets: dict):
+    """
+    If chosen ruler not found in chart, fallback to other system's ruler.
+    Returns (ruler_name, used_system, fallback_used: bool)
+    """
+    primary_map = RULERS_MODERN if primary_system == "Modern" else RULERS_TRAD
+    alt_map = RULERS_TRAD if primary_system == "Modern" else RULERS_MODERN
+
+    r1 = primary_map[ov_sign]
+    if r1 in planets:
+        return r1, primary_system, False
+
+    alt_system = "Klasik" if primary_system == "Modern" else "Modern"
+    r2 = alt_map[ov_sign]
+    if r2 in planets:
+        return r2, alt_system, True
+
+    # neither present
+    return r1, primary_system, False
+
+def short_action_tips(ov_sign: str, ruler_house: int | None):
+    """
+    Simple, readable action tips.
+    """
+    return list(_action_tips(ov_sign, ruler_house))
+
+@functools.lru_cache(maxsize=None)
+def _action_tips(ov_sign: str, ruler_house: int | None) -> tuple:
+    tips = []
+    if ov_sign == "Yay":
+        tips.append("Eğitim/sertifika, yurtdışı bağlantı veya yayınlama gibi 'ufuk genişleten' bir hamle ekle.")
+        tips.append("Riskli büyümeyi plan–bütçe–takvim ile çerçevele.")
+    elif ov_sign == "Başak":
+        tips.append("Planı küçült: ölç–iyileştir–tekrar et (verim odaklı).")
+        tips.append("Detay/sağlık/iş rutini aksarsa tema zorlanır.")
+    elif ov_sign == "Kova":
+        tips.append("Yeni yöntem/teknoloji veya farklı bir network kanalı dene.")
+        tips.append("Esneklik + net sınır: özgürlük ihtiyacını yönet.")
+    else:
+        tips.append("Bindirme burcunun 'tarzına' uygun küçük bir somut adım seç ve 2 hafta takip et.")
+
+    if ruler_house is not None:
+        tips.append(f"Yönetici {ruler_house}. evde: aksiyonu '{HOUSE_MEANINGS[ruler_house]}' kanalından başlatmak daha verimli olur.")
+    return tuple(tips[:3])
+
+# =========================
+# COMMENT TEMPLATES
+# =========================
+# make_readable_comment() is rendered from a str.format template. Everything
+# fixed by (overlay sign, ruler house, score label) is compiled into the
+# template once, so a render only formats the per-chart values.
+MISSING_RULER_NOTE = "⚠️ Yönetici gezegen harita verisinde bulunamadığı için skor/yorum sınırlı."
+
+def _esc(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+@functools.lru_cache(maxsize=None)
+def comment_template(ov_sign: str, ruler_house: int | None, label: str) -> str:
+    """
+    Template for one (overlay sign, ruler house, label); fields are filled by
+    make_readable_comment. label == score_label(None) gives the short
+    "ruler missing" form.
+    """
+    micro_tags, micro_desc = SIGN_MICRO.get(ov_sign, ("", ""))
+    header = (
+        "**Özet:** **{subject}** konusunun **{n}. alt başlığı**, "
+        "**{result_house}. ev** ({result_meaning}) alanında çalışıyor. "
+        f"Genel akış: **{_esc(label)}**."
+    )
+    base_lines = [
+        "- **Kök:** {root_house}. ev → {root_meaning}",
+        "- **Sonuç:** {result_house}. ev → {result_meaning}",
+        f"- **Bindirme burcu:** **{_esc(ov_sign)}** ({_esc(micro_tags)})",
+        f"  - {_esc(micro_desc)}" if micro_desc else "",
+        "- **Yönetici:** **{ruler}**{sys_note}",
+    ]
+    base_block = "\n".join([x for x in base_lines if x])
+
+    if label == score_label(None):
+        return header + "\n\n" + base_block + "\n\n" + _esc(MISSING_RULER_NOTE)
+
+    house = ruler_house if ruler_house in HOUSE_MEANINGS else None   # outside 1-12 reads as unknown
+    ruler_loc = f"- **Yönetici konumu:** **{f'{house}. ev' if house else 'ev bilinmiyor'} / {{sign}}**{{retro}}"
+    score_block = (
+        f"**Skor:** **{{score}}/100** → **{_esc(label)}**\n\n"
+        "**Skor neden böyle?**\n"
+        "- Ev vurgusu: {house_pts:+}\n"
+        "{rulership_line}"
+        "- Açılar: {aspect_pts:+}\n"
+        "{pattern_line}"
+    )
+    interp = (
+        "**Ne anlatıyor?**\n"
+        f"- {_esc(ov_sign)} bindirmesi temayı **{_esc(micro_tags or 'o burcun tarzı')}** üzerinden çalıştırır.\n"
+        + (f"- Yönetici {{ruler}}’ün **{house}. evde** olması, konunun en çok **{_esc(HOUSE_MEANINGS[house])}** kanalından aktığını gösterir.\n"
+           if house else
+           "- Yönetici {ruler}’ün evi bilinmiyor (ev sütunu veya cusp dereceleri yok).\n")
+    )
+    tips_block = "**Hızlı aksiyon:**\n" + "\n".join([f"- {_esc(t)}" for t in _action_tips(ov_sign, house)])
+
+    return (
+        header + "\n\n" +
+        base_block + "\n" +
+        ruler_loc + "\n\n" +
+        score_block + "\n" +
+        "{aspect_block}\n\n" +
+        interp + "\n" +
+        tips_block
+    )
+
+@functools.lru_cache(maxsize=None)
+def _aspect_line_template(a_type: str) -> str:
+    tr = ASPECT_TR_LABEL.get(a_type, a_type)
+    nat = aspect_nature(a_type)
+    icon = "✅" if nat == "destek" else ("⚠️" if nat == "zorlayıcı" else "⚖️")
+    return f"  - {icon} {{other}} ile **{_esc(tr)}** (orb {{orb}}) → *{_esc(nat)}*"
+
+def _rulership_line(parts: dict) -> str:
+    if "dignities" not in parts:
+        return f"- Yöneticilik (domicile/detriment): {parts['rulership']:+}\n"
+    found = ", ".join(f"{DIGNITY_TR_LABEL[k]} {v:+}" for k, v in parts["dignities"].items())
+    return f"- Temel yücelik ({found or 'yok'}): {parts['rulership']:+}\n"
+
+def make_readable_comment(root_house, n, result_house, ov_sign, ruler, strength, aspects, topic_name=None, ruler_used_system=None, fallback_used=False):
+    """
+    Human-friendly comment block: summary + bullets + reasons + tips
+    """
+    s = strength["score"]
+    pos = strength["pos"]
+    missing = s is None or pos is None
+    lbl = score_label(None if missing else s)
+    house = None if missing else pos["house"]
+
+    sys_note = ""
+    if ruler_used_system:
+        sys_note = f" (**Yönetici sistemi:** {ruler_used_system})"
+    if fallback_used:
+        sys_note += " _(haritada bulunmadığı için alternatif yönetici kullanıldı)_"
+
+    values = {
+        "subject": topic_name if topic_name else f"{root_house}. ev ({HOUSE_MEANINGS[root_house]})",
+        "n": n,
+        "root_house": root_house,
+        "root_meaning": HOUSE_MEANINGS[root_house],
+        "result_house": result_house,
+        "result_meaning": HOUSE_MEANINGS[result_house],
+        "ruler": ruler,
+        "sys_note": sys_note,
+    }
+    template = comment_template(ov_sign, house, lbl)
+    if missing:
+        return template.format_map(values)
+
+    parts = strength["parts"]
+    asp_lines = []
+    for a in index_aspects(aspects).for_body(ruler)[:5]:
+        other = a["p2"] if a["p1"] == ruler else a["p1"]
+        asp_lines.append(_aspect_line_template(a["type"]).format(other=other, orb=a["orb"]))
+    if asp_lines:
+        aspect_block = "**Yönetici açıları (en yakınlar):**\n" + "\n".join(asp_lines)
+    else:
+        aspect_block = "**Yönetici açıları:** belirgin orb içi majör açı görünmüyor."
+
+    values.update(
+        sign=pos["sign"],
+        retro=" (R)" if pos.get("retro") else "",
+        score=s,
+        house_pts=parts["house"],
+        rulership_line=_rulership_line(parts),
+        aspect_pts=parts["aspects"],
+        pattern_line=f"- Açı kalıpları: {parts['patterns']:+}\n" if "patterns" in parts else "",
+        aspect_block=aspect_block,
+    )
+    return template.format_map(values)
+
+QUESTION_TEMPLATES = (
+    "{root_meaning} konusunun {n}. alt başlığı hangi koşullarda ilerliyor? (Bindirme: {ov_sign})",
+    "Bu tema {result_meaning} alanında nasıl görünür? (Sonuç ev: {result_house})",
+    "Yönetici {ruler} hangi evde/burçta? Bu, konunun çalıştığı kanalı gösterir.",
+    "{ruler}’ün güçlü/zorlayıcı açıları hangileri? (Sağ panelde listelenir.)",
+)
+
+def default_questions(root_house: int, n: int, result_house: int, ov_sign: str, ruler: str):
+    values = {
+        "root_meaning": HOUSE_MEANINGS[root_house], "n": n, "ov_sign": ov_sign,
+        "result_meaning": HOUSE_MEANINGS[result_house], "result_house": result_house, "ruler": ruler,
+    }
+    return [q.format_map(values) for q in QUESTION_TEMPLATES]
+
+
+# =========================
+# PIPELINE
+# =========================
+def parse_chart(planets_text: str, cusps_text: str = "", table: AspectTable | None = None,
+                rehouse: bool = False):
+    """
+    Parse both Astro-Seek blocks and compute aspects.
+    Missing houses (all houses with rehouse=True) come from the cusp degrees.
+    Returns dict with planets, cusps, cusp_lons, aspects and the parse diagnostics.
+    """
+    planets, planet_errors, ignored = parse_planets_from_text(planets_text or "")
+    cusps, cusp_errors = parse_house_cusps_from_text(cusps_text or "")
+    cusp_lons, _ = parse_cusp_longitudes(cusps_text or "")
+    planets = houses_from_cusps(planets, cusp_lons, rehouse)
+    aspects = compute_aspect_index(planets, table) if planets else AspectIndex()
+    return {
+        "planets": planets,
+        "cusps": cusps,
+        "cusp_lons": cusp_lons,
+        "aspects": aspects,
+        "planet_errors": planet_errors,
+        "cusp_errors": cusp_errors,
+        "ignored": ignored,
+    }
+
+def choose_ruler(ov_sign: str, ruler_system: str, planets: dict, allow_fallback: bool = True):
+    """Returns (ruler, used_system, fallback_used) for an overlay sign."""
+    if allow_fallback:
+        return pick_ruler_with_fallback(ov_sign, ruler_system, planets)
+    return get_ruler(ov_sign, ruler_system), ruler_system, False
+
+def derive(planets: dict, aspects: list, cusp_signs: dict, root_house: int, n: int,
+           ruler_system: str = "Modern", allow_fallback: bool = True, strengths: dict | None = None,
+           use_patterns: bool = False, dignity: str = DEFAULT_DIGNITY):
+    """
+    Derived-house result for one (root_house, n) question.
+    cusp_signs: {house: sign} for all 12 houses.
+    strengths: optional {(ruler, used_system): strength} memo shared between calls
+    (with the same use_patterns and dignity).
+    use_patterns: add the aspect-pattern component to the ruler strength.
+    dignity: essential-dignity model (DIGNITY_MODELS key) for the rulership points.
+    """
+    root_house, n = int(root_house), int(n)
+    root_sign = cusp_signs[root_house]
+    result_house = derived_house(root_house, n)
+    ov_sign = overlay_sign(root_sign, n)
+    ruler, used_system, fallback_used = choose_ruler(ov_sign, ruler_system, planets, allow_fallback)
+
+    key = (ruler, used_system)
+    if strengths is not None and key in strengths:
+        strength = strengths[key]
+    else:
+        rulers_map_used = RULERS_MODERN if used_system == "Modern" else RULERS_TRAD
+        patterns = index_aspects(aspects).patterns() if use_patterns else None
+        strength = compute_ruler_strength(ruler, planets, aspects, rulers_map_used, patterns, dignity)
+        if strengths is not None:
+            strengths[key] = strength
+    return {
+        "root_house": root_house,
+        "n": n,
+        "root_sign": root_sign,
+        "result_house": result_house,
+        "ov_sign": ov_sign,
+        "ruler": ruler,
+        "used_system": used_system,
+        "fallback_used": fallback_used,
+        "strength": strength,
+    }
+
+def derive_matrix(planets: dict, aspects: list, cusp_signs: dict,
+                  ruler_system: str = "Modern", allow_fallback: bool = True, use_patterns: bool = False,
+                  dignity: str = DEFAULT_DIGNITY) -> dict:
+    """
+    All 144 (root_house, n) derived results in one pass.
+    Ruler strengths are computed once per distinct ruler (at most 12).
+    Returns {(root_house, n): derive(...) result}.
+    """
+    strengths = {}
+    aspects = index_aspects(aspects)
+    return {
+        (root, n): derive(planets, aspects, cusp_signs, root, n, ruler_system, allow_fallback, strengths,
+                          use_patterns, dignity)
+        for root in range(1, 13)
+        for n in range(1, 13)
+    }
+
+def matrix_rows(matrix: dict) -> list[dict]:
+    """Flat table rows for a derive_matrix() result."""
+    rows = []
+    for (root, n), d in matrix.items():
+        s = d["strength"]["score"]
+        rows.append({
+            "kök ev": root,
+            "n": n,
+            "sonuç ev": d["result_house"],
+            "bindirme": d["ov_sign"],
+            "yönetici": d["ruler"],
+            "sistem": d["used_system"],
+            "skor": s,
+            "etiket": score_label(s),
+        })
+    return rows
+
+def default_cusp_signs(cusps: dict) -> dict:
+    """Parsed cusps with whole-sign-from-Koç defaults for missing houses."""
+    return {h: cusps.get(h, SIGNS[h - 1]) for h in range(1, 13)}
@@ -0,0 +1,258 @@
+"""
+Background scoring jobs for multi-chart uploads.
+
+An uploaded file (CSV, JSONL, or a ZIP of those and/or Astro-Seek .txt pastes)
+becomes a Job. The job's own thread reads the records and hands chunks to a
+process pool running batch.score_chunk, so parsing, aspects and scoring never
+run on a Streamlit script thread. Chunk results are appended in input order as
+they finish. The UI polls Job.snapshot() for progress and partial results
+while the consultant keeps using the single-chart view.
+
+One JobManager per server process (st.cache_resource in app.py); the pool is
+shared by every job and session, leaves a core to the script threads by
+default, and each job keeps at most `workers * 2` chunks in flight.
+"""
+import io
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import zipfile
+from collections import OrderedDict
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
+
+from batch import detect_format, iter_chunks, iter_records, ordered_results, score_chunk
+from engine import DEFAULT_DIGNITY, score_label
+
+UPLOAD_TYPES = ["csv", "jsonl", "zip"]
+STATUS_TR = {
+    "queued": "sırada",
+    "reading": "okunuyor",
+    "running": "işleniyor",
+    "done": "bitti",
+    "cancelled": "iptal edildi",
+    "failed": "hata",
+}
+ACTIVE = {"queued", "reading", "running"}
+
+# =========================
+# INPUT
+# =========================
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8-sig")
+
+def iter_upload_records(name: str, data: bytes):
+    """
+    Yield (record_id, planets_text, cusps_text) from an uploaded file.
+    .csv/.jsonl hold batch.py records. A .txt is one pasted chart: planets and
+    cusps may share the file, since each parser skips the other's lines. ZIP
+    members are read the same way by extension; ids are prefixed with the
+    member name so they stay unique.
+    """
+    lower = name.lower()
+    if lower.endswith(".zip"):
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            for info in zf.infolist():
+                member = info.filename
+                if info.is_dir() or member.startswith("__MACOSX/") or os.path.basename(member).startswith("."):
+                    continue
+                if member.lower().endswith(".txt"):
+                    yield from iter_upload_records(member, zf.read(info))
+                elif member.lower().endswith((".csv", ".jsonl")):
+                    for rid, planets_text, cusps_text in iter_upload_records(member, zf.read(info)):
+                        yield f"{member}:{rid}", planets_text, cusps_text
+        return
+    text = _decode(data)
+    if lower.endswith(".txt"):
+        yield os.path.splitext(name)[0], text, text
+        return
+    yield from iter_records(io.StringIO(text, newline=""), detect_format(name))
+
+def result_rows(results: list) -> list[dict]:
+    """Flat table rows for batch.score_parsed() results."""
+    rows = []
+    for r in results:
+        row = {"id": r["id"], "yerleşim": r["planets"], "cusp": r["cusps"], "açı": r["aspect_count"],
+               "hata": r["errors"]}
+        d = r.get("derived")
+        if d:
+            row.update({"sonuç ev": d["result_house"], "bindirme": d["ov_sign"], "yönetici": d["ruler"],
+                        "skor": d["score"], "etiket": score_label(d["score"])})
+        elif r["strengths"]:
+            best = max(r["strengths"], key=lambda p: r["strengths"][p]["score"])
+            row.update({"en güçlü yönetici": best, "skor": r["strengths"][best]["score"]})
+        rows.append(row)
+    return rows
+
+def upload_total(name: str, data: bytes) -> int | None:
+    """
+    Record count from the raw upload without parsing it: non-blank .jsonl lines,
+    1 per .txt, ZIP members if they are all .txt. None when that needs a parse
+    (CSV fields span lines); the job sets it once scoring ends.
+    """
+    lower = name.lower()
+    if lower.endswith(".txt"):
+        return 1
+    if lower.endswith(".jsonl"):
+        return sum(1 for line in io.BytesIO(data) if line.strip())
+    if lower.endswith(".zip"):
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as zf:
+                members = [i.filename.lower() for i in zf.infolist() if not i.is_dir()
+                           and not i.filename.startswith("__MACOSX/")
+                           and not os.path.basename(i.filename).startswith(".")]
+        except zipfile.BadZipFile:
+            return None  # reported when the records are read
+        if not any(m.endswith((".csv", ".jsonl")) for m in members):
+            return sum(1 for m in members if m.endswith(".txt"))
+    return None
+
+def _until(event: threading.Event, chunks):
+    """`chunks` until `event` is set."""
+    for chunk in chunks:
+        if event.is_set():
+            return
+        yield chunk
+
+# =========================
+# JOBS
+# =========================
+class Job:
+    """One upload being scored. Fields change under `lock`; read them through snapshot()."""
+
+    def __init__(self, name: str, options: dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.options = options
+        self.status = "queued"
+        self.total = None
+        self.results = []
+        self.charts_with_errors = 0
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.lock = threading.Lock()
+        self.cancel_event = threading.Event()
+        self._jsonl = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE
+
+    def _add(self, results: list):
+        with self.lock:
+            self.results.extend(results)
+            self.charts_with_errors += sum(1 for r in results if r["errors"])
+
+    def _end(self, status: str, error: str | None = None):
+        with self.lock:
+            self.status = status
+            self.error = error
+            self.finished = time.time()
+
+    def snapshot(self, tail: int = 0) -> dict:
+        """Progress counters plus the last `tail` results, consistent with each other."""
+        with self.lock:
+            done = len(self.results)
+            recent = self.results[-tail:] if tail else []
+            status, total, errors = self.status, self.total, self.charts_with_errors
+        elapsed = ((self.finished or time.time()) - self.started) if self.started else 0.0
+        rate = done / elapsed if elapsed > 0 else None
+        eta = (total - done) / rate if rate and total is not None and status in ACTIVE else None
+        return {
+            "id": self.id, "name": self.name, "status": status, "error": self.error,
+            "done": done, "total": total, "charts_with_errors": errors,
+            "seconds": round(elapsed, 1), "charts_per_sec": round(rate, 1) if rate else None,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "recent": recent,
+        }
+
+    def to_jsonl(self) -> bytes:
+        """Results so far in batch.py's JSONL output format; kept once the job has ended."""
+        if self._jsonl is not None:
+            return self._jsonl
+        with self.lock:
+            results, ended = list(self.results), not self.active
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in results).encode("utf-8")
+        if ended:
+            self._jsonl = data
+        return data
+
+class JobManager:
+    def __init__(self, workers: int | None = None, chunk_size: int = 64, keep: int = 20):
+        """
+        workers: pool processes, default one per core but one; 0 scores on the job
+        thread itself (holding the GIL against the UI). keep: ended jobs kept for download.
+        """
+        self.workers = max(1, (os.cpu_count() or 1) - 1) if workers is None else workers
+        self.chunk_size = chunk_size
+        self.keep = keep
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking the multi-threaded server process can copy held locks
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def submit(self, name: str, data: bytes, ruler_system: str = "Modern", question=None,
+               rehouse: bool = False, patterns: bool = False, dignity: str = DEFAULT_DIGNITY) -> str:
+        """Start scoring an uploaded file in the background; returns the job id."""
+        job = Job(name, {"ruler_system": ruler_system, "question": question, "rehouse": rehouse,
+                         "patterns": patterns, "dignity": dignity})
+        with self._lock:
+            self._jobs[job.id] = job
+            ended = [j for j in self._jobs.values() if not j.active]
+            for old in ended[:max(0, len(ended) - self.keep)]:
+                del self._jobs[old.id]
+        threading.Thread(target=self._run, args=(job, data), name=f"upload-{job.id}", daemon=True).start()
+        return job.id
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str):
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.cancel_event.set()
+
+    def shutdown(self):
+        for job in list(self._jobs.values()):
+            job.cancel_event.set()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: Job, data: bytes):
+        o = job.options
+        args = (o["ruler_system"], o["question"], False, o["rehouse"], o["patterns"], o["dignity"])
+        try:
+            with job.lock:
+                job.status = "reading"
+            total = upload_total(job.name, data)
+            with job.lock:
+                job.total = total
+                job.status = "running"
+                job.started = time.time()
+
+            chunks = iter_chunks(iter_upload_records(job.name, data), self.chunk_size)
+            pool = self._executor() if self.workers > 0 else None
+            with closing(ordered_results(_until(job.cancel_event, chunks), score_chunk, args,
+                                         self.workers, pool)) as results:
+                for res in results:
+                    job._add(res)
+                    if job.cancel_event.is_set():
+                        break
+            if not job.cancel_event.is_set():
+                with job.lock:
+                    job.total = len(job.results)   # exact once every record is scored
+            job._end("cancelled" if job.cancel_event.is_set() else "done")
+        except Exception as e:  # shown on the job; the server keeps running
+            job._end("failed", f"{type(e).__name__}: {e}")
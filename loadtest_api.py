@@ -0,0 +1,104 @@
+"""
+Concurrent load test for api.py (stdlib only).
+
+    python api.py --port 8765 &
+    python loadtest_api.py --port 8765 --concurrency 64 --requests 5000
+
+Each worker keeps one keep-alive connection and sends /derive requests for a
+small pool of charts with random root/n. --distinct controls how many distinct
+(chart, root, n) combinations exist, which bounds the response-cache hit rate.
+Reports p50/p99 latency and requests/sec.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+SAMPLE_PLANETS = [
+    "Sun: Sagittarius 4°26’10’’  end of 7  Direct",
+    "Moon: Leo 0°53’40’’  4  Direct",
+    "Mercury: Scorpio 20°11’02’’  6  Direct",
+    "Venus: Capricorn 15°40’12’’  8  Direct",
+    "Mars: Capricorn 3°23’09’’  8  Direct",
+    "Jupiter: Aries 28°02’17’’  11  Retrograde",
+    "Saturn: Capricorn 12°34’56’’  8  Direct",
+    "Uranus: Capricorn 4°10’05’’  8  Direct",
+    "Neptune: Capricorn 11°22’33’’  8  Direct",
+    "Pluto: Scorpio 16°44’01’’  6  Direct",
+]
+SIGNS_EN = ["Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo", "Libra", "Scorpio",
+            "Sagittarius", "Capricorn", "Aquarius", "Pisces"]
+
+def make_chart(rng: random.Random) -> dict:
+    """Sample chart with shuffled degrees so each chart hashes differently."""
+    lines = []
+    for line in SAMPLE_PLANETS:
+        name = line.split(":")[0]
+        lines.append(f"{name}: {rng.choice(SIGNS_EN)} {rng.randint(0, 29)}°{rng.randint(0, 59):02d}’{rng.randint(0, 59):02d}’’  {rng.randint(1, 12)}  Direct")
+    asc = rng.randrange(12)
+    cusps = [f"{h}: {SIGNS_EN[(asc + h - 1) % 12]} 1°00’00’’" for h in range(1, 13)]
+    return {"planets": "\n".join(lines), "cusps": "\n".join(cusps)}
+
+async def worker(host, port, bodies, count, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(count):
+            body = random.choice(bodies)
+            req = (
+                f"POST /derive HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n"
+            ).encode("latin-1") + body
+            t0 = time.perf_counter()
+            writer.write(req)
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.decode("latin-1").split("\r\n"):
+                if line.lower().startswith("content-length:"):
+                    length = int(line.split(":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t0)
+            if not head.startswith(b"HTTP/1.1 200"):
+                errors.append(head.split(b"\r\n", 1)[0])
+    finally:
+        writer.close()
+
+def pct(sorted_vals, q):
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+async def run(args):
+    rng = random.Random(args.seed)
+    charts = [make_chart(rng) for _ in range(args.charts)]
+    bodies = []
+    for _ in range(args.distinct):
+        q = dict(rng.choice(charts), root=rng.randint(1, 12), n=rng.randint(1, 12), comment=not args.no_comment)
+        bodies.append(json.dumps(q, ensure_ascii=False).encode("utf-8"))
+
+    latencies, errors = [], []
+    per = args.requests // args.concurrency
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(args.host, args.port, bodies, per, latencies, errors) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - t0
+
+    lat = sorted(latencies)
+    print(f"requests={len(lat)} concurrency={args.concurrency} errors={len(errors)} elapsed={elapsed:.2f}s")
+    print(f"throughput: {len(lat) / elapsed:.0f} req/s")
+    print(f"latency ms: p50={pct(lat, .50) * 1000:.2f} p99={pct(lat, .99) * 1000:.2f} "
+          f"mean={statistics.mean(lat) * 1000:.2f} max={lat[-1] * 1000:.2f}")
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Load test for the derived-house API.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--concurrency", type=int, default=32)
+    p.add_argument("--requests", type=int, default=5000)
+    p.add_argument("--charts", type=int, default=200, help="distinct charts in the pool")
+    p.add_argument("--distinct", type=int, default=2000, help="distinct (chart, root, n) queries")
+    p.add_argument("--no-comment", action="store_true", help="skip comment rendering in responses")
+    p.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(p.parse_args(argv)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Multi-chart derived-house reports, streamed to a Markdown or HTML file.
+
+Usage:
+    python report.py charts.jsonl -o report.md
+    python report.py charts.csv -o report.html --root 7 --workers 4
+
+Input records are the batch.py ones (id, planets, cusps). For each chart the
+report has a 12×12 score grid (root house × n) and the comment of every
+derived house, or only those of --root. Charts are read, rendered and
+written one chunk at a time, in input order. Memory stays flat for any number
+of charts, and a partly written report is readable.
+"""
+import argparse
+import functools
+import html
+import os
+import re
+import sys
+import time
+
+from batch import (
+    _open_text, detect_format, house_charts, iter_chunks, iter_records, ordered_results, parse_record, positive_int,
+)
+from engine import (
+    DEFAULT_DIGNITY, DIGNITY_MODELS, HOUSE_MEANINGS, AspectIndex, compute_aspect_index, default_cusp_signs,
+    derive_matrix, make_readable_comment, score_label,
+)
+
+# =========================
+# MARKDOWN → HTML
+# =========================
+# Only what make_readable_comment emits: paragraphs, 2-level "- " lists,
+# **bold**, *em* and _em_.
+_BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+_EM_RE = re.compile(r"(?<![\w*])([*_])(?!\s)(.+?)(?<!\s)\1(?![\w*])")
+_ITEM_RE = re.compile(r"^( *)- (.*)$")
+
+@functools.lru_cache(maxsize=1 << 16)
+def _inline(text: str) -> str:
+    """One line of markdown as HTML; most comment lines repeat across charts, so they are memoized."""
+    text = html.escape(text, quote=False)
+    return _EM_RE.sub(r"<em>\2</em>", _BOLD_RE.sub(r"<strong>\1</strong>", text))
+
+def md_to_html(md: str) -> str:
+    out, para = [], []
+    depth = base = 0
+
+    def close_lists(to: int):
+        nonlocal depth
+        while depth > to:
+            out.append("</li></ul>")
+            depth -= 1
+
+    def flush_para():
+        if para:
+            out.append("<p>" + "<br>".join(para) + "</p>")
+            para.clear()
+
+    for line in md.split("\n"):
+        m = _ITEM_RE.match(line)
+        if m:
+            flush_para()
+            # a list may start indented (the ruler aspect lines): levels are relative to its first item
+            if depth == 0:
+                base = len(m[1])
+            level = max(1, min((len(m[1]) - base) // 2 + 1, depth + 1))
+            if level > depth:
+                while depth < level:
+                    out.append("<ul>")
+                    depth += 1
+            else:
+                close_lists(level)
+                out.append("</li>")
+            out.append("<li>" + _inline(m[2]))
+        else:
+            close_lists(0)
+            if line.strip():
+                para.append(_inline(line))
+            else:
+                flush_para()
+    close_lists(0)
+    flush_para()
+    return "".join(out)
+
+# =========================
+# RENDERING
+# =========================
+HTML_HEAD = """<!doctype html>
+<html lang="tr"><head><meta charset="utf-8"><title>Türetilmiş ev raporu</title>
+<style>
+body{font-family:system-ui,sans-serif;max-width:60rem;margin:2rem auto;line-height:1.45}
+table{border-collapse:collapse;font-size:.85rem}td,th{border:1px solid #ccc;padding:.2rem .4rem;text-align:right}
+.akıcı{background:#d8f5d0}.orta{background:#f5f0c8}.zorlayıcı{background:#f8dcc0}.yoğun{background:#f3c4c4}
+section.chart{border-top:3px solid #444;margin-top:2rem}
+</style></head><body>
+<h1>Türetilmiş ev raporu</h1>
+"""
+HTML_TAIL = "</body></html>\n"
+
+def _grid_markdown(matrix: dict) -> list:
+    lines = ["| kök \\ n | " + " | ".join(str(n) for n in range(1, 13)) + " |",
+             "|---" * 13 + "|"]
+    for root in range(1, 13):
+        cells = (matrix[(root, n)]["strength"]["score"] for n in range(1, 13))
+        lines.append(f"| **{root}** | " + " | ".join("–" if s is None else str(s) for s in cells) + " |")
+    return lines
+
+def _grid_html(matrix: dict) -> str:
+    rows = ["<tr><th>kök \\ n</th>" + "".join(f"<th>{n}</th>" for n in range(1, 13)) + "</tr>"]
+    for root in range(1, 13):
+        cells = []
+        for n in range(1, 13):
+            s = matrix[(root, n)]["strength"]["score"]
+            cells.append(f'<td class="{score_label(s)}">{"–" if s is None else s}</td>')
+        rows.append(f"<tr><th>{root}</th>" + "".join(cells) + "</tr>")
+    return "<table>" + "".join(rows) + "</table>"
+
+def render_chart(p: dict, fmt: str = "md", root: int | None = None, ruler_system: str = "Modern",
+                 allow_fallback: bool = True, patterns: bool = False, dignity: str = DEFAULT_DIGNITY) -> str:
+    """Report section for one parse_record() chart (houses already filled)."""
+    planets = p["planets"]
+    aspects = compute_aspect_index(planets) if planets else AspectIndex()
+    matrix = derive_matrix(planets, aspects, default_cusp_signs(p["cusps"]), ruler_system, allow_fallback,
+                           patterns, dignity)
+    title = f"Harita {p['id']}"
+    summary = f"Yerleşim: {len(planets)} · Cusp: {len(p['cusps'])}/12 · Açı: {len(aspects)}"
+    roots = [root] if root else range(1, 13)
+
+    out = []
+    if fmt == "html":
+        out.append(f'<section class="chart"><h2>{html.escape(title)}</h2><p>{summary}</p>{_grid_html(matrix)}')
+    else:
+        out += [f"## {title}", "", summary, "", *_grid_markdown(matrix), ""]
+
+    for r in roots:
+        head = f"Kök {r}. ev — {HOUSE_MEANINGS[r]}"
+        out.append(f"<h3>{html.escape(head)}</h3>" if fmt == "html" else f"### {head}\n")
+        for n in range(1, 13):
+            d = matrix[(r, n)]
+            comment = make_readable_comment(
+                r, n, d["result_house"], d["ov_sign"], d["ruler"], d["strength"],
+                aspects, None, d["used_system"], d["fallback_used"],
+            )
+            sub = f"n={n} → {d['result_house']}. ev · {d['ov_sign']} · {d['ruler']}"
+            if fmt == "html":
+                out.append(f"<h4>{html.escape(sub)}</h4>{md_to_html(comment)}")
+            else:
+                out += [f"#### {sub}", "", comment, ""]
+    if fmt == "html":
+        out.append("</section>")
+    return "\n".join(out) + "\n"
+
+def render_chunk(chunk: list, fmt: str, root, ruler_system: str, allow_fallback: bool,
+                 patterns: bool = False, rehouse: bool = False, dignity: str = DEFAULT_DIGNITY) -> str:
+    parsed = [parse_record(*rec) for rec in chunk]
+    house_charts(parsed, rehouse)
+    return "".join(render_chart(p, fmt, root, ruler_system, allow_fallback, patterns, dignity) for p in parsed)
+
+def _render_counted(chunk: list, *args) -> tuple:
+    """render_chunk() and the number of charts it rendered, for ordered_results()."""
+    return render_chunk(chunk, *args), len(chunk)
+
+# =========================
+# DRIVER
+# =========================
+def write_report(records, out_fh, fmt: str = "md", root: int | None = None, workers: int = 0,
+                 chunk_size: int = 16, ruler_system: str = "Modern", allow_fallback: bool = True,
+                 patterns: bool = False, rehouse: bool = False, dignity: str = DEFAULT_DIGNITY) -> dict:
+    """
+    Render `records` ((id, planets_text, cusps_text) tuples) to out_fh chunk by
+    chunk. workers <= 1 renders in-process; otherwise at most `workers * 2`
+    rendered chunks are held at once. Returns a summary dict.
+    """
+    t0 = time.perf_counter()
+    charts = 0
+    written = 0
+    args = (fmt, root, ruler_system, allow_fallback, patterns, rehouse, dignity)
+    out_fh.write(HTML_HEAD if fmt == "html" else "# Türetilmiş ev raporu\n\n")
+    for text, n in ordered_results(iter_chunks(records, chunk_size), _render_counted, args, workers):
+        out_fh.write(text)
+        charts += n
+        written += len(text)
+    if fmt == "html":
+        out_fh.write(HTML_TAIL)
+    out_fh.flush()
+
+    elapsed = time.perf_counter() - t0
+    return {
+        "charts": charts,
+        "chars": written,
+        "seconds": round(elapsed, 3),
+        "charts_per_sec": round(charts / elapsed, 1) if elapsed > 0 else None,
+    }
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Stream a derived-house report for many charts.")
+    p.add_argument("input", help="JSONL/CSV file (batch.py format), or - for stdin")
+    p.add_argument("-o", "--output", default="-", help="report file; .html selects HTML (default: stdout, Markdown)")
+    p.add_argument("--format", choices=["jsonl", "csv"], help="input format (default: from extension)")
+    p.add_argument("--report-format", choices=["md", "html"], help="default: from the output extension")
+    p.add_argument("--root", type=int, choices=range(1, 13), metavar="1-12", help="only comments for this root house")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="process count (1 = in-process)")
+    p.add_argument("--chunk-size", type=positive_int, default=16, help="charts rendered per task")
+    p.add_argument("--ruler-system", choices=["Modern", "Klasik"], default="Modern")
+    p.add_argument("--no-fallback", action="store_true", help="do not fall back to the other ruler system")
+    p.add_argument("--patterns", action="store_true", help="include the aspect-pattern score component")
+    p.add_argument("--rehouse", action="store_true", help="recompute every house from the cusp degrees")
+    p.add_argument("--dignity", choices=list(DIGNITY_MODELS), default=DEFAULT_DIGNITY,
+                   help="essential dignities in the rulership points")
+    p.add_argument("--planets-field", default="planets")
+    p.add_argument("--cusps-field", default="cusps")
+    p.add_argument("--id-field", default="id")
+    args = p.parse_args(argv)
+
+    report_fmt = args.report_format or ("html" if args.output.lower().endswith((".html", ".htm")) else "md")
+    in_fh = _open_text(args.input, "r")
+    out_fh = _open_text(args.output, "w")
+    try:
+        records = iter_records(in_fh, detect_format(args.input, args.format),
+                               args.planets_field, args.cusps_field, args.id_field)
+        summary = write_report(records, out_fh, report_fmt, args.root, args.workers, args.chunk_size,
+                               args.ruler_system, not args.no_fallback, args.patterns, args.rehouse, args.dignity)
+    finally:
+        if in_fh is not sys.stdin:
+            in_fh.close()
+        if out_fh is not sys.stdout:
+            out_fh.close()
+
+    print(f"{summary['charts']} charts, {summary['chars']} chars in {summary['seconds']}s "
+          f"({summary['charts_per_sec']} charts/sec)", file=sys.stderr)
+    return summary
+
+if __name__ == "__main__":
+    main()
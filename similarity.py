@@ -0,0 +1,350 @@
+"""
+Nearest-neighbour chart search over a ChartStore.
+
+Each chart is embedded as (cos λ, sin λ) per body in BODIES order, with zeros
+for absent bodies, so 359° and 1° are neighbours: between two charts with the
+same bodies the squared distance is the sum over bodies of 2 - 2·cos(Δλ).
+
+The index is an IVF (inverted file):
+  - k-means centroids are trained on a sample, and each chart goes in the list
+    of its nearest centroid
+  - a top-k query ranks exact distances only inside the `nprobe` lists closest
+    to the query
+
+Filters such as "Jüpiter.house=10" and "Jüpiter.score>=75" are answered from
+per-body postings: rows sorted by house, by sign and by ruler-strength score.
+Only the most selective condition is expanded. The other conditions are
+checked on those rows alone, and the survivors are ranked exactly, so a
+filtered query never scans the corpus.
+
+Scores are compute_ruler_strength() per body (base + house + rulership +
+aspects) under one ruler system and dignity model. Aspects come from the store's packed aspect
+lists, summed in the same order as AspectIndex.
+
+    python similarity.py STORE --build
+    python similarity.py STORE --query-row 42 --k 10 --where "Jüpiter.house=10" --where "Jüpiter.score>=75"
+"""
+import argparse
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from compact import BODIES, BODY_TO_ID
+from engine import (
+    ASPECT_WEIGHT_ORBS, ASPECT_WEIGHTS, DEFAULT_DIGNITY, DIGNITY_MODELS, RULERS_MODERN, RULERS_TRAD, SIGN_TO_IDX,
+    house_score, normalize_planet, normalize_sign,
+)
+from store import ASPECT_NAMES, ChartStore
+from vectorized import pairwise_aspects, py_round, rulership_scores_batch
+
+P = len(BODIES)
+BLOCK = 65536
+FIELDS = ("house", "sign", "score")
+_OPS = {"=": np.equal, ">=": np.greater_equal, "<=": np.less_equal, ">": np.greater, "<": np.less}
+_WHERE_RE = re.compile(r"^\s*(?P<body>[^.]+?)\s*\.\s*(?P<field>\w+)\s*(?P<op>>=|<=|=|>|<)\s*(?P<value>.+?)\s*$")
+
+# =========================
+# EMBEDDING
+# =========================
+def embed(lons: np.ndarray) -> np.ndarray:
+    """(N × P) longitudes, NaN = absent → (N × 2P) float32 [cos..., sin...]."""
+    rad = np.radians(np.asarray(lons, dtype=np.float64))
+    present = ~np.isnan(rad)
+    rad = np.where(present, rad, 0.0)
+    return np.concatenate([np.where(present, np.cos(rad), 0.0),
+                           np.where(present, np.sin(rad), 0.0)], axis=1).astype(np.float32)
+
+def embed_planets(planets: dict) -> np.ndarray:
+    """Embedding of one engine planets dict (bodies outside BODIES are ignored)."""
+    lons = np.full((1, P), np.nan)
+    for name, pos in planets.items():
+        b = BODY_TO_ID.get(name)
+        if b is not None:
+            lons[0, b] = pos["lon"]
+    return embed(lons)[0]
+
+def _sq_dist(x: np.ndarray, c: np.ndarray, c_norm: np.ndarray) -> np.ndarray:
+    """Squared distances (len(x) × len(c)); |x|² is left out, it does not change the ranking."""
+    return c_norm[None, :] - 2.0 * (x @ c.T)
+
+def _nearest(x: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """Index of the nearest row of `c` for every row of `x`, in blocks of ~16M distances."""
+    c = c.astype(np.float64)
+    c_norm = (c ** 2).sum(axis=1)
+    step = max(1, (1 << 24) // len(c))
+    return np.concatenate([
+        _sq_dist(x[s:s + step].astype(np.float64), c, c_norm).argmin(axis=1) for s in range(0, len(x), step)
+    ]).astype(np.int32)
+
+# =========================
+# SCORES
+# =========================
+def strength_scores(store: ChartStore, rulers_map: dict, block: int = BLOCK,
+                    dignity: str = DEFAULT_DIGNITY) -> np.ndarray:
+    """
+    compute_ruler_strength() score for every (chart, body) as float32, NaN = absent.
+    Without stored aspects they are recomputed from the float32 longitudes, so
+    orbs can differ from the text parse in the last digit. Stored aspects keep
+    only their type, so they are weighted without luminary orb factors.
+    """
+    n = len(store)
+    house_pts = np.array([house_score(h) for h in range(13)], dtype=np.float64)
+    body_idx = np.arange(P)[None, :]
+
+    asp = np.zeros((n, P), dtype=np.float64)
+    if store.with_aspects and n:
+        chart, recs = store.all_aspects()
+        weight = np.array([ASPECT_WEIGHTS.get(name, 0.0) for name in ASPECT_NAMES], dtype=np.float64)
+        limit = np.array([ASPECT_WEIGHT_ORBS.get(name, 6.0) for name in ASPECT_NAMES], dtype=np.float64)
+        w = weight[recs["type"]] * np.maximum(0.0, 1.0 - (recs["orb"] / 100) / limit[recs["type"]])
+        # p1 then p2 per aspect, in list order: the same float additions as AspectIndex.scores
+        np.add.at(asp, (np.repeat(chart, 2), np.stack([recs["p1"], recs["p2"]], axis=1).ravel()), np.repeat(w, 2))
+    elif n:
+        weight = np.array([ASPECT_WEIGHTS.get(name, 0.0) for name in ASPECT_NAMES], dtype=np.float64)
+        c = pairwise_aspects(np.asarray(store.lons, dtype=np.float64), block)
+        w = weight[c["type"]] * np.maximum(0.0, 1.0 - py_round(c["orb"], 2) / c["limit"])
+        np.add.at(asp, (np.repeat(c["chart"], 2), np.stack([c["i"], c["j"]], axis=1).ravel()), np.repeat(w, 2))
+
+    out = np.empty((n, P), dtype=np.float32)
+    for start in range(0, n, block):
+        sl = slice(start, start + block)
+        rul = rulership_scores_batch(body_idx, store.signs[sl], rulers_map, dignity)
+        h = store.houses[sl]
+        raw = 50 + house_pts[np.where(h <= 12, h, 0)] + rul + asp[sl]   # house_score() is 0 outside 1-12
+        score = py_round(np.clip(raw, 0, 100), 1)
+        out[sl] = np.where(store.order[sl] != 255, score, np.nan)
+    return out
+
+# =========================
+# FILTERS
+# =========================
+def parse_where(text: str) -> tuple:
+    """
+    "Jüpiter.house=10" → (body id, "house", "=", 10).
+    Fields: house (1-12), sign (name, any alias), score (0-100); ops = >= <= > <.
+    """
+    m = _WHERE_RE.match(text)
+    if not m:
+        raise ValueError(f"filter must look like 'Body.field>=value': {text!r}")
+    body = normalize_planet(m["body"])
+    if body not in BODY_TO_ID:
+        raise ValueError(f"unknown body in filter: {m['body']!r}")
+    field, op, value = m["field"].lower(), m["op"], m["value"]
+    if field not in FIELDS:
+        raise ValueError(f"filter field must be one of {', '.join(FIELDS)}: {text!r}")
+    if field == "sign":
+        sign = normalize_sign(value)
+        if sign is None or op != "=":
+            raise ValueError(f"sign filters need '=' and a sign name: {text!r}")
+        value = SIGN_TO_IDX[sign]
+    else:
+        value = float(value) if field == "score" else int(value)
+    return BODY_TO_ID[body], field, op, value
+
+class SimilarityIndex:
+    """IVF over chart embeddings plus per-body house/sign/score postings."""
+
+    ARRAYS = ("vectors", "centroids", "list_rows", "list_offsets", "assign",
+              "houses", "signs", "scores", "house_rows", "house_offsets",
+              "sign_rows", "sign_offsets", "score_rows", "score_sorted")
+
+    def __init__(self, arrays: dict, meta: dict):
+        self.meta = meta
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+        self.c_norm = (self.centroids.astype(np.float64) ** 2).sum(axis=1)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    # ---------- build ----------
+    @classmethod
+    def build(cls, store: ChartStore, nlist: int | None = None, ruler_system: str = "Modern",
+              iters: int = 10, sample: int | None = None, seed: int = 0, dignity: str = DEFAULT_DIGNITY):
+        """
+        nlist defaults to √N lists; k-means runs `iters` rounds on `sample`
+        charts (default 64 per list). dignity: essential-dignity model of the scores.
+        """
+        n = len(store)
+        if n == 0:
+            raise ValueError("store is empty")
+        rng = np.random.default_rng(seed)
+        nlist = int(min(n, nlist or max(1, round(np.sqrt(n)))))
+        vectors = np.concatenate([embed(store.lons[s:s + BLOCK]) for s in range(0, n, BLOCK)])
+
+        # k-means on a sample; empty clusters are reseeded from random sample points
+        train = vectors[rng.choice(n, min(n, max(sample or 64 * nlist, nlist)), replace=False)].astype(np.float64)
+        centroids = train[rng.choice(len(train), nlist, replace=False)]
+        for _ in range(iters):
+            near = _nearest(train, centroids)
+            counts = np.bincount(near, minlength=nlist)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, near, train)
+            empty = counts == 0
+            centroids = np.where(empty[:, None], train[rng.integers(0, len(train), nlist)],
+                                 sums / np.maximum(counts, 1)[:, None])
+        centroids = centroids.astype(np.float32)
+
+        assign = _nearest(vectors, centroids)
+        list_rows, list_offsets = _postings(assign, nlist)
+
+        houses = np.array(store.houses)
+        signs = np.where(np.array(store.order) != 255, np.array(store.signs), 255).astype(np.uint8)
+        rulers_map = RULERS_MODERN if ruler_system == "Modern" else RULERS_TRAD
+        scores = strength_scores(store, rulers_map, dignity=dignity)
+
+        house_rows, house_offsets = zip(*(_postings(houses[:, b], 13) for b in range(P)))
+        sign_rows, sign_offsets = zip(*(_postings(signs[:, b], 256) for b in range(P)))
+        # NaN (absent body) sorts last; searches stop before it
+        score_rows = np.stack([np.argsort(scores[:, b], kind="stable").astype(np.int32) for b in range(P)])
+        score_sorted = np.take_along_axis(scores.T, score_rows, axis=1)
+
+        arrays = {
+            "vectors": vectors, "centroids": centroids,
+            "list_rows": list_rows, "list_offsets": list_offsets, "assign": assign,
+            "houses": houses, "signs": signs, "scores": scores,
+            "house_rows": np.stack(house_rows), "house_offsets": np.stack(house_offsets),
+            "sign_rows": np.stack(sign_rows), "sign_offsets": np.stack(sign_offsets),
+            "score_rows": score_rows, "score_sorted": score_sorted,
+        }
+        meta = {"version": 1, "charts": n, "nlist": nlist, "ruler_system": ruler_system, "dignity": dignity,
+                "bodies": BODIES}
+        return cls(arrays, meta)
+
+    # ---------- persistence ----------
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str):
+        """Memory-map a saved index; opening costs the same for any corpus size."""
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["bodies"] != BODIES:
+            raise ValueError(f"{path}: index was built with a different body table")
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in cls.ARRAYS}
+        return cls(arrays, meta)
+
+    def nbytes(self) -> dict:
+        return {name: int(getattr(self, name).nbytes) for name in self.ARRAYS}
+
+    # ---------- query ----------
+    def filter_rows(self, where: list) -> np.ndarray:
+        """Rows matching every (body, field, op, value) condition, ascending."""
+        if not where:
+            return np.arange(len(self), dtype=np.int32)
+        spans = [self._posting(c) for c in where]
+        first = min(range(len(where)), key=lambda i: len(spans[i]))
+        rows = np.sort(spans[first])
+        for i, (b, field, op, value) in enumerate(where):
+            if i != first:
+                col = {"house": self.houses, "sign": self.signs, "score": self.scores}[field]
+                rows = rows[_OPS[op](col[rows, b], value)]
+        return rows
+
+    def _posting(self, cond: tuple) -> np.ndarray:
+        """Rows for one condition (unsorted): a slice of one postings array, found by binary search."""
+        b, field, op, value = cond
+        if field == "score":
+            col = self.score_sorted[b]  # ascending, NaN (absent) last
+            left, right = np.searchsorted(col, value, "left"), np.searchsorted(col, value, "right")
+            end = np.searchsorted(col, np.inf, "right")
+            lo, hi = {"=": (left, right), ">=": (left, end), ">": (right, end), "<=": (0, right), "<": (0, left)}[op]
+            return self.score_rows[b, lo:hi]
+        if field == "sign":
+            lo, hi = value, value + 1
+            return self.sign_rows[b, self.sign_offsets[b, lo]:self.sign_offsets[b, hi]]
+        # house 0 (unknown) never matches
+        lo, hi = {"=": (value, value + 1), ">=": (value, 13), ">": (value + 1, 13),
+                  "<=": (1, value + 1), "<": (1, value)}[op]
+        lo = min(max(lo, 1), 13)
+        hi = min(max(hi, lo), 13)
+        return self.house_rows[b, self.house_offsets[b, lo]:self.house_offsets[b, hi]]
+
+    def search(self, query: np.ndarray, k: int = 10, nprobe: int = 8, where: list | None = None,
+               max_exact: int = 200000) -> list:
+        """
+        Top-k (row, distance) for one embedding, nearest first.
+        Filtered queries rank all matching rows exactly when there are at most
+        `max_exact` of them, otherwise only those in the probed lists.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        near = _sq_dist(query[None, :].astype(np.float64), self.centroids.astype(np.float64), self.c_norm)[0]
+        probe = np.argpartition(near, min(nprobe, len(near)) - 1)[:nprobe]
+
+        if where:
+            rows = self.filter_rows(where)
+            if len(rows) > max_exact:
+                rows = rows[np.isin(self.assign[rows], probe)]
+        else:
+            rows = np.concatenate([self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probe])
+        if len(rows) == 0:
+            return []
+
+        diff = self.vectors[rows].astype(np.float32) - query
+        dist = np.einsum("ij,ij->i", diff, diff)
+        top = np.argpartition(dist, min(k, len(dist)) - 1)[:k]
+        top = top[np.lexsort((rows[top], dist[top]))]
+        return [(int(rows[i]), float(dist[i])) for i in top]
+
+def _postings(keys: np.ndarray, n_keys: int):
+    """Rows grouped by key (ascending rows within a key) and n_keys+1 offsets."""
+    rows = np.argsort(keys, kind="stable").astype(np.int32)
+    offsets = np.zeros(n_keys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys.astype(np.int64), minlength=n_keys)[:n_keys], out=offsets[1:])
+    return rows, offsets
+
+def index_path(store_path: str) -> str:
+    return os.path.join(store_path, "similarity")
+
+# =========================
+# CLI
+# =========================
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Chart similarity search over a ChartStore.")
+    p.add_argument("store", help="ChartStore directory (see store.py)")
+    p.add_argument("--build", action="store_true", help="(re)build the index into STORE/similarity")
+    p.add_argument("--nlist", type=int, help="IVF lists (default √N)")
+    p.add_argument("--ruler-system", choices=["Modern", "Klasik"], default="Modern")
+    p.add_argument("--dignity", choices=list(DIGNITY_MODELS), default=DEFAULT_DIGNITY,
+                   help="essential dignities in the rulership points")
+    p.add_argument("--query-row", type=int, help="find charts similar to this store row")
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--nprobe", type=int, default=8)
+    p.add_argument("--where", action="append", default=[], help='e.g. "Jüpiter.house=10", "Jüpiter.score>=75"')
+    args = p.parse_args(argv)
+
+    store = ChartStore(args.store)
+    path = index_path(args.store)
+    if args.build:
+        t0 = time.perf_counter()
+        index = SimilarityIndex.build(store, args.nlist, args.ruler_system, dignity=args.dignity)
+        index.save(path)
+        mb = sum(index.nbytes().values()) / 2 ** 20
+        print(f"built {len(index)} charts, {index.meta['nlist']} lists in {time.perf_counter() - t0:.2f}s, {mb:.1f} MiB")
+    index = SimilarityIndex.load(path)
+    if index.meta["charts"] != len(store):
+        print(f"warning: index covers {index.meta['charts']} of {len(store)} charts, rebuild with --build")
+
+    where = [parse_where(w) for w in args.where]
+    if args.query_row is not None:
+        t0 = time.perf_counter()
+        hits = index.search(index.vectors[args.query_row], args.k, args.nprobe, where)
+        ms = (time.perf_counter() - t0) * 1000
+        for row, dist in hits:
+            print(json.dumps({"row": row, "distance": round(dist, 4)}))
+        print(f"{len(hits)} hits in {ms:.2f} ms")
+    elif where:
+        t0 = time.perf_counter()
+        rows = index.filter_rows(where)
+        print(f"{len(rows)} charts match in {(time.perf_counter() - t0) * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Persistent columnar store of parsed charts, memory-mapped on open.
+
+A store is a directory of fixed-width column files, one row per chart, in
+BODIES order (see compact.py):
+
+    hash.bin     16 B   blake2b of (planets text, cusps text), the row key
+    lon.f4       P×4 B  float32 longitudes, NaN = body absent
+    sign.u1      P B    sign ids
+    house.u1     P B    houses (0 = unknown)
+    order.u1     P B    body position in the original chart (255 = absent)
+    retro.u4     4 B    retrograde bitmask by body id
+    cusp.u1      12 B   cusp sign ids (255 = missing)
+    cusp_lon.f4  12×4 B float32 cusp longitudes (NaN = missing), for re-housing
+    asp.bin / asp.off   optional packed aspect lists + uint64 row offsets
+
+Opening only maps the files, so it costs the same for 10 or 10M charts.
+Column properties (lons, houses, ...) are read-only np.memmap views, with no
+copies. Appends write to the end of each file, and hash.bin is written last,
+so a torn append is trimmed on the next open. One writer at a time.
+find() binary-searches a sorted copy of the hash column, built on first use,
+plus a dict of the rows appended since, so parse-once ingestion stays
+O(N log N). Bodies outside BODIES are not stored.
+"""
+import json
+import os
+
+import numpy as np
+
+from cache import content_key
+from compact import BODIES, BODY_TO_ID
+from engine import (
+    ASPECTS_DEF, MINOR_ASPECTS_DEF, SIGNS, SIGN_TO_IDX,
+    parse_planets_from_text, parse_house_cusps_from_text, parse_cusp_longitudes, compute_aspect_index,
+    houses_from_cusps,
+)
+
+# stored type ids; append-only, so stores written with a shorter list stay readable
+ASPECT_NAMES = [name for name, _, _ in ASPECTS_DEF + MINOR_ASPECTS_DEF]
+ASPECT_TO_ID = {n: i for i, n in enumerate(ASPECT_NAMES)}
+P = len(BODIES)
+ABSENT = 255
+_ASP_DTYPE = np.dtype([("p1", "u1"), ("p2", "u1"), ("type", "u1"), ("orb", "<u2")])
+
+# name → (dtype, values per row)
+COLUMNS = {
+    "hash": (np.dtype("u1"), 16),
+    "lon": (np.dtype("<f4"), P),
+    "sign": (np.dtype("u1"), P),
+    "house": (np.dtype("u1"), P),
+    "order": (np.dtype("u1"), P),
+    "retro": (np.dtype("<u4"), 1),
+    "cusp": (np.dtype("u1"), 12),
+    "cusp_lon": (np.dtype("<f4"), 12),
+}
+_FILES = {"hash": "hash.bin", "lon": "lon.f4", "sign": "sign.u1", "house": "house.u1",
+          "order": "order.u1", "retro": "retro.u4", "cusp": "cusp.u1", "cusp_lon": "cusp_lon.f4"}
+# value of an empty cell, where it is not 0; also backfills columns added to older stores
+_FILL = {"lon": np.nan, "order": ABSENT, "cusp": ABSENT, "cusp_lon": np.nan}
+
+def chart_key(planets_text: str, cusps_text: str = "") -> bytes:
+    return bytes.fromhex(content_key("chart", planets_text, cusps_text))
+
+class ChartStore:
+    def __init__(self, path: str, with_aspects: bool = True):
+        """Open (or create) the store at `path`."""
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["bodies"] != BODIES or meta["aspects"] != ASPECT_NAMES[:len(meta["aspects"])]:
+                raise ValueError(f"{path}: store was written with a different body/aspect table")
+            self.with_aspects = meta["with_aspects"]
+        else:
+            self.with_aspects = with_aspects
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "bodies": BODIES, "aspects": ASPECT_NAMES,
+                           "with_aspects": with_aspects}, f, ensure_ascii=False)
+        self._maps = {}
+        self._index = None  # (first hash words, second words, rows), sorted; covers rows < _indexed
+        self._indexed = 0
+        self._tail = {}     # key → row for rows appended after the index was built
+        self._trim()
+
+    # ---------- layout ----------
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, _FILES.get(name, name))
+
+    def _row_bytes(self, name: str) -> int:
+        dtype, width = COLUMNS[name]
+        return dtype.itemsize * width
+
+    def __len__(self):
+        f = self._file("hash")
+        return os.path.getsize(f) // 16 if os.path.exists(f) else 0
+
+    def _trim(self):
+        """Cut every column back to len(self) rows (undo a torn append)."""
+        n = len(self)
+        for name in COLUMNS:
+            f = self._file(name)
+            want = n * self._row_bytes(name)
+            if not os.path.exists(f):
+                dtype, width = COLUMNS[name]
+                with open(f, "wb") as fh:
+                    fh.write(np.full((n, width), _FILL.get(name, 0), dtype).tobytes())
+            elif os.path.getsize(f) != want:
+                os.truncate(f, want)
+        if self.with_aspects:
+            off = self._file("asp.off")
+            if not os.path.exists(off) or os.path.getsize(off) < 8:
+                with open(off, "wb") as fh:
+                    fh.write(np.zeros(1, "<u8").tobytes())
+            os.truncate(off, (n + 1) * 8)
+            end = int(np.fromfile(off, "<u8", count=1, offset=n * 8)[0])
+            blob = self._file("asp.bin")
+            if not os.path.exists(blob):
+                open(blob, "wb").close()
+            os.truncate(blob, end)
+        self._index, self._tail = None, {}
+
+    def _map(self, name: str):
+        """np.memmap view of a column, shape (N, width); cached until the next append."""
+        m = self._maps.get(name)
+        if m is None:
+            n = len(self)
+            dtype, width = COLUMNS[name]
+            if n == 0:
+                m = np.zeros((0, width), dtype)
+            else:
+                m = np.memmap(self._file(name), dtype=dtype, mode="r", shape=(n, width))
+            self._maps[name] = m
+        return m
+
+    # ---------- columns (zero-copy) ----------
+    @property
+    def hashes(self):
+        return self._map("hash")
+
+    @property
+    def lons(self):
+        return self._map("lon")
+
+    @property
+    def signs(self):
+        return self._map("sign")
+
+    @property
+    def houses(self):
+        return self._map("house")
+
+    @property
+    def order(self):
+        return self._map("order")
+
+    @property
+    def retro(self):
+        return self._map("retro")[:, 0]
+
+    @property
+    def cusps(self):
+        return self._map("cusp")
+
+    @property
+    def cusp_lons(self):
+        return self._map("cusp_lon")
+
+    # ---------- write ----------
+    def append(self, planets: dict, cusps: dict, key: bytes, aspects: list | None = None,
+               cusp_lons: dict | None = None) -> int:
+        """Append one chart; returns its row."""
+        return self.append_many([(planets, cusps, key, aspects, cusp_lons)])[0]
+
+    def append_many(self, charts) -> list[int]:
+        """
+        Append (planets, cusps, key, aspects[, cusp_lons]) tuples in one write
+        per column; cusp_lons is parse_cusp_longitudes() output.
+        """
+        charts = list(charts)
+        n0 = len(self)
+        k = len(charts)
+        cols = {name: np.full((k, w), _FILL.get(name, 0), dt) for name, (dt, w) in COLUMNS.items()}
+        blobs = []
+
+        for r, (planets, cusps, key, aspects, *rest) in enumerate(charts):
+            cols["hash"][r] = np.frombuffer(key, "u1")
+            retro = 0
+            for pos_idx, (name, pos) in enumerate(planets.items()):
+                b = BODY_TO_ID.get(name)
+                if b is None:
+                    continue
+                cols["lon"][r, b] = pos["lon"]
+                cols["sign"][r, b] = SIGN_TO_IDX[pos["sign"]]
+                cols["house"][r, b] = pos.get("house") or 0
+                cols["order"][r, b] = pos_idx
+                if pos.get("retro"):
+                    retro |= 1 << b
+            cols["retro"][r, 0] = retro
+            for h, sign in cusps.items():
+                cols["cusp"][r, h - 1] = SIGN_TO_IDX[sign]
+            for h, lon in (rest[0] if rest and rest[0] else {}).items():
+                cols["cusp_lon"][r, h - 1] = lon
+            if self.with_aspects:
+                recs = [
+                    (BODY_TO_ID[a["p1"]], BODY_TO_ID[a["p2"]], ASPECT_TO_ID[a["type"]], int(round(a["orb"] * 100)))
+                    for a in (aspects or [])
+                    if a["p1"] in BODY_TO_ID and a["p2"] in BODY_TO_ID
+                ]
+                blobs.append(np.array(recs, _ASP_DTYPE).tobytes())
+
+        if self.with_aspects:
+            end = int(np.fromfile(self._file("asp.off"), "<u8", count=1, offset=n0 * 8)[0])
+            offs = end + np.cumsum([len(b) for b in blobs], dtype=np.uint64)
+            with open(self._file("asp.bin"), "ab") as f:
+                f.write(b"".join(blobs))
+            with open(self._file("asp.off"), "ab") as f:
+                f.write(offs.astype("<u8").tobytes())
+        for name in COLUMNS:
+            if name == "hash":
+                continue
+            with open(self._file(name), "ab") as f:
+                f.write(cols[name].tobytes())
+        # the hash column defines the row count, so it goes last
+        with open(self._file("hash"), "ab") as f:
+            f.write(cols["hash"].tobytes())
+
+        self._maps.clear()
+        if self._index is not None:
+            for r, (_, _, key, *_) in enumerate(charts):
+                self._tail.setdefault(bytes(key), n0 + r)
+            if len(self._tail) > max(1024, self._indexed // 4):
+                self._index, self._tail = None, {}  # re-sorted on the next find(), amortized O(log N)
+        return list(range(n0, n0 + k))
+
+    # ---------- read ----------
+    def _sorted_index(self):
+        """The hash column sorted by (word 0, word 1); stable, so a repeated key gives its first row."""
+        if self._index is None:
+            words = self.hashes.view("<u8")
+            rows = np.lexsort((words[:, 1], words[:, 0]))
+            self._index = (np.ascontiguousarray(words[rows, 0]), np.ascontiguousarray(words[rows, 1]), rows)
+            self._indexed = len(words)
+            self._tail = {}
+        return self._index
+
+    def find(self, key: bytes) -> int | None:
+        """
+        First row for a chart key, or None: a binary search in the sorted hash
+        index, then the rows appended since it was built.
+        """
+        w0, w1, rows = self._sorted_index()
+        want = np.frombuffer(key, "<u8")
+        lo, hi = np.searchsorted(w0, want[0], "left"), np.searchsorted(w0, want[0], "right")
+        if lo < hi:
+            i = lo + np.searchsorted(w1[lo:hi], want[1], "left")
+            if i < hi and w1[i] == want[1]:
+                return int(rows[i])
+        return self._tail.get(bytes(key))
+
+    def planets(self, row: int) -> dict:
+        """Rebuild the engine planets dict for a row (original body order)."""
+        order = self.order[row]
+        lons, signs, houses = self.lons[row], self.signs[row], self.houses[row]
+        retro = int(self.retro[row])
+        planets = {}
+        for b in sorted(np.nonzero(order != ABSENT)[0].tolist(), key=lambda b: order[b]):
+            lon = float(lons[b])
+            sid = int(signs[b])
+            planets[BODIES[b]] = {
+                "sign": SIGNS[sid],
+                "deg": max(0.0, lon - sid * 30.0),
+                "house": int(houses[b]) or None,
+                "lon": lon,
+                "retro": bool(retro >> b & 1),
+            }
+        return planets
+
+    def cusp_signs(self, row: int) -> dict:
+        return {h + 1: SIGNS[s] for h, s in enumerate(self.cusps[row].tolist()) if s != ABSENT}
+
+    def cusp_longitudes(self, row: int) -> dict:
+        """{house: lon} like parse_cusp_longitudes (float32 precision), for houses_from_cusps."""
+        return {h + 1: lon for h, lon in enumerate(self.cusp_lons[row].tolist()) if lon == lon}
+
+    def aspects(self, row: int) -> list | None:
+        """Stored aspect list for a row, or None if the store has no aspects."""
+        if not self.with_aspects:
+            return None
+        off = np.memmap(self._file("asp.off"), dtype="<u8", mode="r", offset=row * 8, shape=(2,))
+        start, end = int(off[0]), int(off[1])
+        if end == start:
+            return []
+        recs = np.memmap(self._file("asp.bin"), dtype=_ASP_DTYPE, mode="r",
+                         offset=start, shape=((end - start) // _ASP_DTYPE.itemsize,))
+        return [
+            {"p1": BODIES[p1], "p2": BODIES[p2], "type": ASPECT_NAMES[t], "orb": o / 100}
+            for p1, p2, t, o in recs.tolist()
+        ]
+
+    def all_aspects(self):
+        """
+        Every stored aspect in row order, for column-wise passes over the corpus.
+        Returns (row per aspect int64, records memmap with p1/p2/type/orb).
+        """
+        n = len(self)
+        if not self.with_aspects or n == 0:
+            return np.zeros(0, np.int64), np.zeros(0, _ASP_DTYPE)
+        off = np.memmap(self._file("asp.off"), dtype="<u8", mode="r", shape=(n + 1,))
+        size = _ASP_DTYPE.itemsize
+        rows = np.repeat(np.arange(n, dtype=np.int64), (np.diff(off) // size).astype(np.int64))
+        if len(rows) == 0:
+            return rows, np.zeros(0, _ASP_DTYPE)
+        return rows, np.memmap(self._file("asp.bin"), dtype=_ASP_DTYPE, mode="r", shape=(len(rows),))
+
+    def get_or_parse(self, planets_text: str, cusps_text: str = "") -> int:
+        """Parse-once: row for this text, parsing and appending it only if new."""
+        key = chart_key(planets_text, cusps_text)
+        row = self.find(key)
+        if row is not None:
+            return row
+        planets, _, _ = parse_planets_from_text(planets_text)
+        cusps, _ = parse_house_cusps_from_text(cusps_text)
+        cusp_lons, _ = parse_cusp_longitudes(cusps_text)
+        # house-less lines get their house from the cusp degrees, as in the app and batch.py
+        planets = houses_from_cusps(planets, cusp_lons)
+        aspects = compute_aspect_index(planets) if self.with_aspects and planets else None
+        return self.append(planets, cusps, key, aspects, cusp_lons)
@@ -0,0 +1,281 @@
+"""
+Columnar (Arrow) result tables.
+
+The dict path builds one nested dict per chart, per ruler and per aspect, and
+st.dataframe / JSON / Parquet each convert those again. Here the same results
+are built as pyarrow tables straight from NumPy columns:
+
+    charts     one row per chart: id, counts, errors, derived question columns
+    strengths  one row per (chart, ruler body present): score and its parts
+    aspects    one row per aspect: id, p1, p2, type, orb (dictionary-encoded)
+    matrix     the 144 rows of one chart's derive_matrix()
+
+Scores equal batch.score_parsed() / compute_ruler_strength(): aspects are
+oriented and ordered like engine.compute_aspects, orbs use Python rounding
+and aspect weights are summed in AspectIndex order. Only --patterns needs
+per-chart aspect lists (find_patterns works on them).
+
+Record ids are written as text. pyarrow comes with Streamlit; batch.py
+imports this module only for --parquet.
+
+    python batch.py charts.jsonl --parquet out/ --root 7 --n 5 --include-aspects
+"""
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from batch import house_charts, parse_record
+from engine import (
+    ASPECT_TR_LABEL, ASPECT_WEIGHTS, DEFAULT_ASPECT_TABLE, DEFAULT_DIGNITY, DIGNITY_BODY_IDX, RULERS_MODERN,
+    RULERS_TRAD, SIGN_TO_IDX, SIGNS, AspectIndex, aspect_nature, find_patterns, house_score, pattern_score_for,
+    score_label,
+)
+from vectorized import pairwise_aspects, py_round, rulership_scores_batch
+
+TABLES = ("charts", "strengths", "aspects")
+_HOUSE_PTS = np.array([house_score(h) for h in range(13)], dtype=np.int64)
+_SIGNS = pa.array(SIGNS)
+_SYSTEMS = pa.array(["Modern", "Klasik"])
+
+# =========================
+# LAYOUT
+# =========================
+def chart_columns(planets_list: list):
+    """
+    (N × P) arrays for planet dicts, P = union of bodies in first-seen order:
+    lon (NaN = absent), sign id, house (0 = unknown), order (position in the
+    chart's dict, -1 = absent). Returns (columns dict, bodies).
+    """
+    col = {}
+    for planets in planets_list:
+        for p in planets:
+            col.setdefault(p, len(col))
+    shape = (len(planets_list), len(col))
+    lon = np.full(shape, np.nan)
+    sign = np.zeros(shape, dtype=np.int64)
+    house = np.zeros(shape, dtype=np.int64)
+    order = np.full(shape, -1, dtype=np.int64)
+    for r, planets in enumerate(planets_list):
+        for k, (p, pos) in enumerate(planets.items()):
+            c = col[p]
+            lon[r, c] = pos["lon"]
+            sign[r, c] = SIGN_TO_IDX.get(pos["sign"], 0)
+            house[r, c] = pos.get("house") or 0
+            order[r, c] = k
+    return {"lon": lon, "sign": sign, "house": house, "order": order}, list(col)
+
+def ordered_aspects(cols: dict, bodies: list, table=None) -> dict:
+    """
+    pairwise_aspects() for chart_columns() output, with p1/p2 oriented and rows
+    ordered per chart exactly like engine.compute_aspects, and orbs rounded.
+    Returns parallel arrays chart, p1, p2 (body columns), type, orb, limit.
+    """
+    table = table or DEFAULT_ASPECT_TABLE
+    factors = [table.orb_factor(b) for b in bodies] if table.orb_factors else None
+    c = pairwise_aspects(cols["lon"], table=table, body_factors=factors)
+    chart = c["chart"]
+    pi, pj = cols["order"][chart, c["i"]], cols["order"][chart, c["j"]]
+    swap = pi > pj
+    p1 = np.where(swap, c["j"], c["i"])
+    p2 = np.where(swap, c["i"], c["j"])
+    idx = np.lexsort((np.maximum(pi, pj), np.minimum(pi, pj), chart))
+    return {"chart": chart[idx], "p1": p1[idx], "p2": p2[idx], "type": c["type"][idx],
+            "orb": py_round(c["orb"][idx], 2), "limit": c["limit"][idx]}
+
+def aspect_sums(asp: dict, shape: tuple, table=None) -> np.ndarray:
+    """AspectIndex.scores as an (N × P) array: weights added p1 then p2, aspect by aspect."""
+    names = (table or DEFAULT_ASPECT_TABLE).names
+    weight = np.array([ASPECT_WEIGHTS.get(n, 0.0) for n in names], dtype=np.float64)
+    w = weight[asp["type"]] * np.maximum(0.0, 1.0 - asp["orb"] / asp["limit"])
+    out = np.zeros(shape, dtype=np.float64)
+    np.add.at(out, (np.repeat(asp["chart"], 2), np.stack([asp["p1"], asp["p2"]], axis=1).ravel()), np.repeat(w, 2))
+    return out
+
+def _pattern_points(asp: dict, bodies: list, n: int, table=None) -> np.ndarray:
+    """pattern_score_for() per (chart, body); find_patterns needs each chart's aspect list."""
+    names = (table or DEFAULT_ASPECT_TABLE).names
+    per_chart = [[] for _ in range(n)]
+    for c, i, j, t, o in zip(*(asp[k].tolist() for k in ("chart", "p1", "p2", "type", "orb"))):
+        per_chart[c].append({"p1": bodies[i], "p2": bodies[j], "type": names[t], "orb": o})
+    out = np.zeros((n, len(bodies)), dtype=np.int64)
+    for c, recs in enumerate(per_chart):
+        found = find_patterns(recs)
+        for b in {b for p in found for b in p["bodies"]}:
+            out[c, bodies.index(b)] = pattern_score_for(b, found)
+    return out
+
+def strength_columns(cols: dict, bodies: list, aspect_pts: np.ndarray, rulers_map: dict,
+                     dignity: str = DEFAULT_DIGNITY, pattern_pts: np.ndarray | None = None) -> dict:
+    """compute_ruler_strength() score and parts for every (chart, body), as (N × P) arrays."""
+    known = np.array([b in DIGNITY_BODY_IDX for b in bodies], dtype=bool)
+    body_ids = np.array([DIGNITY_BODY_IDX.get(b, 0) for b in bodies], dtype=np.int64)
+    rul = np.where(known[None, :], rulership_scores_batch(body_ids[None, :], cols["sign"], rulers_map, dignity), 0)
+    h = cols["house"]
+    hs = _HOUSE_PTS[np.where(h <= 12, h, 0)]   # house_score() is 0 outside 1-12
+    raw = 50 + hs + rul.astype(np.int64) + aspect_pts
+    if pattern_pts is not None:
+        raw = raw + pattern_pts
+    return {"score": py_round(np.clip(raw, 0, 100), 1), "house": hs, "rulership": rul,
+            "aspects": py_round(aspect_pts, 1), "patterns": pattern_pts}
+
+# =========================
+# BATCH
+# =========================
+def _dict_array(indices: np.ndarray, values) -> pa.DictionaryArray:
+    return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int16()), values)
+
+def _nullable(values: np.ndarray, valid: np.ndarray) -> pa.Array:
+    return pa.array(values, mask=~valid)
+
+def score_chunk_arrow(chunk: list, ruler_system: str = "Modern", question=None, include_aspects: bool = False,
+                      rehouse: bool = False, patterns: bool = False, dignity: str = DEFAULT_DIGNITY) -> dict:
+    """
+    batch.score_chunk() as {table name: pa.RecordBatch} (TABLES), with the same
+    scores; "aspects" only with include_aspects. Picklable for the process pool.
+    """
+    parsed = [parse_record(*rec) for rec in chunk]
+    house_charts(parsed, rehouse)
+    n = len(parsed)
+    ids = pa.array([str(p["id"]) for p in parsed], pa.string())
+    cols, bodies = chart_columns([p["planets"] for p in parsed])
+    body_names = pa.array(bodies, pa.string())
+    present = cols["order"] >= 0
+    asp = ordered_aspects(cols, bodies)
+    aspect_pts = aspect_sums(asp, present.shape)
+    pattern_pts = _pattern_points(asp, bodies, n) if patterns else None
+
+    systems = {ruler_system: RULERS_MODERN if ruler_system == "Modern" else RULERS_TRAD}
+    strengths = strength_columns(cols, bodies, aspect_pts, systems[ruler_system], dignity, pattern_pts)
+
+    charts = {
+        "id": ids,
+        "planets": pa.array(present.sum(axis=1), pa.int16()),
+        "cusps": pa.array([len(p["cusps"]) for p in parsed], pa.int8()),
+        "aspect_count": pa.array(np.bincount(asp["chart"], minlength=n), pa.int32()),
+        "errors": pa.array([p["errors"] for p in parsed], pa.int32()),
+    }
+    if question:
+        charts.update(_derived_columns(parsed, cols, bodies, present, question, ruler_system, strengths,
+                                       aspect_pts, pattern_pts, dignity))
+
+    # strength rows for the ruler bodies of this system, chart-major like score_parsed's dict
+    col = {b: i for i, b in enumerate(bodies)}
+    ruler_cols = np.array([col[r] for r in sorted(set(systems[ruler_system].values())) if r in col], dtype=np.int64)
+    rows, k = np.nonzero(present[:, ruler_cols])
+    c = ruler_cols[k]
+    strength = {
+        "id": ids.take(pa.array(rows)),
+        "ruler": _dict_array(c, body_names),
+        "score": pa.array(strengths["score"][rows, c]),
+        "house": pa.array(strengths["house"][rows, c], pa.int8()),
+        "rulership": pa.array(strengths["rulership"][rows, c], pa.int8()),
+        "aspects": pa.array(strengths["aspects"][rows, c]),
+    }
+    if patterns:
+        strength["patterns"] = pa.array(strengths["patterns"][rows, c], pa.int8())
+
+    out = {"charts": pa.RecordBatch.from_pydict(charts), "strengths": pa.RecordBatch.from_pydict(strength)}
+    if include_aspects:
+        names = pa.array(DEFAULT_ASPECT_TABLE.names, pa.string())
+        out["aspects"] = pa.RecordBatch.from_pydict({
+            "id": ids.take(pa.array(asp["chart"])),
+            "p1": _dict_array(asp["p1"], body_names),
+            "p2": _dict_array(asp["p2"], body_names),
+            "type": _dict_array(asp["type"], names),
+            "orb": pa.array(asp["orb"]),
+        })
+    return out
+
+def _derived_columns(parsed, cols, bodies, present, question, ruler_system, strengths, aspect_pts, pattern_pts,
+                     dignity) -> dict:
+    """derive() per chart (allow_fallback=True), as columns; fallback rulers are scored under the other system."""
+    root_house, q_n = (int(x) for x in question)
+    n = len(parsed)
+    root_sign = np.array([SIGN_TO_IDX[p["cusps"].get(root_house, SIGNS[root_house - 1])] for p in parsed],
+                         dtype=np.int64)
+    ov = (root_sign + (q_n - 1)) % 12
+    alt_system = "Klasik" if ruler_system == "Modern" else "Modern"
+    maps = {"Modern": RULERS_MODERN, "Klasik": RULERS_TRAD}
+    col = {b: i for i, b in enumerate(bodies)}
+
+    def ruler_of(system):
+        names = [maps[system][s] for s in SIGNS]
+        body_col = np.array([col.get(r, -1) for r in names], dtype=np.int64)[ov]
+        has = (body_col >= 0) & present[np.arange(n), np.maximum(body_col, 0)]
+        return np.array(names, dtype=object)[ov], body_col, has
+
+    r1, c1, has1 = ruler_of(ruler_system)
+    r2, c2, has2 = ruler_of(alt_system)
+    fallback = ~has1 & has2
+    rows = np.arange(n)
+    score = np.where(has1, strengths["score"][rows, np.maximum(c1, 0)], np.nan)
+    if fallback.any():
+        alt = strength_columns(cols, bodies, aspect_pts, maps[alt_system], dignity, pattern_pts)
+        score = np.where(fallback, alt["score"][rows, np.maximum(c2, 0)], score)
+    return {
+        "result_house": pa.array(np.full(n, (root_house - 1 + q_n - 1) % 12 + 1), pa.int8()),
+        "ov_sign": _dict_array(ov, _SIGNS),
+        "ruler": pa.array(np.where(fallback, r2, r1).tolist(), pa.string()),
+        "used_system": _dict_array(fallback.astype(np.int64) if ruler_system == "Modern" else
+                                   (~fallback).astype(np.int64), _SYSTEMS),
+        "score": _nullable(score, has1 | fallback),
+    }
+
+class ParquetSink:
+    """One Parquet file per table in `out_dir`, one row group per written chunk."""
+
+    def __init__(self, out_dir: str, compression: str = "zstd"):
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.compression = compression
+        self._writers = {}
+
+    def write(self, batches: dict):
+        for name, batch in batches.items():
+            w = self._writers.get(name)
+            if w is None:
+                path = os.path.join(self.out_dir, f"{name}.parquet")
+                w = self._writers[name] = pq.ParquetWriter(path, batch.schema, compression=self.compression)
+            w.write_batch(batch)
+
+    def close(self):
+        for w in self._writers.values():
+            w.close()
+        self._writers = {}
+
+# =========================
+# APP
+# =========================
+def ruler_aspects_table(aspects: AspectIndex, ruler: str) -> pa.Table:
+    """The ruler's aspects, closest orb first, as the app's aspect panel shows them."""
+    asps = aspects.for_body(ruler)
+    types = [a["type"] for a in asps]
+    return pa.table({
+        "diğer": [a["p2"] if a["p1"] == ruler else a["p1"] for a in asps],
+        "açı": [ASPECT_TR_LABEL.get(t, t) for t in types],
+        "doğa": [aspect_nature(t) for t in types],
+        "orb": pa.array([a["orb"] for a in asps], pa.float64()),
+    })
+
+def matrix_table(matrix: dict) -> pa.Table:
+    """engine.matrix_rows() as one Arrow table."""
+    cells = list(matrix.items())
+    scores = [d["strength"]["score"] for _, d in cells]
+    return pa.table({
+        "kök ev": pa.array([k[0] for k, _ in cells], pa.int8()),
+        "n": pa.array([k[1] for k, _ in cells], pa.int8()),
+        "sonuç ev": pa.array([d["result_house"] for _, d in cells], pa.int8()),
+        "bindirme": [d["ov_sign"] for _, d in cells],
+        "yönetici": [d["ruler"] for _, d in cells],
+        "sistem": [d["used_system"] for _, d in cells],
+        "skor": pa.array(scores, pa.float64()),
+        "etiket": [score_label(s) for s in scores],
+    })
+
+def to_parquet(table: pa.Table, compression: str = "zstd") -> bytes:
+    """A table as Parquet file bytes, e.g. for st.download_button."""
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink, compression=compression)
+    return sink.getvalue().to_pybytes()
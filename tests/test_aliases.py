@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+from engine import ALIASES_PATH, normalize_planet, normalize_sign, parse_house_cusps_from_text, parse_planets_from_text
+
+with open(ALIASES_PATH, encoding="utf-8") as f:
+    ALIASES = json.load(f)
+
+LANGS = sorted(set(ALIASES["signs"]) | set(ALIASES["planets"]))
+
+@pytest.mark.parametrize("lang", LANGS)
+def test_sign_aliases_parse_from_pasted_text(lang):
+    for alias, sign in ALIASES["signs"].get(lang, {}).items():
+        assert normalize_sign(alias) == sign, alias
+        planets, errors, ignored = parse_planets_from_text(f"Sun: {alias} 4°26’10’’  end of 7  Direct")
+        assert planets["Güneş"]["sign"] == sign, (alias, errors, ignored)
+        planets, _, ignored = parse_planets_from_text(f"Sun: {alias} 4°26’10’’  Direct")
+        assert planets["Güneş"]["sign"] == sign, (alias, ignored)
+        cusps, errors = parse_house_cusps_from_text(f"3: {alias} 2°50’49’’")
+        assert cusps == {3: sign}, (alias, errors)
+
+@pytest.mark.parametrize("lang", LANGS)
+def test_planet_aliases_parse_from_pasted_text(lang):
+    for alias, planet in ALIASES["planets"].get(lang, {}).items():
+        assert normalize_planet(alias) == planet, alias
+        planets, errors, ignored = parse_planets_from_text(f"{alias}: Aries 1°02’03’’  5  Retrograde")
+        assert list(planets) == [planet], (alias, errors, ignored)
+        assert planets[planet]["retro"]
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import pytest
+
+from api import App, BadRequest, MicroBatcher, parse_query
+from cache import content_key
+
+GOOD = "Sun: Sagittarius 4°26’10’’  end of 7  Direct\nMars: Aries 1°0’0’’  1  Direct\nMoon: Leo 0°53’40’’  4  Direct"
+
+def _unchecked_query(planets, root: int, n: int) -> dict:
+    """A query as parse_query would build it, without its checks on `planets`."""
+    q = parse_query({"planets": GOOD, "root": root, "n": n})
+    ck = content_key("chart", planets, "")
+    return dict(q, planets=planets, chart_key=ck, key=content_key(ck, root, n, "Modern", True, True))
+
+def test_bad_query_fails_alone_in_a_batch():
+    async def run():
+        batcher = MicroBatcher(max_wait_ms=200)
+        queries = [_unchecked_query(GOOD, 1, 1), _unchecked_query(None, 5, 1)]  # the second chart cannot parse
+        results = await asyncio.gather(*(batcher.submit(q) for q in queries), return_exceptions=True)
+        return batcher, results
+
+    batcher, (good, bad) = asyncio.run(run())
+    assert batcher.batches == 1 and batcher.batched_queries == 2
+    assert good["ruler"] == "Mars" and good["score"] is not None
+    assert isinstance(bad, Exception)
+
+def _post(body: dict) -> tuple:
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": json.dumps(body).encode()}
+
+    async def send(msg):
+        sent.append(msg)
+
+    asyncio.run(App()({"type": "http", "method": "POST", "path": "/derive"}, receive, send))
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+def test_out_of_range_house_line_is_left_out():
+    # the parser reports "end of 13" as an error line, so the chart is scored without the Sun
+    bad = GOOD.replace("end of 7", "end of 13")
+    without_sun = GOOD.split("\n", 1)[1]
+    assert _post({"planets": bad, "root": 5, "n": 1}) == _post({"planets": without_sun, "root": 5, "n": 1})
+
+def test_missing_planets_is_a_400():
+    with pytest.raises(BadRequest):
+        parse_query({"planets": " ", "root": 5, "n": 1})
+    status, body = _post({"root": 5, "n": 1})
+    assert status == 400 and "planets" in body["error"]
+
+def test_houses_come_from_cusps_when_missing():
+    signs = ["Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+             "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"]
+    cusps = "\n".join(f"{i}: {s} 0°00’00’’" for i, s in enumerate(signs, 1))
+    with_houses = "Sun: Leo 10°00’00’’  5  Direct\nMars: Aries 1°00’00’’  1  Direct"
+    without = "Sun: Leo 10°00’00’’  Direct\nMars: Aries 1°00’00’’  Direct"
+
+    async def run(planets):
+        return await MicroBatcher(max_wait_ms=1).submit(
+            parse_query({"planets": planets, "cusps": cusps, "root": 5, "n": 1}))
+
+    assert asyncio.run(run(without)) == asyncio.run(run(with_houses))
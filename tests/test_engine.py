@@ -0,0 +1,100 @@
+import io
+import random
+
+import numpy as np
+import pytest
+
+from benchmarks import synth
+from engine import (
+    ASPECT_WEIGHTS, DIGNITY_BODIES, DIGNITY_MODELS, DIGNITY_POINTS, OPPOSITE, RULERS_MODERN, RULERS_TRAD, SIGNS,
+    AspectIndex, _dignity_kinds, aspect_table, compute_aspect_index, compute_ruler_strength, dignity_parts,
+    dignity_table, iter_charts, iter_planet_lines, make_readable_comment, parse_planets_from_text,
+    rulership_score,
+)
+from vectorized import rulership_scores_batch
+
+def test_houses_outside_1_12_are_errors():
+    text = ("Sun: Leo 10°00’00’’  end of 13  Direct\nMoon: Leo 1°02’03’’  0  Direct\n"
+            "UranusScorpio26°23’13\nMars: Aries 1°00’00’’  12  Direct")
+    planets, errors, _ = parse_planets_from_text(text)
+    assert list(planets) == ["Mars"] and planets["Mars"]["house"] == 12
+    assert errors == text.splitlines()[:3]
+
+def test_comment_treats_house_outside_1_12_as_unknown():
+    planets = {"Mars": {"sign": "Koç", "deg": 1.0, "house": 13, "lon": 1.0, "retro": False}}
+    strength = compute_ruler_strength("Mars", planets, AspectIndex(), RULERS_MODERN)
+    text = make_readable_comment(1, 1, 1, "Koç", "Mars", strength, AspectIndex())
+    assert "ev bilinmiyor" in text and "13. ev" not in text
+
+def _pos(lon: float) -> dict:
+    return {"sign": "Koç", "deg": lon % 30, "house": None, "lon": lon, "retro": False}
+
+def test_wide_luminary_aspect_is_weighted_by_its_own_orb():
+    # a 7° conjunction is outside the 6° major orb, inside the Sun's 8°
+    planets = {"Güneş": _pos(10.0), "Mars": _pos(17.0)}
+    assert compute_aspect_index(planets).score("Mars") == 0.0
+    aspects = compute_aspect_index(planets, aspect_table(wide_luminaries=True))
+    assert aspects[0]["type"] == "conjunction" and aspects[0]["orb_limit"] == pytest.approx(8.0)
+    assert aspects.score("Mars") == pytest.approx(ASPECT_WEIGHTS["conjunction"] * (1 - 7 / 8))
+
+@pytest.mark.parametrize("sep, weight", [(47.0, 0.0), (46.0, 0.5)])
+def test_minor_aspect_weight_reaches_0_at_its_orb(sep, weight):
+    planets = {"Mars": _pos(0.0), "Venüs": _pos(sep)}
+    aspects = compute_aspect_index(planets, aspect_table(minor=True))
+    assert [a["type"] for a in aspects] == ["semisquare"]
+    assert aspects.score("Mars") == pytest.approx(ASPECT_WEIGHTS["semisquare"] * weight)
+
+def _texts(fmts=("spaced", "compact"), n: int = 200) -> list:
+    rng = random.Random(7)
+    return [synth.planets_text(rng, rng.choice(fmts)) for _ in range(n)]
+
+def test_streamed_lines_match_parse_planets_from_text():
+    for text in _texts():
+        planets, errors, ignored = {}, [], []
+        for kind, line, rec in iter_planet_lines(io.BytesIO(text.encode("utf-8"))):
+            if kind == "planet":
+                planets[rec[0]] = rec[1]
+            else:
+                (errors if kind == "error" else ignored).append(line)
+        assert (planets, errors, ignored) == parse_planets_from_text(text)
+
+def test_iter_charts_splits_a_concatenated_export():
+    texts = _texts(("spaced",))
+    # a chart without the Sun, then one that starts with it: the Sun is not in the previous chart
+    texts[3] = "\n".join(texts[3].splitlines()[1:])
+    texts[10] = "\n".join(line for line in texts[10].splitlines() if not line.startswith("Sun"))
+    charts = list(iter_charts(io.BytesIO("\n".join(texts).encode("utf-8"))))
+    expected = [parse_planets_from_text(t) for t in texts]
+    assert [c[0] for c in charts] == [e[0] for e in expected]
+    # error and ignored lines before a chart's first body go to the previous chart
+    assert [line for c in charts for line in c[1]] == [line for e in expected for line in e[1]]
+    assert [line for c in charts for line in c[2]] == [line for e in expected for line in e[2]]
+
+def _domicile_score(planet: str, sign: str, rulers_map: dict) -> int:
+    """The rulership score before dignity models: +10 domicile, -10 detriment."""
+    if rulers_map.get(sign) == planet:
+        return 10
+    return -10 if any(p == planet and OPPOSITE.get(s) == sign for s, p in rulers_map.items()) else 0
+
+@pytest.mark.parametrize("rulers_map", [RULERS_MODERN, RULERS_TRAD, dict(RULERS_TRAD)],
+                         ids=["Modern", "Klasik", "custom"])
+@pytest.mark.parametrize("dignity", list(DIGNITY_MODELS))
+def test_dignity_table_matches_dignity_kinds(rulers_map, dignity):
+    table = dignity_table(rulers_map, dignity)
+    batch = rulership_scores_batch(np.arange(len(DIGNITY_BODIES))[:, None], np.arange(12)[None, :],
+                                   rulers_map, dignity)
+    for b, body in enumerate(DIGNITY_BODIES):
+        for s, sign in enumerate(SIGNS):
+            kinds = [k for k in _dignity_kinds(body, sign, rulers_map) if k in DIGNITY_MODELS[dignity]]
+            expected = sum(DIGNITY_POINTS[k] for k in kinds)
+            assert table[b][s] == expected == rulership_score(body, sign, rulers_map, dignity) == batch[b, s]
+            assert sum(dignity_parts(body, sign, rulers_map, dignity).values()) == expected
+            if dignity == "domicile":
+                assert expected == _domicile_score(body, sign, rulers_map)
+
+def test_dignity_examples():
+    assert rulership_score("Güneş", "Koç", RULERS_MODERN, "exaltation") == 8
+    assert rulership_score("Güneş", "Terazi", RULERS_MODERN, "exaltation") == -8
+    assert rulership_score("Satürn", "Terazi", RULERS_TRAD, "triplicity") == 8 + 4
+    assert rulership_score("Satürn", "Kova", RULERS_MODERN, "domicile") == 0
+    assert rulership_score("Satürn", "Kova", RULERS_TRAD, "domicile") == 10
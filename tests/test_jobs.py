@@ -0,0 +1,39 @@
+import csv
+import io
+import json
+import time
+
+from batch import run_batch
+from benchmarks import synth
+from jobs import JobManager, iter_upload_records, upload_total
+
+def _jsonl(n: int) -> bytes:
+    lines = [json.dumps({"id": i, "planets": p, "cusps": c}, ensure_ascii=False)
+             for i, (p, c) in enumerate(synth.charts(3, n))]
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+def test_job_streams_records_like_batch():
+    data = _jsonl(40)
+    assert upload_total("x.jsonl", data) == 40
+    m = JobManager(workers=0, chunk_size=7)
+    job = m.get(m.submit("x.jsonl", data))
+    while job.active:
+        time.sleep(0.01)
+    out = io.StringIO()
+    run_batch(iter_upload_records("x.jsonl", data), out)
+    snap = job.snapshot()
+    assert (snap["status"], snap["done"], snap["total"]) == ("done", 40, 40)
+    assert job.to_jsonl() == out.getvalue().encode("utf-8")
+
+def test_csv_total_is_set_when_done():
+    out = io.StringIO()
+    w = csv.writer(out)
+    w.writerow(["id", "planets", "cusps"])
+    w.writerows((i, p, c) for i, (p, c) in enumerate(synth.charts(3, 12)))
+    data = out.getvalue().encode("utf-8")
+    assert upload_total("x.csv", data) is None  # fields span lines; counted by scoring
+    m = JobManager(workers=0, chunk_size=5)
+    job = m.get(m.submit("x.csv", data))
+    while job.active:
+        time.sleep(0.01)
+    assert (job.snapshot()["done"], job.snapshot()["total"]) == (12, 12)
@@ -0,0 +1,64 @@
+import random
+from itertools import combinations
+
+from engine import PATTERN_TR_LABEL, aspect_table, compute_aspects, find_patterns
+
+BODIES = ["Güneş", "Ay", "Merkür", "Venüs", "Mars", "Jüpiter", "Satürn", "Uranüs", "Neptün", "Plüton"]
+
+def _charts(n: int = 300) -> list:
+    # bodies near multiples of 30° so trines, squares, quincunxes and conjunctions are frequent
+    rng = random.Random(20)
+    charts = []
+    for _ in range(n):
+        bodies = rng.sample(BODIES, rng.randint(3, len(BODIES)))
+        charts.append({b: {"sign": "Koç", "deg": 0.0, "house": None,
+                           "lon": (30 * rng.randrange(12) + rng.uniform(-2.5, 2.5)) % 360, "retro": False}
+                       for b in bodies})
+    return charts
+
+def _brute_force(aspects: list) -> set:
+    """Every pattern by checking all body triples/quads against the definitions in find_patterns."""
+    bodies = list(dict.fromkeys(b for a in aspects for b in (a["p1"], a["p2"])))
+    kind = {frozenset((a["p1"], a["p2"])): a["type"] for a in aspects}
+
+    def is_(t, x, y):
+        return kind.get(frozenset((x, y))) == t
+
+    found = set()
+    for tri in combinations(bodies, 3):
+        if all(is_("trine", x, y) for x, y in combinations(tri, 2)):
+            found.add(("grand_trine", frozenset(tri), None))
+        for apex in tri:
+            x, y = (b for b in tri if b != apex)
+            if is_("opposition", x, y) and is_("square", apex, x) and is_("square", apex, y):
+                found.add(("t_square", frozenset(tri), apex))
+            if is_("quincunx", apex, x) and is_("quincunx", apex, y) and is_("sextile", x, y):
+                found.add(("yod", frozenset(tri), apex))
+    crosses = set()
+    for quad in combinations(bodies, 4):
+        a, b, c, d = quad
+        for (p, q), (r, s) in (((a, b), (c, d)), ((a, c), (b, d)), ((a, d), (b, c))):
+            if (is_("opposition", p, q) and is_("opposition", r, s)
+                    and all(is_("square", u, v) for u in (p, q) for v in (r, s))):
+                crosses.add(frozenset(quad))
+    found |= {("grand_cross", c, None) for c in crosses}
+    found = {f for f in found if f[0] != "t_square" or not any(c >= f[1] for c in crosses)}
+    conj = [b for b in bodies if sum(is_("conjunction", b, o) for o in bodies) >= 2]
+    cliques = [frozenset(g) for r in range(3, len(conj) + 1) for g in combinations(conj, r)
+               if all(is_("conjunction", x, y) for x, y in combinations(g, 2))]
+    found |= {("stellium", g, None) for g in cliques if not any(g < h for h in cliques)}
+    return found
+
+def test_find_patterns_matches_brute_force():
+    table = aspect_table(minor=True)
+    order = list(PATTERN_TR_LABEL)
+    seen = set()
+    for planets in _charts():
+        aspects = compute_aspects(planets, table)
+        found = find_patterns(aspects)
+        got = [(p["type"], frozenset(p["bodies"]), p["apex"]) for p in found]
+        assert len(got) == len(set(got))
+        assert set(got) == _brute_force(aspects)
+        assert [order.index(p["type"]) for p in found] == sorted(order.index(p["type"]) for p in found)
+        seen.update(t for t, _, _ in got)
+    assert seen == set(order)  # the sample exercises every pattern type
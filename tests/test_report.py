@@ -0,0 +1,21 @@
+import io
+
+import pytest
+
+from report import main, write_report
+
+GOOD = ("Sun: Sagittarius 4°26’10’’  end of 7  Direct\nMars: Aries 1°0’0’’  1  Direct\n"
+        "Moon: Leo 0°53’40’’  4  Direct")
+
+def test_out_of_range_house_does_not_stop_the_report():
+    records = [("a", GOOD.replace("end of 7", "end of 13"), ""), ("b", GOOD, "")]
+    out = io.StringIO()
+    summary = write_report(records, out, root=7)
+    assert summary["charts"] == 2
+    assert "## Harita a" in out.getvalue() and "## Harita b" in out.getvalue()
+
+@pytest.mark.parametrize("size", ["0", "-1"])
+def test_chunk_size_must_be_positive(size, capsys):
+    with pytest.raises(SystemExit):
+        main(["-", "--chunk-size", size])
+    assert "--chunk-size" in capsys.readouterr().err
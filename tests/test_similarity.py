@@ -0,0 +1,18 @@
+import numpy as np
+
+from compact import BODY_TO_ID
+from engine import RULERS_MODERN, compute_aspect_index, compute_ruler_strength, parse_planets_from_text
+from similarity import strength_scores
+from store import ChartStore, chart_key
+
+def test_strength_scores_ignore_houses_outside_1_12(tmp_path):
+    text = "Sun: Leo 10°00’00’’  13  Direct\nMars: Aries 1°00’00’’  1  Direct"
+    planets = parse_planets_from_text(text)[0]
+    aspects = compute_aspect_index(planets)
+    store = ChartStore(str(tmp_path / "store"))
+    store.append(planets, {}, chart_key(text), aspects)
+
+    scores = strength_scores(store, RULERS_MODERN)
+    for body in planets:
+        expected = compute_ruler_strength(body, planets, aspects, RULERS_MODERN)["score"]
+        assert np.isclose(scores[0, BODY_TO_ID[body]], expected)
@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+import pytest
+
+from engine import houses_from_cusps, parse_cusp_longitudes, parse_house_cusps_from_text, parse_planets_from_text
+from store import ChartStore, chart_key
+
+PLANETS = "Sun: Leo 10°00’00’’  5  Direct\nMars: Aries 1°00’00’’  1  Retrograde\nMoon: Cancer 3°30’00’’  4  Direct"
+CUSPS = "\n".join(f"{i}: {s} {i}°15’00’’" for i, s in enumerate(
+    ["Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+     "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"], 1))
+
+def test_round_trip(tmp_path):
+    store = ChartStore(str(tmp_path))
+    row = store.get_or_parse(PLANETS, CUSPS)
+    partial = store.get_or_parse(PLANETS, "\n".join(CUSPS.splitlines()[:3]))
+    store = ChartStore(str(tmp_path))  # reopened from disk
+
+    assert store.find(chart_key(PLANETS, CUSPS)) == row and len(store) == 2
+    planets = parse_planets_from_text(PLANETS)[0]
+    stored = store.planets(row)
+    assert list(stored) == list(planets)
+    for name, pos in planets.items():
+        assert stored[name]["sign"] == pos["sign"] and stored[name]["house"] == pos["house"]
+        assert stored[name]["retro"] == pos["retro"] and stored[name]["lon"] == pytest.approx(pos["lon"], abs=1e-4)
+    assert store.cusp_signs(row) == parse_house_cusps_from_text(CUSPS)[0]
+
+    lons = parse_cusp_longitudes(CUSPS)[0]
+    assert store.cusp_longitudes(row) == pytest.approx(lons, abs=1e-4)
+    assert list(store.cusp_longitudes(partial)) == [1, 2, 3]
+    assert np.isnan(store.cusp_lons[partial, 3:]).all()
+    # stored charts can be re-housed without the original text
+    rehoused = houses_from_cusps(stored, store.cusp_longitudes(row), rehouse=True)
+    assert {b: p["house"] for b, p in rehoused.items()} == {
+        b: p["house"] for b, p in houses_from_cusps(planets, lons, rehouse=True).items()}
+
+def test_older_store_gets_empty_cusp_longitudes(tmp_path):
+    store = ChartStore(str(tmp_path))
+    row = store.get_or_parse(PLANETS, CUSPS)
+    os.remove(os.path.join(str(tmp_path), "cusp_lon.f4"))
+    store = ChartStore(str(tmp_path))
+    assert store.cusp_longitudes(row) == {} and store.cusp_signs(row)
+    assert store.append(parse_planets_from_text(PLANETS)[0], {}, chart_key("x"), None, {1: 10.0}) == 1
+    assert store.cusp_longitudes(1) == {1: 10.0}
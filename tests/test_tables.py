@@ -0,0 +1,35 @@
+from batch import score_chunk
+from benchmarks import synth
+from engine import RULERS_MODERN, compute_aspect_index, compute_ruler_strength
+from tables import aspect_sums, chart_columns, ordered_aspects, score_chunk_arrow, strength_columns
+
+OUT_OF_RANGE = ("house13", "Sun: Leo 10°00’00’’  end of 13  Direct\nMars: Aries 1°00’00’’  1  Direct\n"
+                "Moon: Cancer 3°00’00’’  4  Direct", "")
+
+def _records():
+    return [(i, p, c) for i, (p, c) in enumerate(synth.charts(11, 60))] + [OUT_OF_RANGE]
+
+def test_arrow_scores_match_dict_scores():
+    records = _records()
+    dicts = score_chunk(records, "Modern", (7, 5), False)
+    arrow = score_chunk_arrow(records, "Modern", (7, 5))
+
+    charts = arrow["charts"].to_pylist()
+    assert [c["errors"] for c in charts] == [d["errors"] for d in dicts]
+    assert [c["score"] for c in charts] == [d["derived"]["score"] for d in dicts]
+    assert [c["ruler"] for c in charts] == [d["derived"]["ruler"] for d in dicts]
+    expected = [(str(d["id"]), r, s["score"], s["parts"]["house"], s["parts"]["rulership"])
+                for d in dicts for r, s in d["strengths"].items()]
+    got = [(s["id"], s["ruler"], s["score"], s["house"], s["rulership"]) for s in arrow["strengths"].to_pylist()]
+    assert got == expected
+
+def test_stored_house_outside_1_12_scores_like_the_engine():
+    # the parser rejects such houses; columns built from other sources must still score them as 0
+    planets = {"Güneş": {"sign": "Aslan", "deg": 10.0, "house": 13, "lon": 130.0, "retro": False},
+               "Mars": {"sign": "Koç", "deg": 1.0, "house": 1, "lon": 1.0, "retro": False}}
+    cols, bodies = chart_columns([planets])
+    asp = ordered_aspects(cols, bodies)
+    s = strength_columns(cols, bodies, aspect_sums(asp, cols["lon"].shape), RULERS_MODERN)
+    aspects = compute_aspect_index(planets)
+    for c, body in enumerate(bodies):
+        assert s["score"][0, c] == compute_ruler_strength(body, planets, aspects, RULERS_MODERN)["score"]
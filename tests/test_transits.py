@@ -0,0 +1,30 @@
+import json
+
+import pytest
+
+from transits import main
+
+SIGNS = ["Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+         "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"]
+CUSPS = "\n".join(f"{i}: {s} 0°00’00’’" for i, s in enumerate(SIGNS, 1))
+
+def _run(tmp_path, planets: str) -> dict:
+    eph = tmp_path / "eph.csv"
+    eph.write_text("date,Sun,Mars\n2024-01-01,100.0,200.0\n2024-01-02,101.0,200.5\n", encoding="utf-8")
+    charts = tmp_path / "charts.jsonl"
+    charts.write_text(json.dumps({"id": "a", "planets": planets, "cusps": CUSPS}) + "\n", encoding="utf-8")
+    out = tmp_path / "out.jsonl"
+    main([str(eph), "--charts", str(charts), "--root", "1", "--n", "1", "-o", str(out)])
+    return json.loads(out.read_text(encoding="utf-8"))
+
+def test_houses_come_from_cusps_when_missing(tmp_path):
+    with_houses = _run(tmp_path, "Mars: Aries 1°00’00’’  1  Direct\nSun: Leo 10°00’00’’  5  Direct")
+    without = _run(tmp_path, "Mars: Aries 1°00’00’’  Direct\nSun: Leo 10°00’00’’  Direct")
+    assert without == with_houses and without["ruler"] == "Mars"
+
+@pytest.mark.parametrize("flag", ["--root", "--n"])
+def test_root_and_n_must_be_1_12(tmp_path, flag):
+    args = ["eph.csv", "--charts", "c.jsonl", "--root", "1", "--n", "1"]
+    args[args.index(flag) + 1] = "13"
+    with pytest.raises(SystemExit):
+        main(args)
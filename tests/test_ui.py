@@ -0,0 +1,45 @@
+import json
+import random
+
+import pytest
+
+AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+_runner = pytest.importorskip("streamlit.testing.v1.local_script_runner")
+
+from benchmarks import synth
+from benchmarks.ui import APP, fragment_id, has_fragment_internals, run_fragment
+
+FULL_SCRIPT_STAGES = {"parse", "cusps", "aspects"}
+
+def _records(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def test_cusp_edit_reruns_only_the_derivation_fragment(tmp_path, monkeypatch):
+    timings_file = tmp_path / "timings.jsonl"
+    monkeypatch.setenv("EVTURETME_TIMINGS_FILE", str(timings_file))
+    rng = random.Random(16)
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    at.text_area[0].input(synth.planets_text(rng, noise=False))
+    at.text_area[1].input(synth.cusps_text(rng))
+    at.checkbox(key="timing_enabled").check()
+    at.run()
+    assert not at.exception
+    full = _records(timings_file)[-1]
+    assert full["scope"] == "app" and FULL_SCRIPT_STAGES <= set(full["seconds"])
+
+    fid = fragment_id(at, "derivation_section") if has_fragment_internals(at) else None
+    if fid is None:
+        pytest.skip("this Streamlit lacks the internals run_fragment() relies on")
+    cusp = at.selectbox(key="cusp_3")
+    cusp.set_value(next(s for s in cusp.options if s != cusp.value))
+    timings_file.write_text("")
+    original = _runner.RerunData
+    run_fragment(at, fid)
+    assert _runner.RerunData is original
+    assert not at.exception
+
+    (frag,) = _records(timings_file)
+    assert frag["scope"] == "fragment"
+    assert not FULL_SCRIPT_STAGES & set(frag["seconds"])
+    assert "strength" in frag["seconds"]
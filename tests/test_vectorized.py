@@ -0,0 +1,27 @@
+import random
+
+import pytest
+
+from benchmarks import synth
+from engine import aspect_table, compute_aspects, parse_planets_from_text
+from vectorized import compute_aspects_batch
+
+def _charts() -> list:
+    charts = [parse_planets_from_text(p)[0] for p, _ in synth.charts(17, 300)]
+    # separations on and around orb edges, with and without a luminary in the pair
+    rng = random.Random(17)
+    bodies = ["Güneş", "Mars", "Venüs", "Jüpiter", "Satürn"]
+    exacts = [0, 30, 45, 60, 90, 120, 135, 150, 180]
+    orbs = [-8, -6, -4.5, -3, -2, 2, 3, 4.5, 6, 8]
+    for _ in range(50):
+        base = rng.uniform(0, 360)
+        lons = [base] + [(base + rng.choice(exacts) + rng.choice(orbs)) % 360 for _ in range(4)]
+        charts.append({b: {"sign": "Koç", "deg": 0.0, "house": None, "lon": lon, "retro": False}
+                       for b, lon in zip(bodies, lons)})
+    return charts
+
+@pytest.mark.parametrize("minor, wide", [(False, False), (True, False), (False, True), (True, True)])
+def test_batch_aspects_match_scalar(minor, wide):
+    table = aspect_table(minor, wide)
+    charts = _charts()
+    assert compute_aspects_batch(charts, table=table) == [compute_aspects(p, table) for p in charts]
@@ -0,0 +1,124 @@
+"""
+Lightweight stage timing spans.
+
+    timings = Timings(enabled=True)
+    with timings.span("parse"):
+        ...
+    timings.as_dict()  # {"parse": 0.0012, ...}
+
+A disabled Timings hands out one shared no-op span, so instrumented code costs
+one method call and an empty `with` when timing is off.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP = _NoopSpan()
+
+class _Span:
+    __slots__ = ("timings", "name", "t0")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.add(self.name, time.perf_counter() - self.t0)
+        return False
+
+class Timings:
+    """Per-run stage durations in seconds; repeated spans of one stage are summed."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stages = {}
+        self.started = time.perf_counter()
+
+    def span(self, name: str):
+        return _Span(self, name) if self.enabled else _NOOP
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def finish(self, rest: str = "render"):
+        """Book the run time not covered by any span under `rest`."""
+        if self.enabled:
+            self.add(rest, max(0.0, self.elapsed() - sum(self.stages.values())))
+
+    def as_dict(self, unit: float = 1.0) -> dict:
+        return {k: round(v * unit, 3) for k, v in self.stages.items()}
+
+    def append_jsonl(self, path: str, **labels):
+        rec = {"ts": round(time.time(), 3), **labels, "seconds": {k: round(v, 6) for k, v in self.stages.items()}}
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+class TimingAggregate:
+    """Process-wide per-stage sum/count, exported as Prometheus text."""
+
+    def __init__(self, metric: str = "evturetme_stage_seconds"):
+        self.metric = metric
+        self.sums = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def observe(self, timings: Timings):
+        with self._lock:
+            for k, v in timings.stages.items():
+                self.sums[k] = self.sums.get(k, 0.0) + v
+                self.counts[k] = self.counts.get(k, 0) + 1
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            lines = [f"# HELP {self.metric} Time spent per app stage.", f"# TYPE {self.metric} summary"]
+            for k in sorted(self.sums):
+                lines.append(f'{self.metric}_sum{{stage="{k}"}} {self.sums[k]:.6f}')
+                lines.append(f'{self.metric}_count{{stage="{k}"}} {self.counts[k]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """
+        Atomically rewrite `path` (node_exporter textfile-collector style).
+        Session threads share one aggregate, so writes are serialized (a newer
+        snapshot is never replaced by an older one) and each uses its own temp
+        file, which also keeps other processes writing `path` apart.
+        """
+        with self._write_lock:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(self.prometheus_text())
+                os.chmod(tmp, 0o644)  # mkstemp creates 0600; the collector may run as another user
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+def export(timings: Timings, aggregate: TimingAggregate, path: str | None, **labels):
+    """Send one run to `path`: *.prom rewrites the aggregate, anything else appends JSONL."""
+    if not path or not timings.enabled:
+        return
+    aggregate.observe(timings)
+    if path.endswith(".prom"):
+        aggregate.write_prometheus(path)
+    else:
+        timings.append_jsonl(path, **labels)
@@ -0,0 +1,212 @@
+"""
+Transit time series: how a natal ruler's strength moves day by day.
+
+Input is a local ephemeris CSV with a `date` column and one longitude column
+per transiting body (English or Turkish names, degrees 0–360):
+
+    date,Sun,Moon,Mercury,...
+    2024-01-01,280.12,145.90,263.01,...
+
+For each client the score is compute_ruler_strength's natal total (base +
+house + rulership + natal aspects) plus the same orb-weighted ASPECT_WEIGHTS
+sum over transit-to-natal-ruler aspects, clamped to 0–100. Everything is
+vectorized over (clients × days × transiting bodies).
+
+Usage:
+    python transits.py ephemeris.csv --charts charts.jsonl --root 2 --n 5 -o crossings.jsonl
+"""
+import argparse
+import csv
+import json
+import sys
+
+import numpy as np
+
+from batch import house_charts, iter_records, parse_record
+from engine import (
+    ASPECTS_DEF, ASPECT_WEIGHTS, DEFAULT_DIGNITY, DIGNITY_MODELS, RULERS_MODERN, RULERS_TRAD,
+    compute_aspect_index, normalize_planet, house_score, rulership_score, aspect_score_for,
+    default_cusp_signs, derive, score_label,
+)
+from vectorized import separation, classify_separation, aspect_orb, py_round
+
+# score_label() thresholds as bins: 0 yoğun, 1 zorlayıcı, 2 orta, 3 akıcı, 4 = no score
+LABEL_EDGES = np.array([35.0, 55.0, 75.0])
+LABELS = ["yoğun", "zorlayıcı", "orta", "akıcı", "bilinmiyor"]
+_WEIGHT = np.array([ASPECT_WEIGHTS.get(name, 0.0) for name, _, _ in ASPECTS_DEF], dtype=np.float64)
+
+# =========================
+# EPHEMERIS
+# =========================
+def load_ephemeris(path: str):
+    """
+    Read an ephemeris CSV.
+    Returns (dates: datetime64[D] array, bodies: list of Turkish names, lons: (T × B) float64).
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = [r for r in reader if r]
+
+    if not header or header[0].strip().lower() != "date":
+        raise ValueError(f"{path}: first column must be 'date'")
+    bodies = [normalize_planet(h) for h in header[1:]]
+    dates = np.array([r[0] for r in rows], dtype="datetime64[D]")
+    lons = np.array([[float(x) if x.strip() else np.nan for x in r[1:]] for r in rows], dtype=np.float64)
+    return dates, bodies, lons.reshape(len(rows), len(bodies)) % 360.0
+
+# =========================
+# SCORING
+# =========================
+def natal_parts(ruler: str, planets: dict, aspects, rulers_map: dict, dignity: str = DEFAULT_DIGNITY):
+    """
+    (base + house + rulership points, natal aspect score) of compute_ruler_strength,
+    or None if the ruler is missing. Kept apart so transit aspects can be added
+    to the aspect sum first, in the same order as the engine adds them.
+    """
+    pos = planets.get(ruler)
+    if not pos:
+        return None
+    points = 50 + house_score(pos["house"]) + rulership_score(ruler, pos["sign"], rulers_map, dignity)
+    return points, aspect_score_for(ruler, aspects)
+
+def natal_total(ruler: str, planets: dict, aspects, rulers_map: dict, dignity: str = DEFAULT_DIGNITY):
+    """compute_ruler_strength's unclamped total, or None if the ruler is missing."""
+    parts = natal_parts(ruler, planets, aspects, rulers_map, dignity)
+    return None if parts is None else parts[0] + parts[1]
+
+def transit_aspect_scores(transit_lons: np.ndarray, natal_lons: np.ndarray, block: int = 64,
+                          natal_aspects=None) -> np.ndarray:
+    """
+    Orb-weighted transit aspect score per (client, day).
+
+    transit_lons: (T × B) ephemeris longitudes; natal_lons: (C,) natal ruler longitudes.
+    natal_aspects: optional (C,) natal aspect scores to start from; the transit
+    weights are then added body by body, as AspectIndex sums an aspect list.
+    Returns (C × T) float64. Clients are processed in blocks to bound memory.
+    """
+    natal_lons = np.asarray(natal_lons, dtype=np.float64)
+    out = np.zeros((len(natal_lons), transit_lons.shape[0]), dtype=np.float64)
+    if natal_aspects is not None:
+        out += np.asarray(natal_aspects, dtype=np.float64)[:, None]
+    for start in range(0, len(natal_lons), block):
+        nat = natal_lons[start:start + block, None, None]
+        d = separation(transit_lons[None, :, :], nat)
+        kind = classify_separation(d)
+        orb = py_round(aspect_orb(d, kind), 2)
+        w = np.maximum(0.0, 1.0 - orb / 6.0)
+        contrib = np.where(kind >= 0, _WEIGHT[np.maximum(kind, 0)] * w, 0.0)
+        acc = out[start:start + block]
+        for b in range(contrib.shape[2]):
+            acc += contrib[:, :, b]
+    return out
+
+def score_series(transit_lons: np.ndarray, natal_lons, natal_points, natal_aspects) -> np.ndarray:
+    """
+    (C × T) scores equal to compute_ruler_strength() with the day's transit
+    aspects appended to the natal aspect list: clamped, Python-rounded to 0.1.
+    natal_points / natal_aspects: natal_parts() per client (NaN = no ruler).
+    """
+    points = np.asarray(natal_points, dtype=np.float64)[:, None]
+    aspects = transit_aspect_scores(transit_lons, natal_lons, natal_aspects=natal_aspects)
+    return py_round(np.clip(points + aspects, 0, 100), 1)
+
+def label_index(scores: np.ndarray) -> np.ndarray:
+    """score_label() as an index into LABELS, elementwise (NaN → "bilinmiyor")."""
+    return np.where(np.isnan(scores), len(LABELS) - 1, np.digitize(scores, LABEL_EDGES, right=False))
+
+def threshold_crossings(dates: np.ndarray, scores: np.ndarray) -> list[list[dict]]:
+    """
+    Per client, the days on which the score label changes.
+    Each event: {"date", "score", "from", "to", "text"}.
+    """
+    lbl = label_index(scores)
+    events = []
+    for c in range(scores.shape[0]):
+        days = np.nonzero(lbl[c, 1:] != lbl[c, :-1])[0] + 1
+        events.append([
+            {
+                "date": str(dates[t]),
+                "score": float(scores[c, t]),
+                "from": LABELS[lbl[c, t - 1]],
+                "to": LABELS[lbl[c, t]],
+                "text": f"skor {LABELS[lbl[c, t]]} bölgesine giriyor",
+            }
+            for t in days.tolist()
+        ])
+    return events
+
+# =========================
+# CLIENTS
+# =========================
+def client_rulers(charts: list, root_house: int, n: int, ruler_system: str = "Modern",
+                  dignity: str = DEFAULT_DIGNITY):
+    """
+    Natal ruler longitude and natal_parts() for each (planets, aspects, cusp_signs) chart.
+    Returns (rulers, natal_lons, natal_points, natal_aspects); missing rulers get NaN.
+    """
+    rulers, lons, points, asp = [], [], [], []
+    for planets, aspects, cusp_signs in charts:
+        d = derive(planets, aspects, cusp_signs, root_house, n, ruler_system)
+        rulers_map = RULERS_MODERN if d["used_system"] == "Modern" else RULERS_TRAD
+        parts = natal_parts(d["ruler"], planets, aspects, rulers_map, dignity)
+        rulers.append(d["ruler"])
+        lons.append(planets[d["ruler"]]["lon"] if parts is not None else np.nan)
+        points.append(parts[0] if parts is not None else np.nan)
+        asp.append(parts[1] if parts is not None else np.nan)
+    return (rulers, np.array(lons, dtype=np.float64), np.array(points, dtype=np.float64),
+            np.array(asp, dtype=np.float64))
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Transit score time series for natal derived-house rulers.")
+    p.add_argument("ephemeris", help="CSV: date + one longitude column per body")
+    p.add_argument("--charts", required=True, help="JSONL with id/planets/cusps fields (batch.py format)")
+    p.add_argument("--root", type=int, choices=range(1, 13), metavar="1-12", required=True)
+    p.add_argument("--n", type=int, choices=range(1, 13), metavar="1-12", required=True)
+    p.add_argument("--ruler-system", choices=["Modern", "Klasik"], default="Modern")
+    p.add_argument("--dignity", choices=list(DIGNITY_MODELS), default=DEFAULT_DIGNITY,
+                   help="essential dignities in the rulership points")
+    p.add_argument("-o", "--output", default="-", help="JSONL of threshold crossings per client")
+    p.add_argument("--series", help="optional CSV of the full daily series (date,id,score,label)")
+    p.add_argument("--bodies", help="comma-separated transiting bodies to use (default: all columns)")
+    args = p.parse_args(argv)
+
+    dates, bodies, transit_lons = load_ephemeris(args.ephemeris)
+    if args.bodies:
+        wanted = {normalize_planet(b) for b in args.bodies.split(",") if b.strip()}
+        transit_lons = transit_lons[:, [i for i, b in enumerate(bodies) if b in wanted]]
+    # parsed like batch.py, so house-less lines get their house from the cusp degrees
+    with open(args.charts, encoding="utf-8") as f:
+        parsed = [parse_record(*rec) for rec in iter_records(f, "jsonl")]
+    house_charts(parsed)
+    ids = [p["id"] for p in parsed]
+    charts = [(p["planets"], compute_aspect_index(p["planets"]), default_cusp_signs(p["cusps"])) for p in parsed]
+
+    rulers, natal_lons, points, natal_aspects = client_rulers(charts, args.root, args.n, args.ruler_system,
+                                                              args.dignity)
+    scores = score_series(transit_lons, natal_lons, points, natal_aspects)
+    crossings = threshold_crossings(dates, scores)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for cid, ruler, ev, s in zip(ids, rulers, crossings, scores):
+            first = None if np.isnan(s[0]) else float(s[0])
+            out.write(json.dumps({
+                "id": cid, "ruler": ruler, "start_score": first,
+                "start_label": score_label(first), "crossings": ev,
+            }, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if args.series:
+        lbl = label_index(scores)
+        with open(args.series, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["date", "id", "score", "label"])
+            for c, cid in enumerate(ids):
+                for t in range(len(dates)):
+                    w.writerow([dates[t], cid, scores[c, t], LABELS[lbl[c, t]]])
+
+if __name__ == "__main__":
+    main()
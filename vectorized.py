@@ -0,0 +1,240 @@
+"""
+NumPy batch paths for the chart engine.
+
+Charts are laid out as an (N charts × P bodies) float64 longitude array with
+NaN for bodies a chart does not have. Results match the scalar functions in
+engine.py exactly (same float64 operations, same AspectTable buckets, Python
+round() for the record form). `table` defaults to engine.DEFAULT_ASPECT_TABLE.
+"""
+import functools
+
+import numpy as np
+
+from engine import DEFAULT_ASPECT_TABLE, DEFAULT_DIGNITY, AspectTable, dignity_table
+
+ASPECT_NAMES = DEFAULT_ASPECT_TABLE.names
+
+# =========================
+# LAYOUT
+# =========================
+def body_columns(charts: list) -> list:
+    """Union of body names over `charts` (planet dicts), in first-seen order."""
+    seen = {}
+    for planets in charts:
+        for p in planets:
+            seen.setdefault(p, None)
+    return list(seen)
+
+def charts_to_array(charts: list, bodies: list | None = None):
+    """
+    Pack planet dicts into an (N × P) longitude array.
+    Returns (lons, bodies).
+    """
+    if bodies is None:
+        bodies = body_columns(charts)
+    col = {b: i for i, b in enumerate(bodies)}
+    lons = np.full((len(charts), len(bodies)), np.nan, dtype=np.float64)
+    for r, planets in enumerate(charts):
+        for p, pos in planets.items():
+            c = col.get(p)
+            if c is not None:
+                lons[r, c] = pos["lon"]
+    return lons, bodies
+
+def py_round(x, ndigits: int = 0) -> np.ndarray:
+    """
+    Python round(x, ndigits) elementwise. np.round scales by 10**ndigits in
+    float64 first, which can flip values close to a half; those few are
+    rounded with Python round() instead.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    scale = 10.0 ** ndigits
+    t = x * scale
+    out = np.rint(t) / scale
+    near = np.abs(np.abs(t - np.trunc(t)) - 0.5) < 1e-6
+    for i in np.flatnonzero(near):
+        out.flat[i] = round(float(x.flat[i]), ndigits)
+    return out
+
+# =========================
+# DIGNITY
+# =========================
+@functools.lru_cache(maxsize=None)
+def _dignity_array(table: tuple) -> np.ndarray:
+    arr = np.array(table, dtype=np.int8)
+    arr.flags.writeable = False
+    return arr
+
+def dignity_array(rulers_map: dict, dignity: str = DEFAULT_DIGNITY) -> np.ndarray:
+    """
+    engine.dignity_table() as a read-only int8 (body id × sign id) array. Body
+    ids are DIGNITY_BODIES, the same order as compact.BODIES and ChartStore
+    columns, so store.signs indexes it directly.
+    """
+    return _dignity_array(dignity_table(rulers_map, dignity))
+
+def rulership_scores_batch(body_ids, sign_ids, rulers_map: dict, dignity: str = DEFAULT_DIGNITY) -> np.ndarray:
+    """rulership_score() for arrays of body and sign ids (broadcast), as one fancy-indexing gather."""
+    return dignity_array(rulers_map, dignity)[np.asarray(body_ids), np.asarray(sign_ids)]
+
+# =========================
+# ASPECTS
+# =========================
+def separation(a, b) -> np.ndarray:
+    """Elementwise engine.angle_diff: circular distance in [0, 180]."""
+    # fmod == Python % here because the operand is non-negative
+    d = np.fmod(np.abs(np.asarray(a) - np.asarray(b)), 360.0)
+    return np.minimum(d, 360.0 - d)
+
+@functools.lru_cache(maxsize=64)
+def _bucket_arrays(table: AspectTable, factor: float):
+    """AspectTable.buckets(factor) as (kind int8, exact, orb) arrays of shape (181, C), kind -1 = padding."""
+    buckets = table.buckets(factor)
+    width = max(1, max(len(c) for c in buckets))
+    kind = np.full((181, width), -1, dtype=np.int8)
+    exact = np.zeros((181, width), dtype=np.float64)
+    orb = np.full((181, width), -1.0, dtype=np.float64)
+    for b, cands in enumerate(buckets):
+        for c, (k, e, o) in enumerate(cands):
+            kind[b, c], exact[b, c], orb[b, c] = k, e, o
+    return kind, exact, orb
+
+def classify_separation(d: np.ndarray, table: AspectTable | None = None, factor=1.0) -> np.ndarray:
+    """
+    Aspect index into table.names per separation (int8, -1 = no aspect); NaN never matches.
+    factor: orb factor, scalar or broadcastable to d (one per body pair).
+    """
+    table = table or DEFAULT_ASPECT_TABLE
+    d = np.asarray(d, dtype=np.float64)
+    kind = np.full(d.shape, -1, dtype=np.int8)
+    bucket = np.where(np.isnan(d), 0, d).astype(np.intp)
+    factor = np.asarray(factor, dtype=np.float64)
+    for f in np.unique(factor):
+        ks, ex, ob = _bucket_arrays(table, float(f))
+        sel = None if factor.ndim == 0 else np.broadcast_to(factor == f, d.shape)
+        # candidates are in definition order, so the first hit wins like the scalar loop
+        for c in range(ks.shape[1]):
+            hit = (kind == -1) & (np.abs(d - ex[bucket, c]) <= ob[bucket, c])
+            if sel is not None:
+                hit &= sel
+            np.copyto(kind, ks[bucket, c], where=hit)
+    return kind
+
+def aspect_orb(d: np.ndarray, kind: np.ndarray, table: AspectTable | None = None) -> np.ndarray:
+    """Orb for classified separations (NaN where kind == -1)."""
+    exact = np.array((table or DEFAULT_ASPECT_TABLE).exacts, dtype=np.float64)
+    orb = np.abs(d - exact[np.maximum(kind, 0)])
+    return np.where(kind >= 0, orb, np.nan)
+
+def pairwise_aspects(lons: np.ndarray, block: int = 8192, table: AspectTable | None = None,
+                     body_factors=None) -> dict:
+    """
+    All aspects of all charts in one pass per block of charts.
+    body_factors: orb factor per body column (default 1.0); a pair uses the larger.
+
+    Returns a compact dict of parallel arrays, one entry per aspect found:
+      chart (int64), i, j (int16 body columns, i < j), type (int8 index into
+      table.names), orb (float64, unrounded), limit (float64, the pair's
+      AspectTable.orb_limit).
+    """
+    table = table or DEFAULT_ASPECT_TABLE
+    lons = np.asarray(lons, dtype=np.float64)
+    if lons.ndim == 1:
+        lons = lons[None, :]
+    n, p = lons.shape
+    I, J = np.triu_indices(p, k=1)
+    exact = np.array(table.exacts, dtype=np.float64)
+    weight_orb = np.array(table.weight_orbs, dtype=np.float64)
+    factor = 1.0
+    if body_factors is not None:
+        bf = np.asarray(body_factors, dtype=np.float64)
+        factor = np.maximum(bf[I], bf[J])
+
+    out = {"chart": [], "i": [], "j": [], "type": [], "orb": [], "limit": []}
+    for start in range(0, n, block):
+        a = lons[start:start + block]
+        d = separation(a[:, I], a[:, J])
+        kind = classify_separation(d, table, factor)
+
+        rows, pairs = np.nonzero(kind >= 0)
+        t = kind[rows, pairs]
+        out["chart"].append(rows.astype(np.int64) + start)
+        out["i"].append(I[pairs].astype(np.int16))
+        out["j"].append(J[pairs].astype(np.int16))
+        out["type"].append(t)
+        out["orb"].append(np.abs(d[rows, pairs] - exact[t]))
+        out["limit"].append(weight_orb[t] * (factor[pairs] if np.ndim(factor) else factor))
+
+    if not out["chart"]:
+        return {
+            "chart": np.zeros(0, np.int64), "i": np.zeros(0, np.int16), "j": np.zeros(0, np.int16),
+            "type": np.zeros(0, np.int8), "orb": np.zeros(0, np.float64), "limit": np.zeros(0, np.float64),
+        }
+    return {k: np.concatenate(v) for k, v in out.items()}
+
+def aspects_to_records(compact: dict, bodies: list, n_charts: int, key_orders: list | None = None,
+                       table: AspectTable | None = None) -> list:
+    """
+    Expand pairwise_aspects() output into per-chart {"p1","p2","type","orb"} lists,
+    plus "orb_limit" for pairs with an orb factor (as engine.compute_aspects).
+
+    key_orders: optional per-chart body order (the planet dict's key order). When
+    given, pairs are ordered and oriented exactly like engine.compute_aspects.
+    """
+    table = table or DEFAULT_ASPECT_TABLE
+    names, base = table.names, table.weight_orbs
+    result = [[] for _ in range(n_charts)]
+    chart = compact["chart"].tolist()
+    ii = compact["i"].tolist()
+    jj = compact["j"].tolist()
+    tt = compact["type"].tolist()
+    oo = compact["orb"].tolist()
+    ll = compact["limit"].tolist()
+
+    for c, i, j, t, o, lim in zip(chart, ii, jj, tt, oo, ll):
+        a = {"p1": bodies[i], "p2": bodies[j], "type": names[t], "orb": round(o, 2)}
+        if lim != base[t]:
+            a["orb_limit"] = lim
+        result[c].append(a)
+
+    if key_orders is not None:
+        for c, recs in enumerate(result):
+            pos = {p: k for k, p in enumerate(key_orders[c])}
+            for a in recs:
+                if pos[a["p1"]] > pos[a["p2"]]:
+                    a["p1"], a["p2"] = a["p2"], a["p1"]
+            recs.sort(key=lambda a: (pos[a["p1"]], pos[a["p2"]]))
+    return result
+
+def compute_aspects_batch(charts: list, block: int = 8192, table: AspectTable | None = None) -> list:
+    """Vectorized equivalent of [engine.compute_aspects(p, table) for p in charts]."""
+    table = table or DEFAULT_ASPECT_TABLE
+    lons, bodies = charts_to_array(charts)
+    factors = [table.orb_factor(b) for b in bodies] if table.orb_factors else None
+    compact = pairwise_aspects(lons, block, table, factors)
+    return aspects_to_records(compact, bodies, len(charts), [list(p) for p in charts], table)
+
+# =========================
+# HOUSES
+# =========================
+def assign_houses_batch(lons: np.ndarray, cusps: np.ndarray, block: int = 65536) -> np.ndarray:
+    """
+    Houses for an (N × P) longitude array from an (N × 12) cusp longitude array,
+    as int8 1-12 (0 = unknown). Same result as engine.house_of per element.
+    Rows with a missing cusp (NaN) or cusps out of zodiac order get 0.
+    """
+    lons = np.asarray(lons, dtype=np.float64)
+    cusps = np.asarray(cusps, dtype=np.float64)
+    out = np.zeros(lons.shape, dtype=np.int8)
+    for start in range(0, len(lons), block):
+        c = cusps[start:start + block]
+        first = c[:, :1]
+        # np.mod == Python % for floats, so offsets match engine.cusp_circle
+        rel = np.mod(c - first, 360.0)
+        valid = ~np.isnan(rel).any(axis=1) & (np.diff(rel, axis=1) >= 0).all(axis=1)
+        r = np.mod(lons[start:start + block] - first, 360.0)
+        # with sorted offsets, counting cusps <= r is bisect_right over 12 values
+        house = (r[:, :, None] >= rel[:, None, :]).sum(axis=2, dtype=np.int8)
+        house[np.isnan(r) | ~valid[:, None]] = 0
+        out[start:start + block] = house
+    return out